@@ -1,68 +1,55 @@
 import os
 import json
+import hashlib
 from datetime import datetime
 import re
-from collections import defaultdict
-from typing import Dict, List
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from pdf_to_text import FinancialKeywords
-import numpy as np
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from pdf_to_text import EnhancedFinancialReportProcessor
+from sentence_index import SENTENCE_BREAK, SentenceIndex
+from keyword_engine import KeywordAnnotations
+from token_counter import TokenCounter
+from similarity import SimilarityGraph
+from extraction_cache import file_digest
+from chunk_io import (
+    iter_chunk_file, legacy_path, open_chunk_writer, read_chunk_file, temporary_path,
+    write_chunk_file, write_similarities
+)
+
+
+def article_id(filename: str) -> str:
+    """Stable id of an article file, independent of processing order"""
+    return hashlib.sha1(filename.encode('utf-8')).hexdigest()[:12]
+
 
 class ArticleProcessor:
     def __init__(self, articles_dir: str, output_file: str):
         self.articles_dir = articles_dir
         self.output_file = output_file
-        self.existing_chunks = self.load_existing_chunks()
-        self.keywords = FinancialKeywords()  # Using your existing FinancialKeywords class
+        # Articles are chunked like reports, within the embedding-token budget
+        self.chunker = EnhancedFinancialReportProcessor(articles_dir, os.path.dirname(output_file) or '.')
+        self.keywords = self.chunker.keywords
+        self.token_counter: TokenCounter = self.chunker.token_counter
         
     def load_existing_chunks(self) -> List[Dict]:
         """Load existing chunks from the output file"""
         try:
-            with open(self.output_file, 'r') as f:
-                return json.load(f)
+            return read_chunk_file(self.output_file)
         except FileNotFoundError:
             return []
 
-    def find_keywords_in_text(self, text: str) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+    def find_keywords_in_text(self, text: str,
+                              sentence_index: Optional[SentenceIndex] = None) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
         """Find all financial keywords in text with context"""
-        text_lower = text.lower()
-        findings = defaultdict(lambda: defaultdict(list))
-        context_window = 100
-        
-        for category_group_name, category_group in {
-            'FINANCIAL_METRICS': self.keywords.FINANCIAL_METRICS,
-            'COMPANY_STATE': self.keywords.COMPANY_STATE,
-            'RISK_FACTORS': self.keywords.RISK_FACTORS,
-            'BUSINESS_OUTLOOK': self.keywords.BUSINESS_OUTLOOK
-        }.items():
-            for category_name, keywords in category_group.items():
-                for keyword in keywords:
-                    for match in re.finditer(r'\b' + re.escape(keyword) + r'\b', text_lower):
-                        start = max(0, match.start() - context_window)
-                        end = min(len(text), match.end() + context_window)
-                        
-                        findings[category_group_name][category_name].append({
-                            'keyword': keyword,
-                            'context': text[start:end].strip(),
-                            'position': match.start(),
-                            'sentence': self.find_containing_sentence(text, match.start())
-                        })
-        
-        return dict(findings)
+        return self.keywords.matcher().find_keywords(text, sentence_index)
+
+    def annotate_keywords(self, text: str,
+                          sentence_index: Optional[SentenceIndex] = None) -> KeywordAnnotations:
+        """Find all financial keywords in text as compact offset records"""
+        return self.keywords.matcher().annotate(text, sentence_index)
 
     def find_containing_sentence(self, text: str, position: int) -> str:
         """Find the full sentence containing the given position"""
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        current_pos = 0
-        
-        for sentence in sentences:
-            sentence_length = len(sentence) + 2
-            if current_pos <= position < current_pos + sentence_length:
-                return sentence.strip()
-            current_pos += sentence_length
-        
-        return ""
+        return SentenceIndex.from_text(text).sentence_at(position)
 
     def extract_company_from_header(self, header: str) -> str:
         """Extract company name from article header"""
@@ -87,84 +74,218 @@ class ArticleProcessor:
             return match.group(1)
         return "unknown"
 
-    def process_article(self, header: str, date: str, content: str, article_number: int) -> Dict:
-        """Process a single article and return chunk data"""
+    def process_article(self, header: str, date: str, content: str, article_id: str,
+                        source: Optional[str] = None) -> List[Dict]:
+        """Split a single article into chunks within the embedding-token budget.
+
+        Sentences are packed by the report chunker, so long articles are not
+        truncated when embedded. Part n gets the chunk id
+        `<company>_<year>_article_<id>_<n:03d>`.
+        """
         company = self.extract_company_from_header(header)
         year = self.extract_date_from_header(date)
-        
-        chunk_id = f"{company}_{year}_article_{article_number:03d}"
-        word_count = len(content.split())
-        
-        return {
-            'chunk_id': chunk_id,
-            'content': content,
-            'word_count': word_count,
-            'keyword_analysis': self.find_keywords_in_text(content),
+        metadata = {
             'company': company,
             'year': year,
-            'source': f"article_{article_number}",
+            'source': source or f"article_{article_id}",
             'processing_date': datetime.now().isoformat()
         }
 
+        sentences = ((sentence, None) for sentence in SENTENCE_BREAK.split(content))
+        chunks = []
+        for part, chunk in enumerate(self.chunker.iter_chunks(sentences, metadata), start=1):
+            chunk['chunk_id'] = f"{company}_{year}_article_{article_id}_{part:03d}"
+            chunks.append(chunk)
+        return chunks
+
+    def process_article_file(self, filename: str) -> Optional[List[Dict]]:
+        """Chunks of one article file; None if it is not in the header/date/content format"""
+        with open(os.path.join(self.articles_dir, filename), 'r') as f:
+            content = f.read()
+
+        # Parse article content
+        # Assuming format: header\ndate\ncontent
+        parts = content.strip().split('\n', 2)
+        if len(parts) != 3:
+            return None
+        header, date, article_content = parts
+        return self.process_article(header, date, article_content, article_id(filename), filename)
+
+    def iter_article_chunks(self) -> Iterator[Dict]:
+        """Yield the chunks of every article file, in filename order"""
+        for filename in sorted(os.listdir(self.articles_dir)):
+            if filename.endswith('.txt'):
+                yield from self.process_article_file(filename) or []
+
     def process_articles_directory(self):
         """Process all articles in the directory and add them to existing chunks"""
-        article_chunks = []
-        article_number = 1
+        article_chunks = list(self.iter_article_chunks())
 
-        # Read all files in the articles directory
-        for filename in os.listdir(self.articles_dir):
-            if filename.endswith('.txt'):
-                with open(os.path.join(self.articles_dir, filename), 'r') as f:
-                    content = f.read()
-                    
-                    # Parse article content
-                    # Assuming format: header\ndate\ncontent
-                    parts = content.strip().split('\n', 2)
-                    if len(parts) == 3:
-                        header, date, article_content = parts
-                        chunk = self.process_article(header, date, article_content, article_number)
-                        article_chunks.append(chunk)
-                        article_number += 1
-
-        # Combine existing chunks with new article chunks
-        all_chunks = self.existing_chunks + article_chunks
+        # Re-processed articles replace every part of their earlier version
+        sources = {chunk['source'] for chunk in article_chunks}
+        existing_chunks = [chunk for chunk in self.load_existing_chunks() if chunk.get('source') not in sources]
+        all_chunks = existing_chunks + article_chunks
         
-        # Calculate similarities for all chunks
+        # Update the similarity graph; only new articles are scored against the corpus
         texts = [chunk['content'] for chunk in all_chunks]
-        tfidf = TfidfVectorizer(max_features=1000, stop_words='english', ngram_range=(1, 2))
-        tfidf_matrix = tfidf.fit_transform(texts)
-        similarity_matrix = cosine_similarity(tfidf_matrix)
-        
-        # Update similarities
-        similarities = {}
-        for i, chunk in enumerate(all_chunks):
-            similar_chunks = []
-            for j in np.argsort(similarity_matrix[i])[-4:-1][::-1]:
-                if i != j and similarity_matrix[i][j] > 0.3:
-                    similar_chunks.append({
-                        'chunk_id': all_chunks[j]['chunk_id'],
-                        'similarity_score': float(similarity_matrix[i][j])
-                    })
-            similarities[chunk['chunk_id']] = similar_chunks
+        chunk_ids = [chunk['chunk_id'] for chunk in all_chunks]
+        graph = SimilarityGraph(os.path.join(os.path.dirname(self.output_file), 'similarity_graph'))
+        print(f"Similarity graph {graph.sync(chunk_ids, texts)}")
+        similarities = graph.similarities()
         
         # Save updated chunks
-        with open(self.output_file, 'w') as f:
-            json.dump(all_chunks, f, indent=2)
+        write_chunk_file(self.output_file, all_chunks)
         
         # Save updated similarities
-        similarities_file = os.path.join(os.path.dirname(self.output_file), 'similarities.json')
-        with open(similarities_file, 'w') as f:
-            json.dump(similarities, f, indent=2)
+        similarities_file = os.path.join(os.path.dirname(self.output_file), 'similarities.jsonl.gz')
+        write_similarities(similarities_file, similarities)
         
-        print(f"Processed {len(article_chunks)} articles")
+        print(f"Processed {len(sources)} articles into {len(article_chunks)} chunks")
         print(f"Total chunks after processing: {len(all_chunks)}")
         print(f"Updated chunks saved to: {self.output_file}")
         print(f"Updated similarities saved to: {similarities_file}")
 
+
+class IncrementalArticleIngestor:
+    """Append-only ingestion of news articles.
+
+    A manifest next to the chunk store records every ingested file with its
+    size, mtime and content hash, so a run only stats the articles directory
+    and processes new or modified files. New chunks are appended to the
+    store (one gzip member per batch) without reading it. A modified article
+    keeps its chunk ids; the store is compacted once to drop the old parts.
+    When the chunking settings change, every article is re-ingested.
+    The manifest also records the committed size of the store, and anything
+    after it (an interrupted batch) is truncated before the next run.
+    """
+
+    BATCH_SIZE = 100
+
+    def __init__(self, articles_dir: str,
+                 store_file: str = os.path.join('data', 'raw_processed', 'articles_chunks.jsonl.gz')):
+        self.articles_dir = articles_dir
+        self.store_file = store_file
+        self.manifest_file = legacy_path(store_file)[:-len('.json')] + '_manifest.json'
+        self.processor = ArticleProcessor(articles_dir, store_file)
+        self.manifest = self.load_manifest()
+
+    def chunking(self) -> Dict:
+        """Settings that change article chunks (recorded in the manifest)"""
+        return {
+            'overlap_sentences': self.processor.chunker.CHUNK_OVERLAP_SENTENCES,
+            **self.processor.token_counter.params()
+        }
+
+    def load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {'store_bytes': 0, 'articles': {}}
+
+    def save_manifest(self) -> None:
+        tmp_path = f"{self.manifest_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_file)
+
+    def recover(self) -> None:
+        """Bring the store back to the last committed batch, or start over if it cannot be reused"""
+        store_bytes = os.path.getsize(self.store_file) if os.path.exists(self.store_file) else 0
+        if store_bytes > self.manifest['store_bytes']:
+            print(f"Discarding an unfinished batch at the end of {self.store_file}")
+            with open(self.store_file, 'r+b') as f:
+                f.truncate(self.manifest['store_bytes'])
+        elif store_bytes < self.manifest['store_bytes']:
+            # The store was replaced or removed behind our back: start over
+            print(f"{self.store_file} does not match its manifest, re-ingesting all articles")
+            self.manifest = {'store_bytes': 0, 'articles': {}}
+            if os.path.exists(self.store_file):
+                os.remove(self.store_file)
+        if self.manifest['articles'] and self.manifest.get('chunking') != self.chunking():
+            print(f"Article chunking changed, re-ingesting all articles into {self.store_file}")
+            self.manifest = {'store_bytes': 0, 'articles': {}}
+            if os.path.exists(self.store_file):
+                os.remove(self.store_file)
+        self.manifest['chunking'] = self.chunking()
+
+    def scan(self, filenames: Optional[List[str]] = None) -> Tuple[List[Tuple[str, Dict]], List[Tuple[str, Dict]]]:
+        """Split article files into new and modified ones, hashing only files whose stat changed"""
+        new, modified = [], []
+        for filename in filenames if filenames is not None else sorted(os.listdir(self.articles_dir)):
+            if not filename.endswith('.txt'):
+                continue
+            path = os.path.join(self.articles_dir, filename)
+            stat = os.stat(path)
+            record = self.manifest['articles'].get(filename)
+            if record and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+                continue
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_digest(path)}
+            if record is None:
+                new.append((filename, entry))
+            elif record['sha256'] != entry['sha256']:
+                modified.append((filename, {**entry, 'chunk_ids': record.get('chunk_ids', [])}))
+            else:
+                # Touched but unchanged
+                record.update(entry)
+        return new, modified
+
+    def compact(self, drop_ids: Set[str]) -> None:
+        """Rewrite the store without the given chunk ids"""
+        tmp_path = temporary_path(self.store_file)
+        write_chunk_file(tmp_path, (
+            chunk for chunk in iter_chunk_file(self.store_file) if chunk['chunk_id'] not in drop_ids
+        ))
+        os.replace(tmp_path, self.store_file)
+        self.manifest['store_bytes'] = os.path.getsize(self.store_file)
+        self.save_manifest()
+
+    def ingest(self, filenames: Optional[List[str]] = None,
+               on_chunk: Optional[Callable[[Dict], None]] = None) -> Dict[str, int]:
+        """Append chunks for new and modified articles (all, or just `filenames`), returning counts.
+
+        `on_chunk` receives every appended chunk once its batch is committed.
+        """
+        self.recover()
+        new, modified = self.scan(filenames)
+
+        stale_ids = {chunk_id for _, entry in modified for chunk_id in entry['chunk_ids']}
+        if stale_ids and os.path.exists(self.store_file):
+            print(f"Replacing {len(modified)} modified articles ({len(stale_ids)} chunks)")
+            self.compact(stale_ids)
+
+        stats = {'new': len(new), 'modified': len(modified), 'skipped': 0, 'appended': 0, 'chunks': 0}
+        pending = new + modified
+        with open_chunk_writer(self.store_file, append=True) as writer:
+            for batch_start in range(0, len(pending), self.BATCH_SIZE):
+                batch_chunks = []
+                for filename, entry in pending[batch_start:batch_start + self.BATCH_SIZE]:
+                    chunks = self.processor.process_article_file(filename)
+                    entry['chunk_ids'] = [chunk['chunk_id'] for chunk in chunks or []]
+                    if chunks is None:
+                        stats['skipped'] += 1
+                    else:
+                        for chunk in chunks:
+                            writer.write(chunk)
+                        batch_chunks.extend(chunks)
+                        stats['appended'] += 1
+                        stats['chunks'] += len(chunks)
+                    self.manifest['articles'][filename] = entry
+                # Commit the batch: the store first, then the manifest pointing past it
+                self.manifest['store_bytes'] = writer.mark()[0]
+                self.save_manifest()
+                if on_chunk is not None:
+                    for chunk in batch_chunks:
+                        on_chunk(chunk)
+        self.save_manifest()
+
+        print(f"Ingested {stats['appended']} articles as {stats['chunks']} chunks ({stats['new']} new, {stats['modified']} modified, "
+              f"{len(self.manifest['articles']) - stats['new'] - stats['modified']} unchanged)")
+        return stats
+
+
 # Example usage
 if __name__ == "__main__":
-    processor = ArticleProcessor(
-        articles_dir="./articles",
-        output_file="./data/raw_processed/all_chunks.json"
-    )
-    processor.process_articles_directory()
\ No newline at end of file
+    ingestor = IncrementalArticleIngestor(articles_dir="./articles")
+    ingestor.ingest()
+    print(f"Article chunks stored in: {ingestor.store_file} (run pipeline.py to merge them into all_chunks)")
\ No newline at end of file
@@ -0,0 +1,208 @@
+# src/bars.py
+
+import os
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+# One intraday bar; 32 bytes, float32 prices are exact to well below a tick
+BAR_DTYPE = np.dtype([
+    ('ts', '<i8'),        # bar start, UTC nanoseconds
+    ('open', '<f4'),
+    ('high', '<f4'),
+    ('low', '<f4'),
+    ('close', '<f4'),
+    ('volume', '<i8'),
+])
+
+TRADING_DAYS = 252
+MINUTE_NS = 60 * 10 ** 9
+DAY_NS = 24 * 60 * MINUTE_NS
+
+INTRADAY_MINUTES = {'1min': 1, '5min': 5, '15min': 15, '30min': 30, '1h': 60}
+PERIODS_PER_YEAR = {'1d': TRADING_DAYS, '1w': 52, '1mo': 12}
+
+
+class Session:
+    """Regular trading hours of an exchange in its local time zone"""
+
+    def __init__(self, name: str, timezone: str, open_time: str, close_time: str):
+        self.name = name
+        self.timezone = timezone
+        self.open_minute = self._minutes(open_time)
+        self.close_minute = self._minutes(close_time)
+
+    @staticmethod
+    def _minutes(hh_mm: str) -> int:
+        hours, minutes = hh_mm.split(':')
+        return int(hours) * 60 + int(minutes)
+
+    @property
+    def minutes(self) -> int:
+        return self.close_minute - self.open_minute
+
+
+SESSIONS = {
+    'SIX': Session('SIX', 'Europe/Zurich', '09:00', '17:30'),
+    'NYSE': Session('NYSE', 'America/New_York', '09:30', '16:00'),
+    'EURONEXT': Session('EURONEXT', 'Europe/Paris', '09:00', '17:30'),
+}
+
+
+def session_for(ticker: str) -> Session:
+    """Exchange session of a ticker, from its Yahoo suffix"""
+    if ticker.endswith('.SW') or ticker == '^SSMI':
+        return SESSIONS['SIX']
+    if ticker.endswith('.PA') or ticker == '^FCHI':
+        return SESSIONS['EURONEXT']
+    return SESSIONS['NYSE']
+
+
+def bar_minutes(frequency: str, session: Session) -> int:
+    if frequency == '1d':
+        return session.minutes
+    if frequency not in INTRADAY_MINUTES:
+        raise ValueError(f"Unsupported bar frequency {frequency!r}")
+    return INTRADAY_MINUTES[frequency]
+
+
+def annualization_factor(frequency: str = '1d', session: Optional[Session] = None) -> float:
+    """Bars per year: 252 trading days times the bars in one session"""
+    if frequency in PERIODS_PER_YEAR:
+        return PERIODS_PER_YEAR[frequency]
+    session = session or SESSIONS['NYSE']
+    return TRADING_DAYS * int(np.ceil(session.minutes / bar_minutes(frequency, session)))
+
+
+def panel_annualization_factor(index: pd.DatetimeIndex) -> float:
+    """Bars per year of a panel aligned across sessions, from its median bars per day"""
+    days = index.tz_convert(None).normalize() if index.tz is not None else index.normalize()
+    return TRADING_DAYS * float(np.median(pd.Series(1, index=days).groupby(level=0).size()))
+
+
+# ---------------------------------------------------------------------- #
+# Vectorized resampling
+# ---------------------------------------------------------------------- #
+def session_buckets(ts: np.ndarray, session: Session, minutes: int):
+    """Bucket start (UTC ns) of every timestamp and whether it falls in the session.
+
+    Buckets are aligned to the session open in local time, so a 1h bar on
+    NYSE starts at 09:30, 10:30, ... across DST changes, and the last bucket
+    of a session is cut at the close.
+    """
+    utc = pd.DatetimeIndex(ts.astype('datetime64[ns]'), tz='UTC')
+    local = utc.tz_convert(session.timezone).tz_localize(None).as_unit('ns').asi8
+    offset = local - ts
+
+    day = local - local % DAY_NS
+    time_of_day = local - day
+    open_ns, close_ns = session.open_minute * MINUTE_NS, session.close_minute * MINUTE_NS
+    in_session = (time_of_day >= open_ns) & (time_of_day < close_ns)
+
+    step = minutes * MINUTE_NS
+    bucket_local = day + open_ns + (time_of_day - open_ns) // step * step
+    return bucket_local - offset, in_session
+
+
+def resample_ohlcv(bars: np.ndarray, frequency: str, session: Session) -> np.ndarray:
+    """Aggregate time-sorted bars to `frequency` within `session` hours.
+
+    One pass over the data: bucket boundaries come from a diff of the bucket
+    keys, and high/low/volume are reduced with `reduceat` on those
+    boundaries, so there is no Python loop or groupby per bucket.
+    """
+    buckets, in_session = session_buckets(bars['ts'], session, bar_minutes(frequency, session))
+    bars, buckets = bars[in_session], buckets[in_session]
+    if not len(bars):
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(bars)] - 1
+
+    resampled = np.empty(len(starts), dtype=BAR_DTYPE)
+    resampled['ts'] = buckets[starts]
+    resampled['open'] = bars['open'][starts]
+    resampled['high'] = np.maximum.reduceat(bars['high'], starts)
+    resampled['low'] = np.minimum.reduceat(bars['low'], starts)
+    resampled['close'] = bars['close'][ends]
+    resampled['volume'] = np.add.reduceat(bars['volume'], starts)
+    return resampled
+
+
+def close_panel(bars_by_ticker: Dict[str, np.ndarray], frequency: str) -> pd.DataFrame:
+    """Closes of several tickers on one grid, each resampled on its own exchange session.
+
+    Intraday panels are indexed by UTC bar start; a ticker whose market is
+    closed has no value in that row (returns forward-fill it, so it adds a
+    zero return). Daily panels are indexed by date, like the daily store.
+    """
+    closes = {}
+    for ticker, bars in bars_by_ticker.items():
+        resampled = resample_ohlcv(bars, frequency, session_for(ticker))
+        closes[ticker] = pd.Series(resampled['close'].astype('float64'),
+                                   index=pd.DatetimeIndex(resampled['ts'].astype('datetime64[ns]'), tz='UTC'))
+
+    panel = pd.DataFrame(closes).sort_index()
+    if frequency == '1d':
+        # Sessions of one trading day all open on the same UTC date
+        panel = panel.groupby(panel.index.tz_convert(None).normalize()).last()
+    panel.index.name = 'Date'
+    return panel
+
+
+# ---------------------------------------------------------------------- #
+# Storage
+# ---------------------------------------------------------------------- #
+class IntradayBarStore:
+    """Intraday bars, one structured `.npy` file per frequency and ticker.
+
+    Files are memory-mapped on read and sliced by binary search on the
+    timestamp column, so reading a day out of a year of minute bars only
+    touches that day's pages. Writes merge with the existing bars (new bars
+    win on equal timestamps) and replace the file atomically.
+    """
+
+    def __init__(self, directory: str = os.path.join('data', 'raw', 'intraday')):
+        self.directory = directory
+
+    def _path(self, ticker: str, frequency: str) -> str:
+        return os.path.join(self.directory, frequency, f"{ticker}.npy")
+
+    def tickers(self, frequency: str):
+        frequency_dir = os.path.join(self.directory, frequency)
+        if not os.path.isdir(frequency_dir):
+            return []
+        return sorted(name[:-len('.npy')] for name in os.listdir(frequency_dir) if name.endswith('.npy'))
+
+    def read(self, ticker: str, frequency: str, start=None, end=None) -> np.ndarray:
+        """Bars with `start <= ts < end` as a read-only memory-mapped slice"""
+        path = self._path(ticker, frequency)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=BAR_DTYPE)
+        bars = np.load(path, mmap_mode='r')
+        ts = bars['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value, side='left'))
+        hi = len(bars) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side='left'))
+        return bars[lo:hi]
+
+    def write(self, ticker: str, frequency: str, bars: np.ndarray) -> int:
+        """Merge `bars` into the stored ones; returns the number of stored bars"""
+        bars = np.asarray(bars, dtype=BAR_DTYPE)
+        existing = self.read(ticker, frequency)
+        merged = np.concatenate([existing, bars])
+        appended = np.all(np.diff(merged['ts'][max(len(existing) - 1, 0):]) > 0)
+        if not appended:
+            merged = merged[np.argsort(merged['ts'], kind='stable')]
+            # Keep the last of equal timestamps, i.e. the newly written bar
+            merged = merged[np.r_[merged['ts'][1:] != merged['ts'][:-1], True]]
+
+        path = self._path(ticker, frequency)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npy"
+        np.save(tmp_path, merged)
+        os.replace(tmp_path, path)
+        return len(merged)
+
+    def read_panel(self, tickers, frequency: str, target: str, start=None, end=None) -> pd.DataFrame:
+        """Close panel at `target` frequency built from stored `frequency` bars"""
+        return close_panel({ticker: self.read(ticker, frequency, start, end) for ticker in tickers}, target)
@@ -0,0 +1,154 @@
+# src/benchmark_bars.py
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import argparse
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from bars import (BAR_DTYPE, MINUTE_NS, IntradayBarStore, close_panel, panel_annualization_factor,
+                  resample_ohlcv, session_buckets, session_for)
+from benchmark_utils import StageTimer, peak_rss_mb
+from market_store import daily_returns
+
+DEFAULT_TICKERS = ['UBSG.SW', 'ABBN.SW', 'SCHN.SW', 'NESN.SW', 'ROG.SW', 'NOVN.SW',
+                   'AAPL', 'MSFT', 'GOOGL', 'BLK', 'JPM', 'GS', '^GSPC', '^SSMI', '^FCHI']
+
+
+def generate_minute_bars(ticker: str, days: int, start: str = '2024-01-02', seed: int = 0) -> np.ndarray:
+    """Random-walk minute bars covering the ticker's session on `days` business days"""
+    session = session_for(ticker)
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=days).as_unit('ns').asi8
+    minutes = np.arange(session.open_minute, session.close_minute, dtype=np.int64) * MINUTE_NS
+    local = (dates[:, None] + minutes[None, :]).ravel()
+    ts = pd.DatetimeIndex(local).tz_localize(session.timezone).tz_convert('UTC').as_unit('ns').asi8
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(ts))))
+    open_ = np.r_[100.0, close[:-1]]
+    spread = np.abs(rng.normal(0, 0.0004, len(ts)))
+    bars = np.empty(len(ts), dtype=BAR_DTYPE)
+    bars['ts'] = ts
+    bars['open'], bars['close'] = open_, close
+    bars['high'] = np.maximum(open_, close) * (1 + spread)
+    bars['low'] = np.minimum(open_, close) * (1 - spread)
+    bars['volume'] = rng.integers(100, 10_000, len(ts))
+    return bars
+
+
+def pandas_resample(bars: np.ndarray, frequency_minutes: int, ticker: str) -> pd.DataFrame:
+    """Baseline: the same session-aligned buckets aggregated with a pandas groupby"""
+    buckets, in_session = session_buckets(bars['ts'], session_for(ticker), frequency_minutes)
+    df = pd.DataFrame({name: bars[name][in_session] for name in ('open', 'high', 'low', 'close', 'volume')})
+    return df.groupby(buckets[in_session]).agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    )
+
+
+def run_benchmark(work_dir: str, tickers: List[str], days: int, timer: StageTimer) -> Dict:
+    bars = {ticker: generate_minute_bars(ticker, days, seed=i) for i, ticker in enumerate(tickers)}
+    n_bars = sum(len(b) for b in bars.values())
+    store = IntradayBarStore(work_dir)
+
+    timer.measure('write', lambda: [store.write(t, '1min', b) for t, b in bars.items()],
+                  units=lambda _: n_bars, unit='bars')
+    loaded = timer.measure('load', lambda: {t: np.array(store.read(t, '1min')) for t in tickers},
+                           units=lambda result: sum(len(b) for b in result.values()), unit='bars')
+    day = pd.bdate_range('2024-01-02', periods=days)[days // 2]
+    one_day = timer.measure(
+        'load_day', lambda: {t: store.read(t, '1min', day, day + pd.Timedelta(days=1)) for t in tickers},
+        units=lambda result: sum(len(b) for b in result.values()), unit='bars'
+    )
+
+    resampled = {}
+    for frequency in ('5min', '1h', '1d'):
+        resampled[frequency] = timer.measure(
+            f'resample_{frequency}',
+            lambda: {t: resample_ohlcv(b, frequency, session_for(t)) for t, b in loaded.items()},
+            units=lambda _: n_bars, unit='bars'
+        )
+
+    baseline = timer.measure('pandas_5min', lambda: {t: pandas_resample(b, 5, t) for t, b in loaded.items()},
+                             units=lambda _: n_bars, unit='bars')
+    for ticker, expected in baseline.items():
+        got = resampled['5min'][ticker]
+        assert np.array_equal(got['ts'], expected.index.to_numpy())
+        for name in ('open', 'high', 'low', 'close', 'volume'):
+            assert np.array_equal(got[name], expected[name].to_numpy()), (ticker, name)
+
+    panels = {}
+    for frequency in ('1min', '5min'):
+        panels[frequency] = timer.measure(f'align_{frequency}', lambda: close_panel(loaded, frequency),
+                                          units=lambda panel: panel.size, unit='cells')
+    returns_1min = timer.measure('returns_1min', lambda: daily_returns(panels['1min']),
+                                 units=lambda df: df.size, unit='cells')
+    periods_per_year = panel_annualization_factor(panels['1min'].index)
+
+    try:
+        from portfolio_analysis import calculate_portfolio_metrics
+    except Exception as e:
+        timer.skip('metrics_1min', f"{type(e).__name__}: {e}")
+    else:
+        timer.measure('metrics_1min', lambda: calculate_portfolio_metrics(returns_1min, periods_per_year)[0])
+
+    store_bytes = sum(os.path.getsize(os.path.join(work_dir, '1min', f"{t}.npy")) for t in tickers)
+    pandas_bytes = sum(
+        pd.DataFrame({name: b[name] for name in BAR_DTYPE.names[1:]},
+                     index=pd.DatetimeIndex(b['ts'].astype('datetime64[ns]'))).astype('float64')
+        .memory_usage(index=True, deep=True).sum()
+        for b in loaded.values()
+    )
+    return {
+        'bars': n_bars,
+        'bars_in_one_day': sum(len(b) for b in one_day.values()),
+        'bytes_per_bar': BAR_DTYPE.itemsize,
+        'store_mb': round(store_bytes / 1e6, 2),
+        'pandas_float64_mb': round(pandas_bytes / 1e6, 2),
+        'panel_1min_shape': list(panels['1min'].shape),
+        'panel_1min_mb': round(panels['1min'].memory_usage(deep=True).sum() / 1e6, 2),
+        'resampled_bars': {f: sum(len(b) for b in r.values()) for f, r in resampled.items()},
+        'periods_per_year_1min_panel': periods_per_year,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intraday bar storage, resampling and alignment")
+    parser.add_argument('--days', type=int, default=252, help="Trading days of minute bars per ticker")
+    parser.add_argument('--tickers', type=int, default=len(DEFAULT_TICKERS), help="Number of tickers")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated bar store")
+    args = parser.parse_args()
+
+    tickers = (DEFAULT_TICKERS * (args.tickers // len(DEFAULT_TICKERS) + 1))[:args.tickers]
+    tickers = [ticker if i < len(DEFAULT_TICKERS) else f"{ticker}{i}" for i, ticker in enumerate(tickers)]
+    work_dir = tempfile.mkdtemp(prefix='bars-benchmark-')
+    timer = StageTimer()
+    try:
+        totals = run_benchmark(work_dir, tickers, args.days, timer)
+    finally:
+        if args.keep:
+            print(f"Bar store kept in {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'generated': datetime.now().isoformat(),
+        'tickers': len(tickers),
+        'days': args.days,
+        'totals': totals,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stages': timer.stages,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
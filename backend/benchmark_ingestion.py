@@ -0,0 +1,152 @@
+# src/benchmark_ingestion.py
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import argparse
+from array import array
+from datetime import datetime
+from typing import Dict
+from pdf_to_text import EnhancedFinancialReportProcessor, FinancialKeywords
+from articles_to_text import ArticleProcessor
+from keyword_engine import KeywordAnnotations
+from similarity import compute_similarities
+from synthetic_corpus import generate_corpus
+from benchmark_utils import StageTimer, peak_rss_mb
+
+
+def run_benchmark(corpus_dir: str, timer: StageTimer, embed: bool = True) -> Dict:
+    """Run every ingestion stage over the corpus, one stage at a time"""
+    reports_dir = os.path.join(corpus_dir, 'reports')
+    processor = EnhancedFinancialReportProcessor(reports_dir, corpus_dir)
+    matcher = FinancialKeywords.matcher()
+    filenames = sorted(f for f in os.listdir(reports_dir) if f.endswith('.pdf'))
+
+    pages = timer.measure(
+        'extract',
+        lambda: {f: processor.extract_pages(os.path.join(reports_dir, f)) for f in filenames},
+        units=lambda result: sum(len(p) for p in result.values()), unit='pages',
+        size_bytes=sum(os.path.getsize(os.path.join(reports_dir, f)) for f in filenames)
+    )
+    text_bytes = sum(len(text) for file_pages in pages.values() for _, text in file_pages)
+
+    sentences = timer.measure(
+        'clean',
+        lambda: {f: list(processor.iter_clean_sentences(p)) for f, p in pages.items()},
+        units=lambda result: sum(len(s) for s in result.values()), unit='sentences',
+        size_bytes=text_bytes
+    )
+
+    # Chunking without keyword analysis, which is measured as its own stage
+    annotate_keywords = processor.annotate_keywords
+    processor.annotate_keywords = lambda text, sentence_index=None: KeywordAnnotations(matcher, array('i'))
+    try:
+        chunks = timer.measure(
+            'chunk',
+            lambda: [chunk for f in filenames
+                     for chunk in processor.iter_chunks(sentences[f], processor.build_metadata(f))],
+            units=len, unit='chunks'
+        )
+    finally:
+        processor.annotate_keywords = annotate_keywords
+
+    texts = [chunk['content'] for chunk in chunks]
+    annotations = timer.measure(
+        'keywords',
+        lambda: [processor.annotate_keywords(text) for text in texts],
+        units=len, unit='chunks', size_bytes=sum(map(len, texts))
+    )
+
+    articles = ArticleProcessor(os.path.join(corpus_dir, 'articles'),
+                                os.path.join(corpus_dir, 'article_chunks.jsonl.gz'))
+    article_chunks = timer.measure('articles', lambda: list(articles.iter_article_chunks()),
+                                   units=len, unit='chunks')
+    texts += [chunk['content'] for chunk in article_chunks]
+    chunk_ids = [chunk['chunk_id'] for chunk in chunks + article_chunks]
+
+    timer.measure('similarity', lambda: compute_similarities(texts, chunk_ids),
+                  units=len, unit='chunks')
+
+    embeddings = None
+    if not embed:
+        timer.skip('embed', 'disabled')
+    else:
+        try:
+            from generate_embeddings import EmbeddingsGenerator
+        except ImportError as e:
+            timer.skip('embed', str(e))
+        else:
+            generator = EmbeddingsGenerator()
+            embeddings = timer.measure('embed', lambda: generator.generate_embeddings(texts),
+                                       units=len, unit='chunks')
+
+    if embeddings is None:
+        timer.skip('index', 'no embeddings')
+    else:
+        try:
+            import faiss
+            import numpy as np
+        except ImportError as e:
+            timer.skip('index', str(e))
+        else:
+            def build_index():
+                matrix = np.asarray(embeddings, dtype='float32')
+                faiss.normalize_L2(matrix)
+                index = faiss.IndexFlatIP(matrix.shape[1])
+                index.add(matrix)
+                return index
+            timer.measure('index', build_index, units=lambda index: index.ntotal, unit='vectors')
+
+    return {
+        'reports': len(filenames),
+        'pages': sum(len(p) for p in pages.values()),
+        'text_mb': round(text_bytes / 1e6, 2),
+        'chunks': len(chunks),
+        'articles': len(article_chunks),
+        'keyword_hits': sum(len(a) for a in annotations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the ingestion stages on a synthetic corpus; prints a JSON report"
+    )
+    parser.add_argument('--reports', type=int, default=4)
+    parser.add_argument('--pages', type=int, default=50, help="Pages per report")
+    parser.add_argument('--articles', type=int, default=50)
+    parser.add_argument('--keyword-density', type=float, default=0.03,
+                        help="Fraction of words drawn from the keyword taxonomy")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-embed', action='store_true', help="Skip the embedding and index stages")
+    parser.add_argument('--corpus-dir', help="Keep the generated corpus here instead of a temporary directory")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix='ingestion-benchmark-')
+    try:
+        generate_corpus(corpus_dir, args.reports, args.pages, args.articles, args.keyword_density, args.seed)
+        timer = StageTimer()
+        corpus = run_benchmark(corpus_dir, timer, embed=not args.no_embed)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    report = {
+        'generated': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'config': {key: value for key, value in vars(args).items() if key not in ('corpus_dir', 'output')},
+        'corpus': corpus,
+        'stages': timer.stages,
+        'total_seconds': round(sum(stage.get('seconds', 0) for stage in timer.stages), 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# src/benchmark_keywords.py
+
+import os
+import re
+import glob
+import json
+import time
+import argparse
+from collections import defaultdict
+from pdf_to_text import FinancialKeywords, EnhancedFinancialReportProcessor
+from sentence_index import SentenceIndex
+from chunk_io import iter_chunk_file, legacy_path
+
+
+def find_containing_sentence_resplit(text, position):
+    """Reference implementation: re-split the text and walk the sentences"""
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    current_pos = 0
+    for sentence in sentences:
+        sentence_length = len(sentence) + 2
+        if current_pos <= position < current_pos + sentence_length:
+            return sentence.strip()
+        current_pos += sentence_length
+    return ""
+
+
+def find_keywords_regex(text):
+    """Reference implementation: one `re.finditer` scan per keyword"""
+    text_lower = text.lower()
+    findings = defaultdict(lambda: defaultdict(list))
+    context_window = 100
+
+    for category_group_name, category_group in FinancialKeywords.taxonomy().items():
+        for category_name, keywords in category_group.items():
+            for keyword in sorted(keywords):
+                for match in re.finditer(r'\b' + re.escape(keyword) + r'\b', text_lower):
+                    start = max(0, match.start() - context_window)
+                    end = min(len(text), match.end() + context_window)
+                    findings[category_group_name][category_name].append({
+                        'keyword': keyword,
+                        'context': text[start:end].strip(),
+                        'position': match.start()
+                    })
+
+    return json.loads(json.dumps(findings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword matching on existing chunk files")
+    parser.add_argument('--chunks-dir', default=os.path.join('data', 'raw_processed'))
+    parser.add_argument('--limit', type=int, default=500, help="Maximum number of chunks to scan")
+    args = parser.parse_args()
+
+    # One file per document, preferring the line-delimited format when both exist
+    paths = {}
+    for path in sorted(glob.glob(os.path.join(args.chunks_dir, '*_chunks.json*'))):
+        paths.setdefault(legacy_path(path), path)
+    texts = []
+    for path in sorted(paths.values()):
+        texts.extend(chunk['content'] for chunk in iter_chunk_file(path))
+    texts = texts[:args.limit]
+    print(f"Benchmarking on {len(texts)} chunks ({sum(map(len, texts))} characters)")
+
+    processor = EnhancedFinancialReportProcessor(args.chunks_dir, args.chunks_dir)
+    matcher = FinancialKeywords.matcher()
+
+    # Match positions only, so sentence lookup does not dominate the timing
+    start = time.perf_counter()
+    regex_hits = 0
+    for text in texts:
+        text_lower = text.lower()
+        for _, _, keyword in matcher.entries:
+            regex_hits += sum(1 for _ in re.finditer(r'\b' + re.escape(keyword) + r'\b', text_lower))
+    regex_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    automaton_hits = 0
+    for text in texts:
+        automaton_hits += sum(1 for _ in matcher.iter_matches(text.lower()))
+    automaton_time = time.perf_counter() - start
+
+    if regex_hits != automaton_hits:
+        raise AssertionError(f"Match count differs: regex={regex_hits}, automaton={automaton_hits}")
+
+    # Keyword, context and position must be identical (sentences are exact spans now)
+    for text in texts:
+        findings = processor.find_keywords_in_text(text)
+        for categories in findings.values():
+            for category_findings in categories.values():
+                for finding in category_findings:
+                    del finding['sentence'], finding['sentence_span']
+        if findings != find_keywords_regex(text):
+            raise AssertionError("Findings differ between regex and automaton matchers")
+
+    # Containing-sentence lookup for every hit: re-split per hit vs. one index per text
+    positions = [
+        (text, [start for _, start, _ in matcher.iter_matches(text.lower())])
+        for text in texts
+    ]
+    start = time.perf_counter()
+    for text, hits in positions:
+        for position in hits:
+            find_containing_sentence_resplit(text, position)
+    resplit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text, hits in positions:
+        sentence_index = SentenceIndex.from_text(text)
+        for position in hits:
+            sentence_index.sentence_at(position)
+    index_time = time.perf_counter() - start
+
+    print(f"Keyword matches:   {automaton_hits}")
+    print(f"Per-keyword regex: {regex_time:.3f}s")
+    print(f"Automaton:         {automaton_time:.3f}s")
+    print(f"Speedup:           {regex_time / automaton_time:.1f}x")
+    print(f"Sentence re-split: {resplit_time:.3f}s")
+    print(f"Sentence index:    {index_time:.3f}s")
+    print(f"Speedup:           {resplit_time / index_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
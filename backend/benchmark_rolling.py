@@ -0,0 +1,118 @@
+# src/benchmark_rolling.py
+
+import json
+import argparse
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from benchmark_utils import StageTimer, peak_rss_mb
+from rolling_analytics import ROLLING_STATS, RollingAnalytics
+
+RISK_FREE_RATE = 0.02
+PERIODS_PER_YEAR = 252
+
+
+def generate_returns(rows: int, assets: int, seed: int = 0) -> pd.DataFrame:
+    """Correlated random daily returns; some assets list late, with a few missing days"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.01, rows)
+    betas = rng.uniform(0.5, 1.5, assets)
+    values = market[:, None] * betas + rng.normal(0.0002, 0.012, (rows, assets))
+    for column in range(0, assets, 5):
+        values[:rng.integers(1, rows // 4), column] = np.nan
+    values[rng.random((rows, assets)) < 0.002] = np.nan
+    columns = [f"ASSET{i}" for i in range(assets - 1)] + ['BENCH']
+    values[:, -1] = market
+    return pd.DataFrame(values, index=pd.bdate_range('2000-01-03', periods=rows, name='Date'), columns=columns)
+
+
+def pandas_rolling(returns_df: pd.DataFrame, benchmark: pd.Series, window: int) -> Dict[str, pd.DataFrame]:
+    """Baseline: the same statistics as pandas `.rolling()` chains"""
+    rolling = returns_df.rolling(window)
+    mean, std = rolling.mean(), rolling.std()
+    wealth = (1 + returns_df.fillna(0)).cumprod()
+    drawdown = (wealth / wealth.rolling(window).max() - 1).where(rolling.count() >= window)
+    return {
+        'return': mean * PERIODS_PER_YEAR,
+        'volatility': std * np.sqrt(PERIODS_PER_YEAR),
+        'sharpe': (mean * PERIODS_PER_YEAR - RISK_FREE_RATE) / (std * np.sqrt(PERIODS_PER_YEAR)),
+        'beta': rolling.cov(benchmark).div(benchmark.rolling(window).var(), axis=0),
+        'drawdown': drawdown,
+        'max_drawdown': drawdown.rolling(window).min(),
+    }
+
+
+def run_benchmark(returns_df: pd.DataFrame, windows: List[int], correlation_assets: int,
+                  timer: StageTimer) -> Dict:
+    benchmark = returns_df['BENCH']
+    cells = returns_df.size * len(windows) * len(ROLLING_STATS)
+
+    analytics = timer.measure('prepare', lambda: RollingAnalytics(returns_df, benchmark, RISK_FREE_RATE,
+                                                                  PERIODS_PER_YEAR))
+    engine = timer.measure('engine', lambda: analytics.compute(windows),
+                           units=lambda _: cells, unit='cells')
+    baseline = timer.measure('pandas', lambda: {w: pandas_rolling(returns_df, benchmark, w) for w in windows},
+                             units=lambda _: cells, unit='cells')
+
+    max_error = 0.0
+    for window in windows:
+        for stat in ROLLING_STATS:
+            got, expected = engine[window][stat].to_numpy(), baseline[window][stat].to_numpy()
+            assert np.array_equal(np.isnan(got), np.isnan(expected)), (window, stat)
+            assert np.allclose(got, expected, rtol=1e-7, atol=1e-10, equal_nan=True), (window, stat)
+            max_error = max(max_error, float(np.nanmax(np.abs(got - expected), initial=0.0)))
+
+    # Pairwise correlation grows with assets squared; compare on a subset
+    subset = returns_df.iloc[:, :correlation_assets]
+    window = windows[0]
+    subset_analytics = RollingAnalytics(subset)
+    matrices = timer.measure(f'corr_{window}', lambda: subset_analytics.correlation(window),
+                             units=lambda m: m.size, unit='cells')
+    expected = timer.measure(f'pandas_corr_{window}', lambda: subset.rolling(window).corr(),
+                             units=lambda df: df.size, unit='cells')
+    assert np.allclose(matrices.reshape(-1, subset.shape[1]), expected.to_numpy(),
+                       rtol=1e-7, atol=1e-10, equal_nan=True)
+
+    seconds = {stage['stage']: stage['seconds'] for stage in timer.stages}
+    return {
+        'rows': len(returns_df),
+        'assets': returns_df.shape[1],
+        'windows': windows,
+        'stats': list(ROLLING_STATS),
+        'max_abs_difference': max_error,
+        'speedup_vs_pandas': round(seconds['pandas'] / (seconds['prepare'] + seconds['engine']), 1),
+        'correlation_assets': subset.shape[1],
+        'correlation_speedup_vs_pandas': round(seconds[f'pandas_corr_{window}'] / seconds[f'corr_{window}'], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rolling analytics against pandas rolling chains")
+    parser.add_argument('--rows', type=int, default=1500, help="Periods of returns")
+    parser.add_argument('--assets', type=int, default=500, help="Number of return columns")
+    parser.add_argument('--windows', default='21,63,126,252', help="Comma-separated window lengths")
+    parser.add_argument('--correlation-assets', type=int, default=30, help="Columns in the correlation check")
+    parser.add_argument('--output', help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    returns_df = generate_returns(args.rows, args.assets)
+    windows = [int(window) for window in args.windows.split(',')]
+    timer = StageTimer()
+    totals = run_benchmark(returns_df, windows, args.correlation_assets, timer)
+
+    report = {
+        'generated': datetime.now().isoformat(),
+        'totals': totals,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stages': timer.stages,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# src/benchmark_utils.py
+
+import sys
+import time
+import resource
+from typing import Callable, Dict, List, Optional
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+class StageTimer:
+    """Collect per-stage wall time, throughput and peak RSS"""
+
+    def __init__(self):
+        self.stages: List[Dict] = []
+
+    def measure(self, name: str, func: Callable, units: Optional[Callable] = None,
+                unit: str = 'items', size_bytes: Optional[int] = None):
+        """Run `func` as stage `name`; `units(result)` counts the items it processed"""
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+
+        stage = {'stage': name, 'seconds': round(seconds, 4), 'peak_rss_mb': round(peak_rss_mb(), 1),
+                 'rss_growth_mb': round(peak_rss_mb() - rss_before, 1)}
+        if units is not None:
+            count = units(result)
+            stage[unit] = count
+            stage[f"{unit}_per_second"] = round(count / seconds, 1) if seconds else None
+        if size_bytes is not None:
+            stage['mb_per_second'] = round(size_bytes / 1e6 / seconds, 2) if seconds else None
+        self.stages.append(stage)
+        print(f"{name:<10} {seconds:8.3f}s  " + ', '.join(
+            f"{key}={value}" for key, value in stage.items() if key not in ('stage', 'seconds')
+        ), file=sys.stderr)
+        return result
+
+    def skip(self, name: str, reason: str) -> None:
+        self.stages.append({'stage': name, 'skipped': reason})
+        print(f"{name:<10} skipped: {reason}", file=sys.stderr)
@@ -1,15 +1,16 @@
 # src/build_vector_db.py
 
 import os
+import json
 import faiss
 import numpy as np
 import pandas as pd
+from index_snapshots import IndexSnapshotStore
 
 def main():
     # Paths
     embeddings_file = os.path.join('data', 'processed', 'chunks_with_embeddings.pkl')
-    index_file = os.path.join('data', 'processed', 'faiss_index.bin')
-    metadata_file = os.path.join('data', 'processed', 'chunks_metadata.pkl')
+    sample_file = os.path.join('data', 'processed', 'chunks_with_embeddings_sample.json')
 
     # Load DataFrame
     print("Loading embeddings DataFrame...")
@@ -32,14 +33,17 @@ def main():
     print("Adding embeddings to the index...")
     index.add(embedding_matrix)
 
-    # Save the index
-    print(f"Saving FAISS index to {index_file}...")
-    faiss.write_index(index, index_file)
+    # Embedding model recorded by generate_embeddings.py
+    embedding_model = 'all-MiniLM-L6-v2'
+    if os.path.exists(sample_file):
+        with open(sample_file, 'r') as f:
+            embedding_model = json.load(f).get('model_name', embedding_model)
 
-    # Save metadata
-    print(f"Saving metadata to {metadata_file}...")
+    # Publish index and metadata together as a new snapshot
     df.drop(columns=['embedding'], inplace=True)
-    df.to_pickle(metadata_file)
+    store = IndexSnapshotStore(os.path.join('data', 'processed'))
+    version = store.publish(index, df, embedding_model)
+    print(f"Published snapshot {version} ({index.ntotal} vectors, dimension {dimension})")
 
     print("Vector database built and metadata saved successfully.")
 
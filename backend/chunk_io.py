@@ -0,0 +1,244 @@
+# src/chunk_io.py
+
+import os
+import gzip
+import json
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Line-delimited chunk files: one compact JSON object per line, gzip-compressed
+# when the name ends in `.gz`. Legacy outputs are single indented JSON arrays.
+JSONL_SUFFIXES = ('.jsonl', '.jsonl.gz')
+
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith(JSONL_SUFFIXES)
+
+
+def temporary_path(path: str) -> str:
+    """Sibling path for writing `path` before renaming it into place, keeping the format suffix"""
+    for suffix in JSONL_SUFFIXES[::-1] + ('.json',):
+        if path.endswith(suffix):
+            return path[:-len(suffix)] + '.tmp' + suffix
+    return path + '.tmp'
+
+
+def legacy_path(path: str) -> str:
+    """The indented-JSON name a line-delimited file replaces (all_chunks.jsonl.gz -> all_chunks.json)"""
+    for suffix in JSONL_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)] + '.json'
+    return path
+
+
+class ChunkStreamWriter:
+    """Write chunks to a JSON array one at a time.
+
+    The output is byte-for-byte what `json.dump(chunks, f, indent=2)` would
+    produce, but chunks never have to be held in memory together. `mark()` and
+    `rollback()` let a caller discard everything written since a checkpoint,
+    e.g. when a file fails half-way through.
+    """
+
+    def __init__(self, path: str, indent: Optional[int] = 2):
+        self.path = path
+        self.indent = indent
+        self.count = 0
+        self._file = None
+
+    def __enter__(self) -> 'ChunkStreamWriter':
+        self._file = open(self.path, 'w')
+        self._file.write('[')
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def write(self, chunk: Dict) -> None:
+        """Append one chunk to the array"""
+        prefix = ' ' * (self.indent or 0)
+        body = json.dumps(chunk, indent=self.indent)
+        self._file.write(',\n' if self.count else '\n')
+        self._file.write('\n'.join(prefix + line for line in body.split('\n')))
+        self.count += 1
+
+    def mark(self) -> Tuple[int, int]:
+        """Checkpoint the current position"""
+        self._file.flush()
+        return self._file.tell(), self.count
+
+    def rollback(self, mark: Tuple[int, int]) -> None:
+        """Discard everything written since `mark`"""
+        position, count = mark
+        self._file.flush()
+        self._file.seek(position)
+        self._file.truncate()
+        self.count = count
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._file.write('\n]' if self.count else ']')
+        self._file.close()
+        self._file = None
+
+
+class JsonlChunkWriter:
+    """Write chunks as JSON lines, optionally gzip-compressed.
+
+    Compressed output is written as a series of gzip members (one per
+    `mark()`), which readers see as a single stream; this keeps `mark()` /
+    `rollback()` and appending to an existing file cheap.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.append = append
+        self.compressed = path.endswith('.gz')
+        self.count = 0
+        self._raw = None
+        self._member = None
+
+    def __enter__(self) -> 'JsonlChunkWriter':
+        self._raw = open(self.path, 'ab' if self.append else 'wb')
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _stream(self):
+        if not self.compressed:
+            return self._raw
+        if self._member is None:
+            self._member = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        return self._member
+
+    def _end_member(self) -> None:
+        if self._member is not None:
+            self._member.close()
+            self._member = None
+        self._raw.flush()
+
+    def write(self, chunk: Dict) -> None:
+        """Append one chunk as a line"""
+        line = json.dumps(chunk, ensure_ascii=False, separators=(',', ':'))
+        self._stream().write(line.encode('utf-8') + b'\n')
+        self.count += 1
+
+    def mark(self) -> Tuple[int, int]:
+        """Checkpoint the current position"""
+        self._end_member()
+        return self._raw.tell(), self.count
+
+    def rollback(self, mark: Tuple[int, int]) -> None:
+        """Discard everything written since `mark`"""
+        position, count = mark
+        self._end_member()
+        self._raw.seek(position)
+        self._raw.truncate()
+        self.count = count
+
+    def close(self) -> None:
+        if self._raw is None:
+            return
+        self._end_member()
+        self._raw.close()
+        self._raw = None
+
+
+def open_chunk_writer(path: str, append: bool = False):
+    """Streaming writer for `path`, picking the format from its extension"""
+    if is_jsonl(path):
+        return JsonlChunkWriter(path, append=append)
+    if append:
+        raise ValueError(f"Cannot append to JSON array file {path}")
+    return ChunkStreamWriter(path)
+
+
+def iter_chunk_file(path: str) -> Iterator[Dict]:
+    """Stream chunks from a line-delimited file, or from a legacy JSON array.
+
+    If a `.jsonl`/`.jsonl.gz` file does not exist yet but the `.json` file
+    it replaces does, that one is read instead.
+    """
+    if is_jsonl(path) and not os.path.exists(path) and os.path.exists(legacy_path(path)):
+        path = legacy_path(path)
+
+    if not is_jsonl(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        yield from (data if isinstance(data, list) else [data])
+        return
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_chunk_file(path: str) -> List[Dict]:
+    """Load every chunk of a chunk file"""
+    return list(iter_chunk_file(path))
+
+
+def write_chunk_file(path: str, chunks: Iterable[Dict]) -> int:
+    """Write chunks to `path` in the format implied by its extension"""
+    with open_chunk_writer(path) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+        return writer.count
+
+
+def write_similarities(path: str, similarities: Dict[str, List[Dict]]) -> None:
+    """Write the chunk similarity map; line-delimited files hold one chunk per line"""
+    if not is_jsonl(path):
+        with open(path, 'w') as f:
+            json.dump(similarities, f, indent=2)
+        return
+    write_chunk_file(path, (
+        {'chunk_id': chunk_id, 'similar_chunks': similar_chunks}
+        for chunk_id, similar_chunks in similarities.items()
+    ))
+
+
+def read_similarities(path: str) -> Dict[str, List[Dict]]:
+    """Read a similarity map written by `write_similarities`"""
+    if is_jsonl(path) and not os.path.exists(path) and os.path.exists(legacy_path(path)):
+        path = legacy_path(path)
+    if not is_jsonl(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return {record['chunk_id']: record['similar_chunks'] for record in iter_chunk_file(path)}
+
+
+def convert_chunk_file(source: str, destination: str) -> int:
+    """Convert a chunk or similarity file between formats"""
+    if os.path.basename(legacy_path(source)) == 'similarities.json':
+        similarities = read_similarities(source)
+        write_similarities(destination, similarities)
+        return len(similarities)
+    return write_chunk_file(destination, iter_chunk_file(source))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert indented JSON chunk files to line-delimited files")
+    parser.add_argument('directory', nargs='?', default=os.path.join('data', 'raw_processed'))
+    parser.add_argument('--suffix', default='.jsonl.gz', choices=JSONL_SUFFIXES)
+    parser.add_argument('--remove', action='store_true', help="Delete the JSON files after converting")
+    args = parser.parse_args()
+
+    for name in sorted(os.listdir(args.directory)):
+        if not (name.endswith('_chunks.json') or name == 'similarities.json'):
+            continue
+        source = os.path.join(args.directory, name)
+        destination = source[:-len('.json')] + args.suffix
+        count = convert_chunk_file(source, destination)
+        before, after = os.path.getsize(source), os.path.getsize(destination)
+        print(f"{name}: {count} records, {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB")
+        if args.remove:
+            os.remove(source)
+
+
+if __name__ == "__main__":
+    main()
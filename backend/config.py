@@ -9,7 +9,11 @@ load_dotenv()
 
 # Time period for analysis
 START_DATE = "2019-01-01"
-END_DATE = "2024-11-04"
+# Exclusive end date; unset means up to today (see MarketDataCollector.end_date)
+END_DATE = os.getenv('END_DATE')
+
+# Seconds between scheduled market data refreshes in the API; 0 disables them
+MARKET_REFRESH_SECONDS = float(os.getenv('MARKET_REFRESH_SECONDS', '0')) or None
 
 # Risk-free rate
 RISK_FREE_RATE = float(os.getenv('RISK_FREE_RATE', '0.02'))
@@ -17,6 +21,14 @@ RISK_FREE_RATE = float(os.getenv('RISK_FREE_RATE', '0.02'))
 # Benchmark Index
 BENCHMARK_INDEX = os.getenv('BENCHMARK_INDEX', '^SSMI')
 
+# Rolling analytics windows (in periods) served by default, and the most one request may ask for
+ROLLING_WINDOWS = (21, 63, 252)
+MAX_ROLLING_WINDOWS = int(os.getenv('MAX_ROLLING_WINDOWS', '8'))
+
+# What-if evaluation: most candidate portfolios one request may evaluate, and most rows returned
+MAX_WHATIF_PORTFOLIOS = int(os.getenv('MAX_WHATIF_PORTFOLIOS', '10000'))
+MAX_WHATIF_RESULTS = int(os.getenv('MAX_WHATIF_RESULTS', '500'))
+
 
 # Stocks organized by sectors relevant to Swiss/Global markets
 STOCKS = {
@@ -1,77 +1,112 @@
-import yfinance as yf
+import argparse
 import pandas as pd
 from backend.config import STOCKS, BENCHMARKS, START_DATE, END_DATE
+from backend.data_processing import PortfolioAnalyzer
+from backend.market_store import MarketDataStore
+from backend.metrics_snapshots import MetricsSnapshotStore, metrics_fingerprint
+from backend.price_providers import ParallelPriceProvider, YahooPriceProvider
 import logging
 import os
 
 class MarketDataCollector:
-    def __init__(self):
+    def __init__(self, provider=None, store=None, metrics_store=None):
         # Flatten stock list from all sectors
         self.all_stocks = [stock for sector in STOCKS.values() for stock in sector]
         self.benchmarks = list(BENCHMARKS.values())
-        
-    def fetch_stock_data(self):
+
+        # Where prices come from (anything with PriceProvider.fetch); Yahoo is
+        # queried in parallel batches so one bad ticker cannot fail a refresh
+        self.provider = provider or ParallelPriceProvider(YahooPriceProvider(), batch_size=20, workers=4, rate=2.0)
+
+        # Binary columnar cache; the CSV files are only read to migrate them
+        self.store = store or MarketDataStore()
+        self.prices_csv = 'data/raw/prices.csv'
+        self.returns_csv = 'data/raw/returns.csv'
+
+        # Metrics served by the API, precomputed for every stored version
+        self.metrics_store = metrics_store or MetricsSnapshotStore()
+
+    def end_date(self) -> pd.Timestamp:
+        """Exclusive end of the requested history: END_DATE if set, otherwise up to today"""
+        if END_DATE:
+            return pd.Timestamp(END_DATE)
+        return pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+
+    def refresh(self):
+        """Fetch only the dates and tickers missing from the cache and append them"""
+        try:
+            stats = self.store.refresh(
+                self.provider,
+                self.all_stocks + self.benchmarks,
+                start=START_DATE,
+                end=self.end_date()
+            )
+            logging.info(
+                f"Market data refreshed: {stats['requests']} requests, {stats['new_rows']} new rows"
+            )
+            for ticker, error in stats['failed'].items():
+                logging.warning(f"Could not refresh {ticker}: {error}")
+            if not self.store.exists():
+                raise RuntimeError(f"No market data could be fetched ({len(stats['failed'])} tickers failed)")
+        except Exception as e:
+            logging.error(f"Error fetching market data: {e}")
+            raise
+
+        try:
+            self.materialize_metrics()
+        except Exception:
+            # The API computes the metrics on demand when no snapshot is stored
+            logging.exception("Could not materialize the metrics snapshot")
+        return stats
+
+    def materialize_metrics(self, force: bool = False):
+        """Store the metrics snapshot of the current data version unless it exists"""
+        version, prices_df, returns_df = self.store.load_version()
+        analyzer = PortfolioAnalyzer(prices_df, returns_df)
+        if not force and self.metrics_store.get(version, metrics_fingerprint(analyzer)) is not None:
+            return None
+        return self.metrics_store.materialize(analyzer, version)
+
+    def fetch_stock_data(self, refresh: bool = False):
+        """Prices and returns of the current version, see `load_version`"""
+        _, prices_df, returns_df = self.load_version(refresh)
+        return prices_df, returns_df
+
+    def load_version(self, refresh: bool = False):
         """
         Fetches daily data for all stocks and benchmarks
+        Args:
+            - refresh: fetch dates and tickers missing from the cache first
         Returns:
+            - version: market data version the frames were read from
             - prices_df: DataFrame with adjusted close prices
             - returns_df: DataFrame with daily returns
         """
-        prices_path = 'data/raw/prices.csv'
-        returns_path = 'data/raw/returns.csv'
+        if not self.store.exists() and os.path.exists(self.prices_csv) and os.path.exists(self.returns_csv):
+            # One-off migration of the legacy CSV cache
+            logging.info("Migrating CSV market data cache...")
+            self.store.migrate_csv(self.prices_csv, self.returns_csv)
 
-        if os.path.exists(prices_path) and os.path.exists(returns_path):
-            logging.info("Loading data from cache...")
-            prices_df = pd.read_csv(prices_path, index_col=0, parse_dates=True)
-            returns_df = pd.read_csv(returns_path, index_col=0, parse_dates=True)
+        if refresh or not self.store.exists():
+            self.refresh()
         else:
-            try:
-                logging.info("Fetching market data...")
-                df = yf.download(
-                    self.all_stocks + self.benchmarks,
-                    start=START_DATE,
-                    end=END_DATE,
-                    progress=False
-                )
-                # Fetch all symbols (stocks + benchmarks)
-                all_symbols = self.all_stocks + self.benchmarks
-                
-                # Download data
-                print("Fetching market data...")
-                df = yf.download(
-                    all_symbols,
-                    start=START_DATE,
-                    end=END_DATE,
-                    progress=False
-                )
-                
-                # Extract adjusted close prices
-                prices_df = df['Adj Close']
-                
-                # Calculate returns
-                returns_df = prices_df.pct_change()
-                
-                # Save raw data
-                prices_df.to_csv('data/raw/prices.csv')
-                returns_df.to_csv('data/raw/returns.csv')
-                logging.info("Market data fetched successfully.")
-            except Exception as e:
-                logging.error(f"Error fetching market data: {e}")
-                raise
-            prices_df.to_csv(prices_path)
-            returns_df.to_csv(returns_path)
-        return prices_df, returns_df
+            logging.info("Loading data from cache...")
+        return self.store.load_version()
 
 def main():
+    parser = argparse.ArgumentParser(description="Collect daily market data into the local cache")
+    parser.add_argument('--refresh', action='store_true', help="Fetch dates missing from the cache")
+    args = parser.parse_args()
+
     # Initialize collector
     collector = MarketDataCollector()
     
     # Fetch data
-    prices, returns = collector.fetch_stock_data()
+    prices, returns = collector.fetch_stock_data(refresh=args.refresh)
     
     print("Data collection completed.")
     print(f"Collected data for {len(collector.all_stocks)} stocks and {len(collector.benchmarks)} benchmarks")
     print(f"Data shape: {prices.shape}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
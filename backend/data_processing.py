@@ -3,9 +3,10 @@
 # backend/data_processing.py
 
 import pandas as pd
-import numpy as np
 from typing import Dict
 from backend.config import PORTFOLIO_WEIGHTS, BENCHMARKS, RISK_FREE_RATE, BENCHMARK_INDEX
+from backend.bars import annualization_factor
+from backend.metrics_engine import compute_metrics
 
     # ... (rest of the code)
 
@@ -15,20 +16,26 @@ from backend.config import PORTFOLIO_WEIGHTS, BENCHMARKS, RISK_FREE_RATE, BENCHM
 #   Formula: (Final Value / Initial Value) - 1
   
 # - Annual Return: Average yearly return
-#   Formula: Daily Returns Mean * 252 (trading days)
+#   Formula: Bar Returns Mean * Periods per Year (252 for daily bars,
+#   252 * bars per session for intraday bars)
 #   Interpretation: Higher is better, but consider risk
 
 # - Annual Volatility: Yearly price fluctuation measure
-#   Formula: Daily Returns Std * sqrt(252)
+#   Formula: Bar Returns Std * sqrt(Periods per Year)
 #   Interpretation: Lower means more stable returns
 
 # - Sharpe Ratio: Risk-adjusted return measure
 #   Formula: (Annual Return - Risk Free Rate) / Annual Volatility
 #   Interpretation: Higher is better, >1 is good, >2 is very good
 
+# - Sortino Ratio: Return per unit of downside risk
+#   Formula: (Annual Return - Risk Free Rate) / Annualized Downside Deviation
+#   Interpretation: Like Sharpe, but only losses count as risk
+
 # - Maximum Drawdown: Biggest peak-to-trough decline
 #   Formula: Minimum of (Current Value / Peak Value - 1)
 #   Interpretation: Measures worst historical loss
+#   Reported with its peak, trough and recovery dates and lengths
 
 
 ### RISK METRICS ###
@@ -49,9 +56,16 @@ from backend.config import PORTFOLIO_WEIGHTS, BENCHMARKS, RISK_FREE_RATE, BENCHM
 
 
 class PortfolioAnalyzer:
-    def __init__(self, prices_df: pd.DataFrame, returns_df: pd.DataFrame, risk_free_rate: float = RISK_FREE_RATE, benchmark_symbol: str = BENCHMARK_INDEX):
+    BASIC_METRICS = ('Total Return', 'Annual Return', 'Annual Volatility', 'Sharpe Ratio', 'Max Drawdown')
+    RISK_METRICS = ('Beta', 'Alpha', 'Information Ratio')
+
+    def __init__(self, prices_df: pd.DataFrame, returns_df: pd.DataFrame, risk_free_rate: float = RISK_FREE_RATE, benchmark_symbol: str = BENCHMARK_INDEX,
+                 frequency: str = '1d', periods_per_year: float = None):
         self.prices_df = prices_df
         self.returns_df = returns_df
+        # Bar frequency of the frames; intraday panels may pass a measured factor
+        self.frequency = frequency
+        self.periods_per_year = periods_per_year or annualization_factor(frequency)
         self.risk_free_rate = risk_free_rate
         self.benchmark = benchmark_symbol
         self.portfolio_weights = pd.Series(PORTFOLIO_WEIGHTS)
@@ -61,55 +75,39 @@ class PortfolioAnalyzer:
         """Calculate weighted portfolio returns"""
         return self.returns_df[self.portfolio_weights.index].dot(self.portfolio_weights)
 
+    def calculate_universe_metrics(self, include_portfolio: bool = True,
+                                   portfolio_returns: pd.Series = None) -> pd.DataFrame:
+        """Metrics of every asset (and the portfolio) against every benchmark, one row each"""
+        returns_df = self.returns_df
+        if include_portfolio:
+            if portfolio_returns is None:
+                portfolio_returns = self.calculate_portfolio_returns()
+            returns_df = returns_df.assign(Portfolio=portfolio_returns)
+        benchmarks = [symbol for symbol in BENCHMARKS.values() if symbol in self.returns_df.columns]
+        return compute_metrics(returns_df, self.returns_df[benchmarks],
+                               risk_free_rate=self.risk_free_rate, periods_per_year=self.periods_per_year)
+
+    def calculate_portfolio_metrics(self, universe: pd.DataFrame = None) -> Dict:
+        """Basic and risk metrics of the portfolio from a single metrics-engine pass.
+
+        Pass the table of `calculate_universe_metrics` to reuse it; otherwise
+        only the portfolio against the benchmark is computed.
+        """
+        if universe is None:
+            portfolio_returns = self.calculate_portfolio_returns().to_frame('Portfolio')
+            universe = compute_metrics(portfolio_returns, self.returns_df[[self.benchmark]],
+                                       risk_free_rate=self.risk_free_rate,
+                                       periods_per_year=self.periods_per_year)
+        row = universe.loc['Portfolio']
+        return {
+            'basic_metrics': {name: float(row[name]) for name in self.BASIC_METRICS},
+            'risk_metrics': {name: float(row[f'{name} vs {self.benchmark}']) for name in self.RISK_METRICS},
+        }
+
     def calculate_basic_metrics(self) -> Dict:
         """Calculate main portfolio metrics"""
-        portfolio_returns = self.calculate_portfolio_returns()
-        
-        metrics = {
-            'Total Return': (1 + portfolio_returns).prod() - 1,
-            'Annual Return': portfolio_returns.mean() * 252,
-            'Annual Volatility': portfolio_returns.std() * np.sqrt(252),
-            'Sharpe Ratio': (portfolio_returns.mean() * 252) / (portfolio_returns.std() * np.sqrt(252)),
-            'Max Drawdown': self.calculate_max_drawdown(portfolio_returns)
-        }
-        
-        return metrics
+        return self.calculate_portfolio_metrics()['basic_metrics']
     
     def calculate_risk_metrics(self) -> Dict:
         """Calculate risk-related metrics"""
-        portfolio_returns = self.calculate_portfolio_returns()
-        benchmark_returns = self.returns_df[self.benchmark]
-        
-        # Calculate beta
-        cov = portfolio_returns.cov(benchmark_returns)
-        benchmark_var = benchmark_returns.var()
-        beta = cov / benchmark_var
-        
-        risk_metrics = {
-            'Beta': beta,
-            'Alpha': self.calculate_alpha(portfolio_returns, benchmark_returns, beta),
-            'Information Ratio': self.calculate_information_ratio(portfolio_returns, benchmark_returns)
-        }
-        
-        return risk_metrics
-
-    @staticmethod
-    def calculate_max_drawdown(returns: pd.Series) -> float:
-        """Calculate maximum drawdown"""
-        cum_returns = (1 + returns).cumprod()
-        rolling_max = cum_returns.expanding().max()
-        drawdowns = cum_returns / rolling_max - 1
-        return drawdowns.min()
-
-    def calculate_alpha(self, portfolio_returns: pd.Series, benchmark_returns: pd.Series, beta: float) -> float:
-        """Calculate Jensen's Alpha"""
-        rf = self.risk_free_rate
-        portfolio_excess_return = portfolio_returns.mean() * 252 - rf
-        market_excess_return = benchmark_returns.mean() * 252 - rf
-        return portfolio_excess_return - beta * market_excess_return
-
-    def calculate_information_ratio(self, portfolio_returns: pd.Series, 
-                                  benchmark_returns: pd.Series) -> float:
-        """Calculate Information Ratio"""
-        active_returns = portfolio_returns - benchmark_returns
-        return (active_returns.mean() * 252) / (active_returns.std() * np.sqrt(252))
\ No newline at end of file
+        return self.calculate_portfolio_metrics()['risk_metrics']
@@ -0,0 +1,75 @@
+# src/extraction_cache.py
+
+import os
+import json
+import hashlib
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional
+from chunk_io import JsonlChunkWriter, read_chunk_file
+
+# Cache layers, each keyed by everything the layer depends on:
+#   pages    - extracted page text      (file hash, extractor version)
+#   chunks   - chunks without keywords  (pages key, chunker parameters)
+#   keywords - keyword analysis         (chunks key, keyword taxonomy)
+CACHE_LAYERS = ('pages', 'chunks', 'keywords')
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """sha256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(*parts) -> str:
+    """Stable cache key for any JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ExtractionCache:
+    """Content-addressed store for extraction, chunking and keyword results"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        for layer in CACHE_LAYERS:
+            os.makedirs(os.path.join(cache_dir, layer), exist_ok=True)
+
+    def path(self, layer: str, key: str) -> str:
+        return os.path.join(self.cache_dir, layer, f"{key}.jsonl.gz")
+
+    def load(self, layer: str, key: str) -> Optional[List]:
+        """Load an entry, or None on a miss"""
+        try:
+            return read_chunk_file(self.path(layer, key))
+        except (OSError, EOFError, json.JSONDecodeError):
+            return None
+
+    @contextmanager
+    def writer(self, layer: str, key: str) -> Iterator[JsonlChunkWriter]:
+        """Stream an entry; it only becomes visible if the block completes"""
+        path = self.path(layer, key)
+        tmp_path = f"{path}.tmp.gz"
+        try:
+            with JsonlChunkWriter(tmp_path) as writer:
+                yield writer
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+
+    def store(self, layer: str, key: str, items: Iterable) -> None:
+        """Store a complete entry"""
+        with self.writer(layer, key) as writer:
+            for item in items:
+                writer.write(item)
+
+    def stream_through(self, layer: str, key: str, items: Iterable) -> Iterator:
+        """Yield items while caching them; the entry is kept only if fully consumed"""
+        with self.writer(layer, key) as writer:
+            for item in items:
+                writer.write(item)
+                yield item
@@ -5,6 +5,7 @@ import numpy as np
 from tqdm import tqdm
 from sentence_transformers import SentenceTransformer
 import torch
+from chunk_io import read_chunk_file
 
 class EmbeddingsGenerator:
     def __init__(self, model_name='all-MiniLM-L6-v2'):
@@ -20,10 +21,9 @@ class EmbeddingsGenerator:
         self.model.to(self.device)
 
     def load_chunks(self, file_path):
-        """Load chunks from a JSON file."""
+        """Load chunks from a chunk file (JSON lines or legacy JSON array)."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                chunks = json.load(f)
+            chunks = read_chunk_file(file_path)
             print(f"Loaded {len(chunks)} chunks from {file_path}")
             return chunks
         except Exception as e:
@@ -70,6 +70,12 @@ class EmbeddingsGenerator:
         
         # Extract texts
         texts = [chunk['content'] for chunk in chunks]
+
+        # Chunks sized by the token-budgeted chunker record their wordpiece count
+        max_tokens = self.model.max_seq_length - 2
+        truncated = sum(1 for chunk in chunks if chunk.get('embedding_tokens', 0) > max_tokens)
+        if truncated:
+            print(f"Warning: {truncated} chunks exceed {max_tokens} tokens and will be truncated")
         
         # Generate embeddings
         print(f"Generating embeddings for {len(texts)} texts...")
@@ -113,7 +119,7 @@ class EmbeddingsGenerator:
 
 def main():
     # Setup paths
-    input_file = os.path.join('data', 'raw_processed', 'all_chunks.json')
+    input_file = os.path.join('data', 'raw_processed', 'all_chunks.jsonl.gz')
     output_file = os.path.join('data', 'processed', 'chunks_with_embeddings.pkl')
     
     # Create generator
@@ -0,0 +1,237 @@
+# src/index_snapshots.py
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import faiss
+import numpy as np
+import pandas as pd
+
+INDEX_FILENAME = 'faiss_index.bin'
+METADATA_FILENAME = 'chunks_metadata.pkl'
+MANIFEST_FILENAME = 'manifest.json'
+POINTER_FILENAME = 'CURRENT'
+
+
+def file_checksum(path: str, block_size: int = 1 << 20) -> str:
+    """Compute the sha256 checksum of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexSnapshotStore:
+    """Versioned FAISS index + metadata snapshots behind an atomic `CURRENT` pointer.
+
+    Layout under `base_dir`:
+        snapshots/<version>/faiss_index.bin
+        snapshots/<version>/chunks_metadata.pkl
+        snapshots/<version>/manifest.json
+        CURRENT                      (name of the live version)
+
+    A snapshot directory is fully written under a temporary name and renamed
+    into place before the pointer is flipped with `os.replace`, so readers
+    never see an index and metadata from different builds.
+    """
+
+    def __init__(self, base_dir: str = os.path.join('data', 'processed'), keep: int = 3):
+        self.base_dir = base_dir
+        self.snapshots_dir = os.path.join(base_dir, 'snapshots')
+        self.pointer_file = os.path.join(base_dir, POINTER_FILENAME)
+        self.keep = max(2, keep)  # always keep the previous version for rollback
+
+        # Warm in-memory copies: the live snapshot and the one before it
+        self._current = None
+        self._previous = None
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+    def publish(self, index, df: pd.DataFrame, embedding_model: str) -> str:
+        """Write a new snapshot, flip the pointer to it and garbage-collect old ones"""
+        if index.ntotal != len(df):
+            raise ValueError(
+                f"Index holds {index.ntotal} vectors but metadata has {len(df)} rows"
+            )
+
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        staging_dir = os.path.join(self.snapshots_dir, f".tmp-{version}")
+        final_dir = os.path.join(self.snapshots_dir, version)
+        os.makedirs(staging_dir)
+
+        try:
+            index_path = os.path.join(staging_dir, INDEX_FILENAME)
+            metadata_path = os.path.join(staging_dir, METADATA_FILENAME)
+            faiss.write_index(index, index_path)
+            df.to_pickle(metadata_path)
+
+            manifest = {
+                'version': version,
+                'created_at': datetime.now().isoformat(),
+                'previous_version': self.current_version(),
+                'embedding_model': embedding_model,
+                'dimension': int(index.d),
+                'vector_count': int(index.ntotal),
+                'metadata_rows': int(len(df)),
+                'files': {
+                    INDEX_FILENAME: file_checksum(index_path),
+                    METADATA_FILENAME: file_checksum(metadata_path),
+                },
+            }
+            with open(os.path.join(staging_dir, MANIFEST_FILENAME), 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            os.rename(staging_dir, final_dir)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        self._set_pointer(version)
+        self.garbage_collect()
+        return version
+
+    def upsert(self, embeddings: np.ndarray, rows: pd.DataFrame, embedding_model: str) -> str:
+        """Publish a new version with `rows` added, replacing rows with the same chunk_id.
+
+        Used for streaming ingestion: the live snapshot is copied in memory,
+        updated and published, and kept warm so the next upsert does not
+        reload it from disk.
+        """
+        if len(embeddings) != len(rows):
+            raise ValueError(f"{len(embeddings)} embeddings for {len(rows)} rows")
+
+        vectors = np.ascontiguousarray(embeddings, dtype='float32')
+        faiss.normalize_L2(vectors)
+        if self.current_version() is None:
+            index, df = faiss.IndexFlatIP(vectors.shape[1]), pd.DataFrame()
+        else:
+            live_index, df, manifest = self.get_current()
+            if manifest['embedding_model'] != embedding_model:
+                raise ValueError(
+                    f"Live index uses {manifest['embedding_model']}, not {embedding_model}"
+                )
+            # Never mutate the copy readers may be serving
+            index = faiss.clone_index(live_index)
+            replaced = np.flatnonzero(df['chunk_id'].isin(rows['chunk_id']).to_numpy())
+            if len(replaced):
+                index.remove_ids(replaced.astype('int64'))
+                df = df.drop(df.index[replaced])
+
+        index.add(vectors)
+        df = pd.concat([df, rows], ignore_index=True)
+        version = self.publish(index, df, embedding_model)
+        self._previous, self._current = self._current, (index, df, self.read_manifest(version))
+        return version
+
+    def _set_pointer(self, version: str) -> None:
+        """Atomically point CURRENT at `version`"""
+        tmp_pointer = f"{self.pointer_file}.tmp"
+        with open(tmp_pointer, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, self.pointer_file)
+
+    def garbage_collect(self) -> None:
+        """Remove all but the `keep` newest snapshots, never touching the live or previous one"""
+        protected = {self.current_version()}
+        if self._current is not None:
+            protected.add(self._current[2]['version'])
+        if self._previous is not None:
+            protected.add(self._previous[2]['version'])
+        manifest = self.read_manifest()
+        if manifest:
+            protected.add(manifest.get('previous_version'))
+
+        versions = self.list_versions()
+        for version in versions[:-self.keep]:
+            if version not in protected:
+                shutil.rmtree(os.path.join(self.snapshots_dir, version), ignore_errors=True)
+
+        # Left-overs from interrupted builds
+        for name in os.listdir(self.snapshots_dir):
+            if name.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(self.snapshots_dir, name), ignore_errors=True)
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+    def list_versions(self):
+        """List published snapshot versions, oldest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.snapshots_dir)
+            if not name.startswith('.') and
+            os.path.exists(os.path.join(self.snapshots_dir, name, MANIFEST_FILENAME))
+        )
+
+    def current_version(self) -> Optional[str]:
+        """Version the CURRENT pointer refers to, or None if nothing was published"""
+        try:
+            with open(self.pointer_file, 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def read_manifest(self, version: Optional[str] = None) -> Optional[Dict]:
+        """Read the manifest of a snapshot (the live one by default)"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        with open(os.path.join(self.snapshots_dir, version, MANIFEST_FILENAME), 'r') as f:
+            return json.load(f)
+
+    def load_version(self, version: str, verify: bool = True) -> Tuple[object, pd.DataFrame, Dict]:
+        """Load a snapshot by manifest, checking checksums and counts"""
+        snapshot_dir = os.path.join(self.snapshots_dir, version)
+        manifest = self.read_manifest(version)
+
+        if verify:
+            for filename, checksum in manifest['files'].items():
+                if file_checksum(os.path.join(snapshot_dir, filename)) != checksum:
+                    raise ValueError(f"Checksum mismatch for {filename} in snapshot {version}")
+
+        index = faiss.read_index(os.path.join(snapshot_dir, INDEX_FILENAME))
+        df = pd.read_pickle(os.path.join(snapshot_dir, METADATA_FILENAME))
+
+        if index.ntotal != manifest['vector_count'] or len(df) != manifest['metadata_rows']:
+            raise ValueError(f"Snapshot {version} does not match its manifest counts")
+        if index.d != manifest['dimension']:
+            raise ValueError(f"Snapshot {version} has dimension {index.d}, expected {manifest['dimension']}")
+
+        return index, df, manifest
+
+    def get_current(self) -> Tuple[object, pd.DataFrame, Dict]:
+        """Return the live snapshot, reloading only when the pointer has moved"""
+        version = self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No index snapshot published under {self.base_dir}")
+
+        if self._current is not None and self._current[2]['version'] == version:
+            return self._current
+        if self._previous is not None and self._previous[2]['version'] == version:
+            # Pointer moved back to the warm previous version (rollback)
+            self._current, self._previous = self._previous, self._current
+            return self._current
+
+        loaded = self.load_version(version)
+        self._previous, self._current = self._current, loaded
+        return self._current
+
+    def rollback(self) -> str:
+        """Point CURRENT back at the previous version; served from memory if it is warm"""
+        manifest = self.read_manifest()
+        if manifest is None or not manifest.get('previous_version'):
+            raise ValueError("No previous snapshot to roll back to")
+        previous = manifest['previous_version']
+        if previous not in self.list_versions():
+            raise ValueError(f"Previous snapshot {previous} has been garbage-collected")
+        self._set_pointer(previous)
+        return previous
@@ -0,0 +1,196 @@
+# src/keyword_engine.py
+
+import re
+import json
+import hashlib
+from array import array
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from sentence_index import SentenceIndex
+
+# Same notion of a "word" as the `\b` anchors used by the regex matcher
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over the keyword taxonomy.
+
+    Keywords are compiled once into a token-level automaton (tokens are runs of
+    word characters or single punctuation marks), so a chunk is tokenized and
+    scanned in a single pass regardless of how many keywords there are. Because
+    every token starts and ends on a word boundary, a match is equivalent to
+    `re.finditer(r'\\b' + re.escape(keyword) + r'\\b', text)`; the exact spacing
+    between tokens is checked against the text for each candidate.
+    """
+
+    def __init__(self, taxonomy: Dict[str, Dict[str, Set[str]]]):
+        # entry id -> (group, category, keyword); keywords are sorted so the
+        # output order does not depend on set iteration order
+        self.entries: List[Tuple[str, str, str]] = []
+        for group_name, categories in taxonomy.items():
+            for category_name, keywords in categories.items():
+                for keyword in sorted(keywords):
+                    self.entries.append((group_name, category_name, keyword))
+
+        # Integer vocabularies used by compact annotations
+        self.categories: List[Tuple[str, str]] = list(dict.fromkeys((g, c) for g, c, _ in self.entries))
+        self.keywords: List[str] = sorted({keyword for _, _, keyword in self.entries})
+        category_ids = {category: i for i, category in enumerate(self.categories)}
+        keyword_ids = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self.entry_ids: List[Tuple[int, int]] = [
+            (category_ids[(g, c)], keyword_ids[keyword]) for g, c, keyword in self.entries
+        ]
+        self.fingerprint = hashlib.sha256(json.dumps(self.entries).encode('utf-8')).hexdigest()
+
+        # Automaton: goto transitions, failure links and outputs per state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, int]]] = [[]]  # (keyword id, token length)
+
+        for keyword_id, (_, _, keyword) in enumerate(self.entries):
+            tokens = TOKEN_PATTERN.findall(keyword.lower())
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][token] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append((keyword_id, len(tokens)))
+
+        self._build_failure_links()
+
+    def _build_failure_links(self) -> None:
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(token, 0)
+                self._fail[child] = candidate if candidate != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text_lower: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (keyword id, start, end) for every keyword occurrence in one pass"""
+        goto, fail, out, entries = self._goto, self._fail, self._out, self.entries
+        starts: List[int] = []
+        state = 0
+
+        for match in TOKEN_PATTERN.finditer(text_lower):
+            token = match.group()
+            starts.append(match.start())
+
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+
+            if out[state]:
+                end = match.end()
+                for keyword_id, token_count in out[state]:
+                    start = starts[-token_count]
+                    # Tokens matched; make sure the separators match too
+                    if text_lower[start:end] == entries[keyword_id][2]:
+                        yield keyword_id, start, end
+
+    def annotate(self, text: str, sentence_index: Optional[SentenceIndex] = None) -> 'KeywordAnnotations':
+        """Find all keywords in text as compact integer records"""
+        if sentence_index is None:
+            sentence_index = SentenceIndex.from_text(text)
+
+        hits: Dict[int, List[int]] = {}
+        for entry_id, start, _ in self.iter_matches(text.lower()):
+            hits.setdefault(entry_id, []).append(start)
+
+        records = array('i')
+        # Emit in taxonomy order so the dict view matches the per-keyword regex scan
+        for entry_id in sorted(hits):
+            category_id, keyword_id = self.entry_ids[entry_id]
+            keyword_length = len(self.keywords[keyword_id])
+            for position in hits[entry_id]:
+                sentence_start, sentence_end = sentence_index.span_at(position)
+                records.extend((category_id, keyword_id, position, position + keyword_length,
+                                sentence_start, sentence_end))
+
+        return KeywordAnnotations(self, records)
+
+    def find_keywords(self, text: str,
+                      sentence_index: Optional[SentenceIndex] = None,
+                      context_window: int = 100) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+        """Find all keywords in text with context, grouped by category group and category"""
+        return self.annotate(text, sentence_index).findings(text, context_window)
+
+
+class KeywordAnnotations:
+    """Keyword hits of one text as flat integer records.
+
+    Each hit is (category id, keyword id, start, end, sentence start, sentence
+    end), stored in a typed array; ids refer to the matcher's `categories` and
+    `keywords`. Context and sentence strings are only materialized from the
+    text on demand, and `findings()` rebuilds the nested dict view that
+    `find_keywords_in_text` has always returned.
+    """
+
+    FIELDS = ('category', 'keyword', 'start', 'end', 'sentence_start', 'sentence_end')
+
+    def __init__(self, matcher: KeywordMatcher, records: array):
+        self.matcher = matcher
+        self.records = records
+
+    def __len__(self) -> int:
+        return len(self.records) // len(self.FIELDS)
+
+    def __iter__(self) -> Iterator[Tuple[int, ...]]:
+        width = len(self.FIELDS)
+        for i in range(0, len(self.records), width):
+            yield tuple(self.records[i:i + width])
+
+    def to_json(self) -> Dict:
+        """Serializable form, tagged with the taxonomy the ids refer to"""
+        return {'taxonomy': self.matcher.fingerprint, 'records': self.records.tolist()}
+
+    @classmethod
+    def from_json(cls, matcher: KeywordMatcher, data: Dict) -> 'KeywordAnnotations':
+        if data['taxonomy'] != matcher.fingerprint:
+            raise ValueError("Keyword annotations were produced with a different keyword taxonomy")
+        return cls(matcher, array('i', data['records']))
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of hits per category group and category"""
+        counts: Dict[str, Dict[str, int]] = {}
+        for category_id in self.records[::len(self.FIELDS)]:
+            group_name, category_name = self.matcher.categories[category_id]
+            group = counts.setdefault(group_name, {})
+            group[category_name] = group.get(category_name, 0) + 1
+        return counts
+
+    def context(self, text: str, hit: Tuple[int, ...], context_window: int = 100) -> str:
+        """Text around a hit"""
+        start = max(0, hit[2] - context_window)
+        end = min(len(text), hit[3] + context_window)
+        return text[start:end].strip()
+
+    def sentence(self, text: str, hit: Tuple[int, ...]) -> str:
+        """Sentence containing a hit"""
+        return text[hit[4]:hit[5]]
+
+    def findings(self, text: str, context_window: int = 100) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+        """Materialize the nested {group: {category: [finding, ...]}} view"""
+        findings: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
+        for hit in self:
+            category_id, keyword_id, start, _, sentence_start, sentence_end = hit
+            group_name, category_name = self.matcher.categories[category_id]
+            findings.setdefault(group_name, {}).setdefault(category_name, []).append({
+                'keyword': self.matcher.keywords[keyword_id],
+                'context': self.context(text, hit, context_window),
+                'position': start,
+                'sentence': self.sentence(text, hit),
+                'sentence_span': [sentence_start, sentence_end]
+            })
+        return findings
@@ -1,11 +1,16 @@
 # backend/main.py
 
 from fastapi import FastAPI, HTTPException
-from backend.config import STOCKS, BENCHMARKS, PORTFOLIO_WEIGHTS
+from backend.config import (STOCKS, BENCHMARKS, PORTFOLIO_WEIGHTS, MARKET_REFRESH_SECONDS,
+                            ROLLING_WINDOWS, MAX_ROLLING_WINDOWS, MAX_WHATIF_PORTFOLIOS, MAX_WHATIF_RESULTS)
 from backend.data_collection import MarketDataCollector
-from backend.data_processing import PortfolioAnalyzer
+from backend.market_cache import MarketDataCache, MarketSnapshot
+from backend.metrics_snapshots import json_value
+from backend.portfolio_scenarios import grid_size, random_weights, simplex_grid, weight_matrix
 from backend.retrieve_and_answer import retrieve_and_answer
+from backend.rolling_analytics import ROLLING_STATS
 from pydantic import BaseModel
+from typing import Dict, List, Optional
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import pandas as pd
@@ -13,6 +18,7 @@ import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px  # Added this import
 import logging
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.ERROR)
@@ -28,9 +34,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Market data is loaded once per process and reloaded only when the cache changes
+market_cache = MarketDataCache(MarketDataCollector(), refresh_interval=MARKET_REFRESH_SECONDS)
+
+@app.on_event("startup")
+def load_market_data():
+    try:
+        market_cache.start()
+    except Exception:
+        # Endpoints retry the load on first use
+        logging.exception("Could not load market data at startup.")
+
+@app.on_event("shutdown")
+def stop_market_refresh():
+    market_cache.stop()
+
 class ChatRequest(BaseModel):
     query: str
 
+class WhatIfPortfolio(BaseModel):
+    name: Optional[str] = None
+    weights: Dict[str, float]
+
+class WhatIfGrid(BaseModel):
+    # Every allocation of these tickers in multiples of step
+    tickers: List[str]
+    step: float = 0.1
+
+class WhatIfRandom(BaseModel):
+    # Allocations drawn uniformly at random; all portfolio stocks by default
+    count: int
+    tickers: Optional[List[str]] = None
+    seed: int = 0
+
+class WhatIfRequest(BaseModel):
+    portfolios: List[WhatIfPortfolio] = []
+    grid: Optional[WhatIfGrid] = None
+    random: Optional[WhatIfRandom] = None
+    include_current: bool = True
+    sort_by: str = "Sharpe Ratio"
+    ascending: bool = False
+    top: int = 100
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the RAG Portfolio API"}
@@ -43,132 +88,220 @@ def get_portfolio():
             {
                 "name": "UBS Group",
                 "ticker": "UBSG.SW",
-                "percentage": 10.0,
                 "color": "#1f77b4",
                 "sector": "Swiss Banking & Finance"
             },
             {
                 "name": "ABB Group",
                 "ticker": "ABBN.SW",
-                "percentage": 7.5,
                 "color": "#ff7f0e",
                 "sector": "Tech Switzerland"
             },
             {
                 "name": "Schindler",
                 "ticker": "SCHN.SW",
-                "percentage": 7.5,
                 "color": "#2ca02c",
                 "sector": "Tech Switzerland"
             },
             {
                 "name": "Nestlé",
                 "ticker": "NESN.SW",
-                "percentage": 10.0,
                 "color": "#d62728",
                 "sector": "Swiss Healthcare & Consumer"
             },
             {
                 "name": "Roche",
                 "ticker": "ROG.SW",
-                "percentage": 7.5,
                 "color": "#9467bd",
                 "sector": "Swiss Healthcare & Consumer"
             },
             {
                 "name": "Novartis",
                 "ticker": "NOVN.SW",
-                "percentage": 7.5,
                 "color": "#8c564b",
                 "sector": "Swiss Healthcare & Consumer"
             },
             {
                 "name": "Apple",
                 "ticker": "AAPL",
-                "percentage": 10.0,
                 "color": "#e377c2",
                 "sector": "Global Tech"
             },
             {
                 "name": "Microsoft",
                 "ticker": "MSFT",
-                "percentage": 7.5,
                 "color": "#7f7f7f",
                 "sector": "Global Tech"
             },
             {
                 "name": "Alphabet",
                 "ticker": "GOOGL",
-                "percentage": 7.5,
                 "color": "#bcbd22",
                 "sector": "Global Tech"
             },
             {
                 "name": "BlackRock",
                 "ticker": "BLK",
-                "percentage": 10.0,
                 "color": "#17becf",
                 "sector": "Global Finance"
             },
             {
                 "name": "JP Morgan",
                 "ticker": "JPM",
-                "percentage": 7.5,
                 "color": "#aec7e8",
                 "sector": "Global Finance"
             },
             {
                 "name": "Goldman Sachs",
                 "ticker": "GS",
-                "percentage": 7.5,
                 "color": "#ffbb78",
                 "sector": "Global Finance"
             }
         ]
+        # Allocation comes from the configured weights, not a copy of them
+        for asset in portfolio_data:
+            asset["percentage"] = round(PORTFOLIO_WEIGHTS[asset["ticker"]] * 100, 2)
         
         return JSONResponse(content=portfolio_data)
     except Exception as e:
         logging.exception("An error occurred in /portfolio endpoint.")
         raise HTTPException(status_code=500, detail=str(e))
 
+def safe_float(x):
+    try:
+        if pd.isna(x) or not np.isfinite(x):
+            return None
+        # Convert to float and round to 4 decimal places
+        val = round(float(x), 4)
+        # Check if value is within safe JSON range
+        if abs(val) > 1e308:
+            return None
+        return val
+    except:
+        return None
+
+def build_price_records(snapshot: MarketSnapshot):
+    # Work on a copy: the snapshot's frames are shared between requests
+    prices_df = snapshot.prices.copy()
+
+    # First convert all numeric columns to float64
+    numeric_columns = prices_df.select_dtypes(include=['float64', 'float32', 'int64', 'int32']).columns
+    for col in numeric_columns:
+        prices_df[col] = prices_df[col].astype('float64')
+
+    # Replace problematic values
+    prices_df = prices_df.replace([np.inf, -np.inf, np.nan], None)
+
+    # Handle remaining problematic floats by converting to strings with fixed precision
+    for col in numeric_columns:
+        prices_df[col] = prices_df[col].apply(
+            lambda x: round(float(x), 4) if x is not None else None
+        )
+
+    # Convert DataFrame to JSON
+    prices_df.index = prices_df.index.strftime('%Y-%m-%d')
+
+    # Convert to records and explicitly handle any remaining problematic values
+    records = []
+    for record in prices_df.reset_index().melt(id_vars='Date').to_dict(orient='records'):
+        cleaned_record = {}
+        for key, value in record.items():
+            if isinstance(value, float):
+                if np.isfinite(value):
+                    cleaned_record[key] = round(value, 4)
+                else:
+                    cleaned_record[key] = None
+            else:
+                cleaned_record[key] = value
+        records.append(cleaned_record)
+    return records
+
+def build_graphs(snapshot: MarketSnapshot):
+    # Generate Performance Chart
+    normalized = snapshot.normalized_prices()
+    fig1 = go.Figure()
+    for col in normalized.columns:
+        fig1.add_trace(go.Scatter(
+            x=normalized.index,
+            y=normalized[col],
+            name=col,
+            mode='lines'
+        ))
+    fig1.update_layout(title='Portfolio Performance (Normalized to 100)')
+
+    # Generate Risk-Return Scatter Plot
+    annual_returns = snapshot.annual_returns()
+    annual_vol = snapshot.annual_volatility()
+    fig2 = px.scatter(
+        x=annual_vol,
+        y=annual_returns,
+        text=annual_returns.index,
+        title='Risk-Return Analysis',
+        labels={'x': 'Annual Volatility', 'y': 'Annual Return'}
+    )
+
+    # Convert figures to JSON
+    return {
+        "performance_chart": fig1.to_json(),
+        "risk_return_scatter": fig2.to_json()
+    }
+
+def build_performance(snapshot: MarketSnapshot):
+    # Columns that are completely null are dropped, partial gaps filled
+    prices_df = snapshot.aligned_prices()
+
+    # Normalize prices to 100 for performance chart
+    # Only normalize if first row value exists
+    normalized_prices = pd.DataFrame(index=prices_df.index)
+    for column in prices_df.columns:
+        if not pd.isna(prices_df[column].iloc[0]):
+            normalized_prices[column] = (prices_df[column] / prices_df[column].iloc[0]) * 100
+
+    # Handle any remaining special float values
+    for column in normalized_prices.columns:
+        normalized_prices[column] = normalized_prices[column].apply(safe_float)
+
+    # Format dates
+    normalized_prices.index = normalized_prices.index.strftime('%Y-%m-%d')
+
+    # Create normalized prices data with better handling of null values
+    normalized_data = []
+    for date, values in zip(normalized_prices.index, normalized_prices.to_dict(orient='records')):
+        row_data = {'date': date}
+        for column, value in values.items():
+            if pd.notnull(value) and value is not None:
+                row_data[column] = value
+            else:
+                row_data[column] = None  # Explicit null for missing values
+        normalized_data.append(row_data)
+
+    # Calculate risk-return metrics only for non-null columns
+    valid_columns = snapshot.returns.columns[snapshot.returns.notna().any()]
+    annual_returns = snapshot.annual_returns()
+    annual_vol = snapshot.annual_volatility()
+
+    # Create risk-return data
+    risk_return_data = []
+    for stock in valid_columns:
+        ret = safe_float(annual_returns.get(stock))
+        vol = safe_float(annual_vol.get(stock))
+        if ret is not None and vol is not None:
+            risk_return_data.append({
+                'stock': stock,
+                'annualReturn': ret,
+                'annualVolatility': vol
+            })
+
+    return {
+        "normalized_prices": normalized_data,
+        "risk_return_data": risk_return_data
+    }
+
 @app.get("/portfolio/prices")
 def get_portfolio_prices():
     try:
-        # Initialize collector and fetch data
-        collector = MarketDataCollector()
-        prices_df = collector.fetch_stock_data()[0]
-        
-        # First convert all numeric columns to float64
-        numeric_columns = prices_df.select_dtypes(include=['float64', 'float32', 'int64', 'int32']).columns
-        for col in numeric_columns:
-            prices_df[col] = prices_df[col].astype('float64')
-        
-        # Replace problematic values
-        prices_df = prices_df.replace([np.inf, -np.inf, np.nan], None)
-        
-        # Handle remaining problematic floats by converting to strings with fixed precision
-        for col in numeric_columns:
-            prices_df[col] = prices_df[col].apply(
-                lambda x: round(float(x), 4) if x is not None else None
-            )
-        
-        # Convert DataFrame to JSON
-        prices_df.index = prices_df.index.strftime('%Y-%m-%d')
-        
-        # Convert to records and explicitly handle any remaining problematic values
-        records = []
-        for record in prices_df.reset_index().melt(id_vars='Date').to_dict(orient='records'):
-            cleaned_record = {}
-            for key, value in record.items():
-                if isinstance(value, float):
-                    if np.isfinite(value):
-                        cleaned_record[key] = round(value, 4)
-                    else:
-                        cleaned_record[key] = None
-                else:
-                    cleaned_record[key] = value
-            records.append(cleaned_record)
-        
+        snapshot = market_cache.get_current()
+        records = snapshot.derived('price_records', lambda: build_price_records(snapshot))
         return JSONResponse(content=records)
     except Exception as e:
         logging.exception("An error occurred in /portfolio/prices endpoint.")
@@ -177,41 +310,8 @@ def get_portfolio_prices():
 @app.get("/portfolio/graphs")
 def get_portfolio_graphs():
     try:
-        # Initialize collector and fetch data
-        collector = MarketDataCollector()
-        prices_df, returns_df = collector.fetch_stock_data()
-        
-        # Generate Performance Chart
-        normalized = prices_df.div(prices_df.iloc[0]) * 100
-        fig1 = go.Figure()
-        for col in normalized.columns:
-            fig1.add_trace(go.Scatter(
-                x=normalized.index,
-                y=normalized[col],
-                name=col,
-                mode='lines'
-            ))
-        fig1.update_layout(title='Portfolio Performance (Normalized to 100)')
-        
-        # Generate Risk-Return Scatter Plot
-        annual_returns = returns_df.mean() * 252
-        annual_vol = returns_df.std() * (252 ** 0.5)
-        fig2 = px.scatter(
-            x=annual_vol,
-            y=annual_returns,
-            text=annual_returns.index,
-            title='Risk-Return Analysis',
-            labels={'x': 'Annual Volatility', 'y': 'Annual Return'}
-        )
-        
-        # Convert figures to JSON
-        graphJSON1 = fig1.to_json()
-        graphJSON2 = fig2.to_json()
-        
-        return {
-            "performance_chart": graphJSON1,
-            "risk_return_scatter": graphJSON2
-        }
+        snapshot = market_cache.get_current()
+        return snapshot.derived('graphs', lambda: build_graphs(snapshot))
     except Exception as e:
         logging.exception("An error occurred in /portfolio/graphs endpoint.")
         raise HTTPException(status_code=500, detail=str(e))
@@ -219,107 +319,214 @@ def get_portfolio_graphs():
 @app.get("/portfolio/performance")
 def get_portfolio_performance():
     try:
-        # Initialize collector and fetch data
-        collector = MarketDataCollector()
-        prices_df, returns_df = collector.fetch_stock_data()
-        
-        # Print debug information
-        print("Original prices head:")
-        print(prices_df.head())
-        print("\nColumns with null values:", prices_df.isnull().sum())
-        
-        # Remove columns that are completely null
-        prices_df = prices_df.dropna(axis=1, how='all')
-        
-        # For remaining columns, handle partial null values
-        prices_df = prices_df.fillna(method='ffill').fillna(method='bfill')
-        
-        def safe_float(x):
-            try:
-                if pd.isna(x) or not np.isfinite(x):
-                    return None
-                # Convert to float and round to 4 decimal places
-                val = round(float(x), 4)
-                # Check if value is within safe JSON range
-                if abs(val) > 1e308:
-                    return None
-                return val
-            except:
-                return None
-        
-        # Normalize prices to 100 for performance chart
-        # Only normalize if first row value exists
-        normalized_prices = pd.DataFrame(index=prices_df.index)
-        for column in prices_df.columns:
-            if not pd.isna(prices_df[column].iloc[0]):
-                normalized_prices[column] = (prices_df[column] / prices_df[column].iloc[0]) * 100
-        
-        # Handle any remaining special float values
-        for column in normalized_prices.columns:
-            normalized_prices[column] = normalized_prices[column].apply(safe_float)
-        
-        # Format dates
-        normalized_prices.index = normalized_prices.index.strftime('%Y-%m-%d')
-        
-        # Create normalized prices data with better handling of null values
-        normalized_data = []
-        for date in normalized_prices.index:
-            row_data = {'date': date}
-            for column in normalized_prices.columns:
-                value = normalized_prices.loc[date, column]
-                if pd.notnull(value) and value is not None:
-                    row_data[column] = value
-                else:
-                    row_data[column] = None  # Explicit null for missing values
-            normalized_data.append(row_data)
-        
-        # Calculate risk-return metrics only for non-null columns
-        valid_returns = returns_df.dropna(axis=1, how='all')
-        annual_returns = valid_returns.mean() * 252
-        annual_vol = valid_returns.std() * np.sqrt(252)
-        
-        # Create risk-return data
-        risk_return_data = []
-        for stock in valid_returns.columns:
-            ret = safe_float(annual_returns.get(stock))
-            vol = safe_float(annual_vol.get(stock))
-            if ret is not None and vol is not None:
-                risk_return_data.append({
-                    'stock': stock,
-                    'annualReturn': ret,
-                    'annualVolatility': vol
-                })
-        
-        return JSONResponse(content={
-            "normalized_prices": normalized_data,
-            "risk_return_data": risk_return_data
-        })
-        
+        snapshot = market_cache.get_current()
+        return JSONResponse(content=snapshot.derived('performance', lambda: build_performance(snapshot)))
     except Exception as e:
         logging.exception("An error occurred in /portfolio/performance endpoint.")
         print(f"Error details: {str(e)}")  # Add detailed error logging
         raise HTTPException(status_code=500, detail=str(e))
 
+def snapshot_freshness(metrics: dict):
+    return {key: metrics[key] for key in ('data_version', 'data_end', 'computed_at')}
+
 @app.get("/portfolio/metrics")
 def get_portfolio_metrics():
     try:
-        # Initialize collector and fetch data
-        collector = MarketDataCollector()
-        prices_df, returns_df = collector.fetch_stock_data()
-
-        # Initialize analyzer and calculate metrics
-        analyzer = PortfolioAnalyzer(prices_df, returns_df)
-        basic_metrics = analyzer.calculate_basic_metrics()
-        risk_metrics = analyzer.calculate_risk_metrics()
-
+        metrics = market_cache.get_current().metrics_snapshot()
         return {
-            "basic_metrics": basic_metrics,
-            "risk_metrics": risk_metrics
+            "basic_metrics": metrics["basic_metrics"],
+            "risk_metrics": metrics["risk_metrics"],
+            **snapshot_freshness(metrics)
         }
     except Exception as e:
         logging.exception("An error occurred in /portfolio/metrics endpoint.")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/portfolio/metrics/assets")
+def get_asset_metrics():
+    try:
+        metrics = market_cache.get_current().metrics_snapshot()
+        return {
+            "benchmark": metrics["benchmark"],
+            "portfolio": metrics["portfolio"],
+            "assets": metrics["assets"],
+            **snapshot_freshness(metrics)
+        }
+    except Exception as e:
+        logging.exception("An error occurred in /portfolio/metrics/assets endpoint.")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/portfolio/metrics/series")
+def get_metrics_series():
+    try:
+        metrics = market_cache.get_current().metrics_snapshot()
+        return {"series": metrics["series"], **snapshot_freshness(metrics)}
+    except Exception as e:
+        logging.exception("An error occurred in /portfolio/metrics/series endpoint.")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def json_column(values):
+    """Array of floats as a JSON list, NaN and inf as null"""
+    values = np.asarray(values, dtype='float64')
+    column = np.round(values, 6).astype(object)
+    column[~np.isfinite(values)] = None
+    return column.tolist()
+
+def parse_list(value, default):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else list(default)
+
+def build_rolling(snapshot: MarketSnapshot, windows, stats, tickers, correlation: bool):
+    analytics = snapshot.rolling_analytics()
+    columns = list(analytics.returns_df.columns)
+    if len(windows) > MAX_ROLLING_WINDOWS:
+        raise ValueError(f"At most {MAX_ROLLING_WINDOWS} windows per request")
+    unknown = [ticker for ticker in tickers if ticker not in columns]
+    if unknown:
+        raise ValueError(f"Unknown tickers: {unknown}")
+    positions = [columns.index(ticker) for ticker in tickers]
+
+    rolling = analytics.compute(windows, stats)
+    result = {
+        "data_version": snapshot.version,
+        "benchmark": analytics.benchmark,
+        "windows": windows,
+        "stats": stats,
+        "dates": list(analytics.returns_df.index.strftime('%Y-%m-%d')),
+        "series": {
+            str(window): {
+                stat: {ticker: json_column(frame[ticker]) for ticker in tickers}
+                for stat, frame in frames.items()
+            }
+            for window, frames in rolling.items()
+        }
+    }
+    if correlation:
+        # Latest matrix only; the full history is rows x tickers^2
+        result["correlation"] = {
+            str(window): {
+                "date": result["dates"][-1],
+                "tickers": tickers,
+                "matrix": [json_column(row) for row in
+                           analytics.correlation(window)[-1][np.ix_(positions, positions)]]
+            }
+            for window in windows
+        }
+    return result
+
+@app.get("/portfolio/rolling")
+def get_rolling_analytics(windows: str = None, stats: str = None, tickers: str = None,
+                          correlation: bool = False):
+    """Rolling statistics, e.g. /portfolio/rolling?windows=21,63&stats=volatility,beta&tickers=Portfolio"""
+    try:
+        snapshot = market_cache.get_current()
+        try:
+            window_list = [int(window) for window in parse_list(windows, ROLLING_WINDOWS)]
+            ticker_list = parse_list(tickers, snapshot.rolling_analytics().returns_df.columns)
+            return JSONResponse(content=build_rolling(
+                snapshot, window_list, parse_list(stats, ROLLING_STATS), ticker_list, correlation
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("An error occurred in /portfolio/rolling endpoint.")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def expand_weights(sub_weights, subset, tickers):
+    """Rows of `sub_weights` (one per ticker of `subset`) placed in a full weight matrix"""
+    unknown = [ticker for ticker in subset if ticker not in tickers]
+    if unknown:
+        raise ValueError(f"Unknown tickers: {unknown}")
+    weights = np.zeros((len(tickers), sub_weights.shape[1]))
+    weights[[tickers.index(ticker) for ticker in subset]] = sub_weights
+    return weights
+
+def build_whatif(snapshot: MarketSnapshot, request: WhatIfRequest):
+    started = time.perf_counter()
+    evaluator = snapshot.scenario_evaluator()
+    tickers = evaluator.tickers
+
+    allocations = [dict(PORTFOLIO_WEIGHTS)] if request.include_current else []
+    names = ["current"] if request.include_current else []
+    for position, portfolio in enumerate(request.portfolios):
+        allocations.append(portfolio.weights)
+        names.append(portfolio.name or f"portfolio-{position + 1}")
+    random_tickers = (request.random.tickers or list(PORTFOLIO_WEIGHTS)) if request.random else []
+
+    count = len(allocations)
+    if request.grid:
+        if len(request.grid.tickers) < 2 or not 0 < request.grid.step <= 0.5:
+            raise ValueError("A grid needs at least 2 tickers and a step between 0 and 0.5")
+        count += grid_size(len(request.grid.tickers), request.grid.step)
+    if request.random:
+        if request.random.count < 1 or not random_tickers:
+            raise ValueError("Random allocations need a positive count and tickers")
+        count += request.random.count
+    if count > MAX_WHATIF_PORTFOLIOS:
+        raise ValueError(f"{count} portfolios requested, at most {MAX_WHATIF_PORTFOLIOS} per request")
+    if not count:
+        raise ValueError("No portfolios to evaluate")
+    if not 1 <= request.top <= MAX_WHATIF_RESULTS:
+        raise ValueError(f"top must be between 1 and {MAX_WHATIF_RESULTS}")
+    if request.sort_by not in evaluator.metric_columns():
+        raise ValueError(f"Cannot sort by {request.sort_by!r}; metrics are {evaluator.metric_columns()}")
+
+    blocks = [weight_matrix(allocations, tickers)] if allocations else []
+    if request.grid:
+        grid = simplex_grid(len(request.grid.tickers), request.grid.step)
+        blocks.append(expand_weights(grid, request.grid.tickers, tickers))
+        names += [f"grid-{i + 1}" for i in range(grid.shape[1])]
+    if request.random:
+        sampled = random_weights(len(random_tickers), request.random.count, request.random.seed)
+        blocks.append(expand_weights(sampled, random_tickers, tickers))
+        names += [f"random-{i + 1}" for i in range(request.random.count)]
+    weights = np.hstack(blocks)
+    weights_seconds = time.perf_counter() - started
+
+    table, timing = evaluator.evaluate(weights, names)
+    ranked = table.reset_index(drop=True).sort_values(
+        request.sort_by, ascending=request.ascending, na_position='last'
+    ).head(request.top)
+
+    results = []
+    for position, row in ranked.iterrows():
+        column = weights[:, position]
+        results.append({
+            "name": names[position],
+            "weights": {tickers[i]: round(float(column[i]), 6) for i in np.flatnonzero(column)},
+            "metrics": {key: json_value(value) for key, value in row.items()}
+        })
+    return {
+        "data_version": snapshot.version,
+        "metrics": evaluator.metric_columns(),
+        "evaluated": weights.shape[1],
+        "returned": len(results),
+        "limits": {"max_portfolios": MAX_WHATIF_PORTFOLIOS, "max_results": MAX_WHATIF_RESULTS},
+        "timing_ms": {
+            "weights": round(weights_seconds * 1000, 2),
+            "matmul": round(timing['matmul'] * 1000, 2),
+            "metrics": round(timing['metrics'] * 1000, 2),
+            "total": round((time.perf_counter() - started) * 1000, 2)
+        },
+        "results": results
+    }
+
+@app.post("/portfolio/whatif")
+def evaluate_whatif(request: WhatIfRequest):
+    """Metrics of candidate allocations: explicit weights, a grid and/or random samples"""
+    try:
+        snapshot = market_cache.get_current()
+        try:
+            return JSONResponse(content=build_whatif(snapshot, request))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.exception("An error occurred in /portfolio/whatif endpoint.")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/chat")
 def chat_endpoint(request: ChatRequest):
     try:
@@ -0,0 +1,177 @@
+# src/market_cache.py
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+from backend.bars import annualization_factor
+from backend.config import BENCHMARK_INDEX, PORTFOLIO_WEIGHTS, RISK_FREE_RATE, STOCKS
+from backend.data_processing import PortfolioAnalyzer
+from backend.metrics_snapshots import MetricsSnapshotStore, build_metrics_snapshot, metrics_fingerprint
+from backend.portfolio_scenarios import ScenarioEvaluator
+from backend.rolling_analytics import RollingAnalytics
+
+
+class MarketSnapshot:
+    """One version of the market data plus the frames derived from it.
+
+    Derived values are computed on first use and kept for the lifetime of
+    the snapshot, i.e. until the data version changes. They are shared
+    between requests and must be treated as read-only.
+    """
+
+    def __init__(self, version: str, prices_df: pd.DataFrame, returns_df: pd.DataFrame,
+                 frequency: str = '1d', metrics_store: Optional[MetricsSnapshotStore] = None):
+        self.version = version
+        self.prices = prices_df
+        self.returns = returns_df
+        self.frequency = frequency
+        self.periods_per_year = annualization_factor(frequency)
+        self.metrics_store = metrics_store
+        self._derived: Dict[str, object] = {}
+        # Re-entrant: derived values are built from other derived values
+        self._lock = threading.RLock()
+
+    def derived(self, name: str, compute: Callable[[], object]):
+        """Memoize `compute()` under `name` for this data version"""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = compute()
+            return self._derived[name]
+
+    def aligned_prices(self) -> pd.DataFrame:
+        """Prices without empty tickers, gaps filled forward then backward"""
+        return self.derived('aligned_prices', lambda: (
+            self.prices.dropna(axis=1, how='all').ffill().bfill()
+        ))
+
+    def normalized_prices(self) -> pd.DataFrame:
+        """Prices rebased to 100 on the first date"""
+        return self.derived('normalized_prices', lambda: self.prices.div(self.prices.iloc[0]) * 100)
+
+    def asset_metrics(self) -> pd.DataFrame:
+        """Per-asset rows of the metrics snapshot, indexed by ticker"""
+        return self.derived('asset_metrics', lambda: (
+            pd.DataFrame(self.metrics_snapshot()['assets']).set_index('ticker')
+        ))
+
+    def annual_returns(self) -> pd.Series:
+        return pd.to_numeric(self.asset_metrics()['Annual Return'])
+
+    def annual_volatility(self) -> pd.Series:
+        return pd.to_numeric(self.asset_metrics()['Annual Volatility'])
+
+    def analyzer(self) -> PortfolioAnalyzer:
+        return self.derived('analyzer', lambda: PortfolioAnalyzer(
+            self.prices, self.returns, frequency=self.frequency, periods_per_year=self.periods_per_year
+        ))
+
+    def portfolio_returns(self) -> pd.Series:
+        return self.derived('portfolio_returns', lambda: self.analyzer().calculate_portfolio_returns())
+
+    def rolling_analytics(self) -> RollingAnalytics:
+        """Rolling statistics of every asset and the portfolio (cumulative sums built once)"""
+        return self.derived('rolling_analytics', lambda: RollingAnalytics(
+            self.returns.assign(Portfolio=self.portfolio_returns()),
+            self.returns[BENCHMARK_INDEX] if BENCHMARK_INDEX in self.returns.columns else None,
+            risk_free_rate=RISK_FREE_RATE, periods_per_year=self.periods_per_year
+        ))
+
+    def portfolio_universe(self) -> List[str]:
+        """Stocks a portfolio may hold (configured stocks with data), benchmarks excluded"""
+        stocks = [ticker for sector in STOCKS.values() for ticker in sector] + list(PORTFOLIO_WEIGHTS)
+        return [ticker for ticker in dict.fromkeys(stocks) if ticker in self.returns.columns]
+
+    def scenario_evaluator(self) -> ScenarioEvaluator:
+        """What-if evaluation of candidate weights of the portfolio universe against the configured benchmark"""
+        return self.derived('scenario_evaluator', lambda: ScenarioEvaluator(
+            self.returns[self.portfolio_universe()],
+            self.returns[[BENCHMARK_INDEX]] if BENCHMARK_INDEX in self.returns.columns else None,
+            risk_free_rate=RISK_FREE_RATE, periods_per_year=self.periods_per_year
+        ))
+
+    def metrics_snapshot(self) -> Dict:
+        """Materialized metrics of this version (see metrics_snapshots).
+
+        Read from the snapshot store, which the collector fills after each
+        refresh; computed here, and written through, only on a miss.
+        """
+        return self.derived('metrics_snapshot', self._load_metrics_snapshot)
+
+    def _load_metrics_snapshot(self) -> Dict:
+        if self.metrics_store is not None:
+            snapshot = self.metrics_store.get(self.version, metrics_fingerprint(self.analyzer()))
+            if snapshot is not None:
+                return snapshot
+        logging.info(f"No metrics snapshot for version {self.version}, computing it")
+        snapshot = build_metrics_snapshot(self.analyzer(), self.version)
+        if self.metrics_store is not None:
+            try:
+                self.metrics_store.put(snapshot)
+            except OSError:
+                logging.exception("Could not store the metrics snapshot")
+        return snapshot
+
+
+class MarketDataCache:
+    """Process-wide market data, loaded once and reloaded when the store changes.
+
+    `get_current` compares the store's change stamp (a stat of its meta
+    file) with the one the live snapshot was loaded from and only reloads
+    when another process or the refresh thread wrote a new version. With
+    `refresh_interval` set, `start` also runs `collector.refresh()` on that
+    schedule in a background thread.
+    """
+
+    def __init__(self, collector, refresh_interval: Optional[float] = None):
+        self.collector = collector
+        self.store = collector.store
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get_current(self) -> MarketSnapshot:
+        """Return the live snapshot, reloading only when the stored data changed"""
+        snapshot = self._snapshot
+        if snapshot is not None and self.store.stamp() == self._stamp:
+            return snapshot
+
+        with self._lock:
+            stamp = self.store.stamp()
+            if self._snapshot is None or stamp != self._stamp:
+                # Migrates or fetches the data if nothing is stored yet
+                version, prices_df, returns_df = self.collector.load_version()
+                self._stamp = self.store.stamp() if stamp is None else stamp
+                self._snapshot = MarketSnapshot(version, prices_df, returns_df,
+                                                metrics_store=self.collector.metrics_store)
+                logging.info(f"Loaded market data version {self._snapshot.version}")
+            return self._snapshot
+
+    def start(self) -> None:
+        """Load the data now and start the scheduled refresh, if configured"""
+        self.get_current()
+        if self.refresh_interval and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._refresh_loop, name='market-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.collector.refresh()
+                self.get_current()
+            except Exception:
+                logging.exception("Scheduled market data refresh failed")
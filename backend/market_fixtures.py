@@ -0,0 +1,174 @@
+# src/market_fixtures.py
+
+import time
+import shutil
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from market_store import MarketDataStore, daily_returns
+from price_providers import ParallelPriceProvider, PriceProvider
+
+
+def generate_prices(tickers: Sequence[str], start: str, end: str, seed: int = 0,
+                    holidays: Optional[dict] = None) -> pd.DataFrame:
+    """Random-walk business-day prices; `holidays` maps a ticker to dates without a quote"""
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(start, end, name='Date').as_unit('ns')
+    steps = rng.normal(0.0003, 0.015, size=(len(index), len(tickers)))
+    prices_df = pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=index, columns=list(tickers))
+    for ticker, dates in (holidays or {}).items():
+        prices_df.loc[pd.DatetimeIndex(dates), ticker] = np.nan
+    return prices_df
+
+
+class FixturePriceProvider(PriceProvider):
+    """Serves prices from a DataFrame, with failure injection and a request log"""
+
+    name = 'fixture'
+
+    def __init__(self, prices_df: pd.DataFrame, delay: float = 0.0):
+        self.prices_df = prices_df
+        self.delay = delay
+        self.failures: Dict[str, int] = {}
+        self.requests: List[Tuple[Tuple[str, ...], pd.Timestamp, pd.Timestamp]] = []
+        self.started: List[float] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def fail(self, ticker: str, times: int = -1) -> None:
+        """Fail every request including `ticker` for the next `times` requests (-1: always)"""
+        self.failures[ticker] = times
+
+    def fetch(self, tickers: Sequence[str], start, end) -> pd.DataFrame:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        with self.lock:
+            self.requests.append((tuple(tickers), start, end))
+            self.started.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            with self.lock:
+                failing = [ticker for ticker in tickers if self.failures.get(ticker, 0) != 0]
+                for ticker in failing:
+                    if self.failures[ticker] > 0:
+                        self.failures[ticker] -= 1
+            if failing:
+                raise ConnectionError(f"fixture failure for {failing}")
+
+            rows = (self.prices_df.index >= start) & (self.prices_df.index < end)
+            available = [ticker for ticker in tickers if ticker in self.prices_df.columns]
+            return self.prices_df.loc[rows, available].dropna(how='all')
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def check_refresh() -> None:
+    """Refresh a seeded cache from the fixture provider and compare with a full rebuild"""
+    tickers = ['AAA', 'BBB.SW', 'CCC']
+    truth = generate_prices(tickers + ['DDD'], '2019-01-01', '2024-06-28',
+                            holidays={'BBB.SW': ['2024-03-28', '2024-04-01', '2024-05-09']})
+    work_dir = tempfile.mkdtemp(prefix='market-fixtures-')
+
+    try:
+        store = MarketDataStore(work_dir)
+        seeded = truth.loc[:'2024-03-28', tickers]
+        store.write(seeded, daily_returns(seeded))
+
+        # Tail plus a week of overlap for the cached tickers, full history for the new one
+        provider = FixturePriceProvider(truth)
+        stats = store.refresh(provider, tickers + ['DDD'], '2019-01-01', '2024-07-01')
+        requested = {names: start for names, start, _ in provider.requests}
+        assert requested == {('AAA', 'CCC'): pd.Timestamp('2024-03-21'),
+                             ('BBB.SW',): pd.Timestamp('2024-03-20'),
+                             ('DDD',): pd.Timestamp('2019-01-01')}, requested
+        assert not stats['readjusted'], stats
+
+        prices_df, returns_df = store.load()
+        expected = truth.loc[prices_df.index[0]:, prices_df.columns]
+        pd.testing.assert_frame_equal(prices_df, expected, check_freq=False)
+        pd.testing.assert_frame_equal(returns_df, daily_returns(expected), check_freq=False)
+
+        # Nothing missing: no provider calls, no new version
+        provider.requests.clear()
+        again = store.refresh(provider, tickers + ['DDD'], '2019-01-01', '2024-06-29')
+        assert not provider.requests and again['version'] == stats['version'], (provider.requests, again)
+
+        print(f"Refresh: {stats['requests']} requests for {stats['tickers']} tickers, "
+              f"{stats['new_rows']} new rows, returns recomputed for {stats['updated_rows']} rows")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def check_readjust() -> None:
+    """A dividend rebases the adjusted history: the ticker is re-fetched in full"""
+    tickers = ['AAA', 'BBB.SW', 'CCC']
+    truth = generate_prices(tickers, '2019-01-01', '2024-06-28', seed=2)
+    work_dir = tempfile.mkdtemp(prefix='market-fixtures-')
+
+    try:
+        store = MarketDataStore(work_dir)
+        seeded = truth.loc[:'2024-05-31']
+        store.write(seeded, daily_returns(seeded))
+
+        # CCC goes ex-dividend on 2024-06-10: every earlier adjusted close drops 2%
+        adjusted = truth.copy()
+        adjusted.loc[:'2024-06-07', 'CCC'] *= 0.98
+        provider = FixturePriceProvider(adjusted)
+        stats = store.refresh(provider, tickers, '2019-01-01', '2024-07-01')
+        assert stats['readjusted'] == ['CCC'], stats
+        assert provider.requests[-1][:2] == (('CCC',), pd.Timestamp('2019-01-01')), provider.requests
+
+        prices_df, returns_df = store.load()
+        pd.testing.assert_frame_equal(prices_df, adjusted, check_freq=False)
+        pd.testing.assert_frame_equal(returns_df, daily_returns(adjusted), check_freq=False)
+
+        print(f"Readjust: {stats['requests']} requests, re-fetched {stats['readjusted']} from the start, "
+              f"returns recomputed for {stats['updated_rows']} rows")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def check_parallel() -> None:
+    """Fetch a large universe in parallel batches with transient and permanent failures"""
+    tickers = [f'T{number:03d}' for number in range(60)]
+    truth = generate_prices(tickers, '2024-01-01', '2024-03-29', seed=1)
+    workers, rate = 4, 200.0
+
+    provider = FixturePriceProvider(truth, delay=0.02)
+    provider.fail('T003', times=2)   # recovers on the third attempt
+    provider.fail('T017')            # never recovers
+    parallel = ParallelPriceProvider(provider, batch_size=10, workers=workers, retries=2,
+                                     backoff=0.01, rate=rate)
+
+    start = time.perf_counter()
+    prices_df = parallel.fetch(tickers, '2024-01-01', '2024-04-01')
+    seconds = time.perf_counter() - start
+
+    assert list(parallel.failures) == ['T017'], parallel.failures
+    assert list(prices_df.columns) == [ticker for ticker in tickers if ticker != 'T017']
+    pd.testing.assert_frame_equal(prices_df, truth[prices_df.columns], check_freq=False)
+    assert provider.max_in_flight <= workers, provider.max_in_flight
+    started = sorted(provider.started)
+    assert started[-1] - started[0] >= (len(started) - 1) / rate * 0.9, "rate limit exceeded"
+    # Only the batch holding T017 was split into single-ticker requests
+    singles = [names for names, _, _ in provider.requests if len(names) == 1]
+    assert len(singles) == 10 + 2, singles
+
+    print(f"Parallel fetch: {len(tickers)} tickers in {len(provider.requests)} requests, "
+          f"{seconds:.2f}s, max {provider.max_in_flight} in flight, failed: {sorted(parallel.failures)}")
+
+
+def main():
+    check_refresh()
+    check_readjust()
+    check_parallel()
+    print("All market data fixture checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# src/market_store.py
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+from collections import defaultdict
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+META_FILENAME = 'meta.json'
+KINDS = ('prices', 'returns')
+
+
+def daily_returns(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """Daily returns with gaps (holidays of one exchange) forward-filled first"""
+    return prices_df.ffill().pct_change()
+
+
+class MarketDataStore:
+    """Binary columnar cache of daily prices and returns.
+
+    Layout under `directory`:
+        dates-<version>.npy      int64 nanosecond timestamps, sorted
+        prices-<version>.npy     float64 matrix, one row per ticker
+        returns-<version>.npy    float64 matrix, one row per ticker
+        meta.json                version, tickers and index name
+
+    Matrices are stored ticker-major (tickers x dates), so a ticker's history
+    is one contiguous slice. Files are opened with `mmap_mode='r'`, so a read
+    projected on a few tickers and a date range only pages in the bytes it
+    needs. A write goes to new versioned files and `meta.json` is replaced
+    last, so readers never mix files from two writes; the previous version's
+    files are kept until the next write for readers still on it.
+    """
+
+    def __init__(self, directory: str = os.path.join('data', 'raw', 'market'), keep: int = 2):
+        self.directory = directory
+        # Versions kept on disk; at least 2, so a reader that has just read the
+        # previous meta.json can still open that version's arrays
+        self.keep = max(2, keep)
+        self._meta = None
+        self._arrays: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # ------------------------------------------------------------------ #
+    # Writing
+    # ------------------------------------------------------------------ #
+    def write(self, prices_df: pd.DataFrame, returns_df: pd.DataFrame) -> str:
+        """Store aligned prices and returns as a new version; returns the version"""
+        returns_df = returns_df.reindex(index=prices_df.index, columns=prices_df.columns)
+        index = pd.DatetimeIndex(prices_df.index)
+        if not index.is_monotonic_increasing:
+            raise ValueError("Market data index must be sorted by date")
+
+        os.makedirs(self.directory, exist_ok=True)
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        np.save(self._path(f'dates-{version}.npy'), index.values.astype('datetime64[ns]').view('int64'))
+        for kind, df in zip(KINDS, (prices_df, returns_df)):
+            np.save(self._path(f'{kind}-{version}.npy'),
+                    np.ascontiguousarray(df.to_numpy(dtype='float64').T))
+
+        meta = {
+            'version': version,
+            'tickers': [str(column) for column in prices_df.columns],
+            'index_name': prices_df.index.name,
+            'rows': len(index),
+            'start': index[0].strftime('%Y-%m-%d') if len(index) else None,
+            'end': index[-1].strftime('%Y-%m-%d') if len(index) else None,
+        }
+        tmp_path = self._path(f'{META_FILENAME}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self._path(META_FILENAME))
+
+        self._remove_stale(version)
+        self._meta, self._arrays = None, {}
+        return version
+
+    def _remove_stale(self, version: str) -> None:
+        """Delete the files of all but the `keep` newest versions.
+
+        The previous version survives a write: another process may have read
+        the old meta.json and not opened its arrays yet. Versions are
+        timestamps, so they sort by age.
+        """
+        versions = set()
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and '-' in name:
+                versions.add(name[:-len('.npy')].split('-', 1)[1])
+        stale = sorted(versions - {version})[:-(self.keep - 1)]
+        for name in os.listdir(self.directory):
+            if name.endswith('.npy') and name[:-len('.npy')].split('-', 1)[-1] in stale:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+
+    def migrate_csv(self, prices_csv: str = os.path.join('data', 'raw', 'prices.csv'),
+                    returns_csv: str = os.path.join('data', 'raw', 'returns.csv')) -> str:
+        """Convert the legacy CSV cache; the CSV files are left in place"""
+        prices_df = pd.read_csv(prices_csv, index_col=0, parse_dates=True)
+        returns_df = pd.read_csv(returns_csv, index_col=0, parse_dates=True)
+        return self.write(prices_df, returns_df)
+
+    # ------------------------------------------------------------------ #
+    # Reading
+    # ------------------------------------------------------------------ #
+    def exists(self) -> bool:
+        return os.path.exists(self._path(META_FILENAME))
+
+    def stamp(self) -> Optional[Tuple[int, int]]:
+        """Cheap change marker: (mtime_ns, size) of meta.json, None if nothing is stored"""
+        try:
+            stat = os.stat(self._path(META_FILENAME))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def meta(self) -> Dict:
+        """Metadata of the stored version, re-read when another writer replaced it"""
+        with open(self._path(META_FILENAME), 'r') as f:
+            meta = json.load(f)
+        if self._meta is None or self._meta['version'] != meta['version']:
+            self._meta, self._arrays = meta, {}
+        return self._meta
+
+    def _array(self, name: str, version: str) -> np.ndarray:
+        key = (name, version)
+        if key not in self._arrays:
+            self._arrays[key] = np.load(self._path(f"{name}-{version}.npy"), mmap_mode='r')
+        return self._arrays[key]
+
+    def read(self, kind: str = 'prices', tickers: Optional[Sequence[str]] = None,
+             start=None, end=None, meta: Optional[Dict] = None) -> pd.DataFrame:
+        """Read one matrix, optionally projected on tickers and an inclusive date range.
+
+        Pass `meta` to read the version it describes rather than the current one.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown market data kind {kind!r}, expected one of {KINDS}")
+        meta = meta or self.meta()
+        dates = self._array('dates', meta['version'])
+
+        lo = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side='left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).value, side='right'))
+
+        all_tickers = meta['tickers']
+        if tickers is None:
+            tickers, rows = all_tickers, slice(None)
+        else:
+            positions = {ticker: i for i, ticker in enumerate(all_tickers)}
+            missing = [ticker for ticker in tickers if ticker not in positions]
+            if missing:
+                raise KeyError(f"Tickers not in market data cache: {missing}")
+            rows = [positions[ticker] for ticker in tickers]
+
+        values = np.array(self._array(kind, meta['version'])[rows, lo:hi]).T
+        index = pd.DatetimeIndex(np.array(dates[lo:hi]), name=meta['index_name'])
+        return pd.DataFrame(values, index=index, columns=list(tickers))
+
+    def load(self, tickers: Optional[Sequence[str]] = None, start=None,
+             end=None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Prices and returns, same shape and projection as `read`"""
+        _, prices_df, returns_df = self.load_version(tickers, start, end)
+        return prices_df, returns_df
+
+    def load_version(self, tickers: Optional[Sequence[str]] = None, start=None,
+                     end=None) -> Tuple[str, pd.DataFrame, pd.DataFrame]:
+        """Version, prices and returns, all from a single read of the metadata.
+
+        A concurrent write cannot mix versions or mislabel the frames: the
+        files of the previous version are kept until the next write.
+        """
+        meta = self.meta()
+        return (meta['version'], self.read('prices', tickers, start, end, meta),
+                self.read('returns', tickers, start, end, meta))
+
+    def last_valid_dates(self) -> Dict[str, Optional[pd.Timestamp]]:
+        """Last date with a price per ticker (None if a ticker has no price at all)"""
+        meta = self.meta()
+        dates, valid = self._array('dates', meta['version']), ~np.isnan(self._array('prices', meta['version']))
+        last_rows = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        return {
+            ticker: pd.Timestamp(int(dates[row])) if valid[i].any() else None
+            for i, (ticker, row) in enumerate(zip(meta['tickers'], last_rows))
+        }
+
+    # ------------------------------------------------------------------ #
+    # Incremental refresh
+    # ------------------------------------------------------------------ #
+    def refresh(self, provider, tickers: Sequence[str], start, end, overlap_days: int = 7,
+                tolerance: float = 1e-4) -> Dict:
+        """Fetch only what the cache is missing and merge it in.
+
+        Tickers already cached are fetched from `overlap_days` before their
+        last price (one provider call per distinct last date), new tickers
+        from `start`. `end` is exclusive, as for yfinance. Adjusted closes
+        are rebased after every dividend or split, so the overlapping days
+        are compared with the cache: a ticker whose prices moved by more than
+        `tolerance` (relative) is re-fetched from `start` and its history
+        replaced; otherwise the fetched rows override the cached ones.
+
+        Returns are recomputed from the first changed row onwards only, and
+        for new tickers. Tickers the provider failed on keep their cached
+        history and are retried on the next refresh.
+        """
+        if self.exists():
+            prices_df, returns_df = self.load()
+            last_dates = self.last_valid_dates()
+        else:
+            prices_df, returns_df, last_dates = pd.DataFrame(), pd.DataFrame(), {}
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+
+        groups = defaultdict(list)
+        for ticker in tickers:
+            last_date = last_dates.get(ticker)
+            if last_date is None:
+                groups[start].append(ticker)
+            elif last_date + pd.Timedelta(days=1) < end:
+                groups[max(start, last_date - pd.Timedelta(days=overlap_days))].append(ticker)
+
+        fetched, failed = [], {}
+        for fetch_from, group in sorted(groups.items()):
+            fetched.append(provider.fetch(group, fetch_from, end))
+            # Providers that tolerate partial failures report them per ticker
+            failed.update(getattr(provider, 'failures', {}))
+        fetched = [df for df in fetched if not df.empty]
+        stats = {'requests': len(groups), 'tickers': sum(len(group) for group in groups.values()),
+                 'failed': failed, 'new_rows': 0, 'updated_rows': 0, 'readjusted': [],
+                 'version': self.meta()['version'] if self.exists() else None}
+        if not fetched:
+            return stats
+
+        update = pd.concat(fetched, axis=1).sort_index()
+        update.index.name = prices_df.index.name or update.index.name or 'Date'
+        cached = [column for column in prices_df.columns]
+
+        # Overlapping prices that moved mean the provider rebased the history
+        readjust = []
+        for ticker in update.columns.intersection(cached):
+            overlap = pd.concat([prices_df[ticker], update[ticker]], axis=1, join='inner').dropna()
+            if len(overlap) and not np.allclose(overlap.iloc[:, 1], overlap.iloc[:, 0], rtol=tolerance, atol=0):
+                readjust.append(ticker)
+        history = pd.DataFrame()
+        if readjust:
+            history = provider.fetch(readjust, start, end)
+            stats['requests'] += 1
+            history_failures = getattr(provider, 'failures', {})
+            failed.update(history_failures)
+            for ticker in readjust:
+                if ticker in history_failures or ticker not in history.columns or history[ticker].isna().all():
+                    # Never append a tail on a different adjustment basis
+                    failed.setdefault(ticker, "Adjusted history changed and could not be re-fetched")
+                    history = history.drop(columns=ticker, errors='ignore')
+            update = update.drop(columns=readjust)
+            stats['readjusted'] = list(history.columns)
+
+        new_columns = [column for column in update.columns.union(history.columns) if column not in cached]
+        merged = update.combine_first(prices_df)
+        if not history.empty:
+            merged = merged.reindex(merged.index.union(history.index))
+            for ticker in history.columns:
+                merged[ticker] = history[ticker].reindex(merged.index)
+        merged = merged.reindex(columns=cached + new_columns)
+        merged.index.name = update.index.name
+
+        # First row whose existing prices changed or that did not exist before
+        before = prices_df.reindex(merged.index)
+        changed = (before[cached].ne(merged[cached]) &
+                   (before[cached].notna() | merged[cached].notna())).any(axis=1).to_numpy()
+        inserted = ~merged.index.isin(prices_df.index)
+        affected = np.flatnonzero(changed | inserted)
+
+        returns_df = returns_df.reindex(index=merged.index, columns=merged.columns)
+        if cached and len(affected):
+            first = int(affected[0])
+            # Seed the window with the last known price of every ticker before it
+            seed = merged[cached].iloc[:first].ffill().iloc[-1:] if first else merged[cached].iloc[:0]
+            window = pd.concat([seed, merged[cached].iloc[first:]])
+            returns_df.iloc[first:, :len(cached)] = daily_returns(window).iloc[len(seed):].to_numpy()
+        if new_columns:
+            returns_df[new_columns] = daily_returns(merged[new_columns])
+
+        stats['new_rows'] = int(inserted.sum())
+        stats['updated_rows'] = int(len(affected))
+        stats['version'] = self.write(merged, returns_df)
+        return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the CSV market data cache to the binary store")
+    parser.add_argument('--prices-csv', default=os.path.join('data', 'raw', 'prices.csv'))
+    parser.add_argument('--returns-csv', default=os.path.join('data', 'raw', 'returns.csv'))
+    parser.add_argument('--directory', default=os.path.join('data', 'raw', 'market'))
+    args = parser.parse_args()
+
+    store = MarketDataStore(args.directory)
+    version = store.migrate_csv(args.prices_csv, args.returns_csv)
+    meta = store.meta()
+    print(f"Migrated {meta['rows']} rows x {len(meta['tickers'])} tickers to {args.directory} (version {version})")
+
+    start = time.perf_counter()
+    csv_prices = pd.read_csv(args.prices_csv, index_col=0, parse_dates=True)
+    csv_returns = pd.read_csv(args.returns_csv, index_col=0, parse_dates=True)
+    csv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prices, returns = MarketDataStore(args.directory).load()
+    store_seconds = time.perf_counter() - start
+
+    for loaded, original in ((prices, csv_prices), (returns, csv_returns)):
+        # Only the datetime unit of the index may differ from the CSV parse
+        pd.testing.assert_frame_equal(loaded, original.set_axis(loaded.index), check_freq=False)
+        assert loaded.index.equals(original.index)
+    print(f"CSV load: {csv_seconds * 1000:.1f} ms, binary load: {store_seconds * 1000:.1f} ms (identical frames)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# src/metrics_engine.py
+
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+# Columns of the table returned by compute_metrics, besides the per-benchmark ones
+METRIC_COLUMNS = [
+    'Observations', 'Total Return', 'Annual Return', 'Annual Volatility', 'Sharpe Ratio',
+    'Sortino Ratio', 'Max Drawdown', 'Drawdown Peak', 'Drawdown Trough', 'Drawdown Recovery',
+    'Drawdown Length', 'Recovery Length',
+]
+# Added once per benchmark as `<name> vs <benchmark>`
+RELATIVE_METRICS = ['Beta', 'Alpha', 'Information Ratio']
+
+
+def _column_moments(values: np.ndarray, valid: np.ndarray):
+    """Per-column count, mean and sample standard deviation ignoring NaN"""
+    count = valid.sum(axis=0)
+    filled = np.where(valid, values, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = filled.sum(axis=0) / count
+        centered = np.where(valid, values - mean, 0.0)
+        std = np.sqrt((centered * centered).sum(axis=0) / (count - 1))
+    return count, mean, std
+
+
+def _drawdowns(values: np.ndarray, valid: np.ndarray):
+    """Max drawdown of every column with the positions of its peak, trough and recovery.
+
+    Missing returns count as flat periods, as in a pandas cumprod. Positions
+    are row numbers; recovery is -1 for drawdowns that have not recovered
+    and for columns without any drawdown.
+    """
+    n_rows, n_columns = values.shape
+    wealth = np.cumprod(1.0 + np.where(valid, values, 0.0), axis=0)
+    peaks = np.maximum.accumulate(wealth, axis=0)
+    drawdown = wealth / peaks - 1.0
+
+    trough = np.argmin(drawdown, axis=0)
+    max_drawdown = drawdown[trough, np.arange(n_columns)]
+
+    rows = np.arange(n_rows)[:, None]
+    # Last new high at or before the trough
+    last_high = np.maximum.accumulate(np.where(drawdown >= 0.0, rows, 0), axis=0)
+    peak = last_high[trough, np.arange(n_columns)]
+
+    # First row after the trough back at the peak's level
+    peak_level = wealth[peak, np.arange(n_columns)]
+    recovered = (rows > trough) & (wealth >= peak_level)
+    recovery = np.where(recovered.any(axis=0), recovered.argmax(axis=0), -1)
+    # A column that never drew down has nothing to recover from
+    recovery[max_drawdown >= 0.0] = -1
+    return max_drawdown, peak, trough, recovery
+
+
+def compute_metrics(returns_df: pd.DataFrame, benchmark_returns: Optional[pd.DataFrame] = None,
+                    risk_free_rate: float = 0.0, periods_per_year: float = 252) -> pd.DataFrame:
+    """Performance and risk metrics for every column of a returns matrix.
+
+    Returns one row per column (asset or portfolio) and one column per
+    metric. Each metric is a vectorized NumPy reduction over the whole
+    matrix, so thousands of columns cost about as much as a few large array
+    operations. NaN returns (before listing, exchange holidays) are skipped
+    per column. Ratios use the annual `risk_free_rate`; the Sortino ratio
+    measures downside deviation below the per-period risk-free rate.
+
+    For each column of `benchmark_returns`, beta (pairwise covariance over
+    the benchmark's variance), Jensen's alpha and the information ratio are
+    added as `Beta vs <benchmark>` etc.
+    """
+    values = returns_df.to_numpy(dtype='float64')
+    valid = ~np.isnan(values)
+    index = returns_df.index
+    count, mean, std = _column_moments(values, valid)
+
+    annual_return = mean * periods_per_year
+    annual_volatility = std * np.sqrt(periods_per_year)
+    target = risk_free_rate / periods_per_year
+    shortfall = np.where(valid, np.minimum(values - target, 0.0), 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total_return = np.prod(np.where(valid, 1.0 + values, 1.0), axis=0) - 1.0
+        downside = np.sqrt((shortfall * shortfall).sum(axis=0) / count) * np.sqrt(periods_per_year)
+        sharpe = (annual_return - risk_free_rate) / annual_volatility
+        sortino = (annual_return - risk_free_rate) / downside
+
+    max_drawdown, peak, trough, recovery = _drawdowns(values, valid)
+    recovered = recovery >= 0
+    dates = np.asarray(index)
+
+    table = pd.DataFrame({
+        'Observations': count,
+        'Total Return': total_return,
+        'Annual Return': annual_return,
+        'Annual Volatility': annual_volatility,
+        'Sharpe Ratio': sharpe,
+        'Sortino Ratio': sortino,
+        'Max Drawdown': max_drawdown,
+        'Drawdown Peak': dates[peak],
+        'Drawdown Trough': dates[trough],
+        'Drawdown Recovery': pd.Series(dates[recovery]).where(recovered).to_numpy(),
+        # In periods: peak to trough, and trough to recovery (NaN if not recovered)
+        'Drawdown Length': trough - peak,
+        'Recovery Length': np.where(recovered, recovery - trough, np.nan),
+    }, index=returns_df.columns)
+    # Columns without any return have no meaningful drawdown
+    table.loc[count == 0, METRIC_COLUMNS[1:]] = np.nan
+
+    if benchmark_returns is not None:
+        benchmark_values = benchmark_returns.reindex(index).to_numpy(dtype='float64')
+        for position, benchmark in enumerate(benchmark_returns.columns):
+            relative = _relative_metrics(values, valid, mean, benchmark_values[:, position],
+                                         risk_free_rate, periods_per_year)
+            for name, column in relative.items():
+                table[f'{name} vs {benchmark}'] = column
+    return table
+
+
+def _relative_metrics(values: np.ndarray, valid: np.ndarray, mean: np.ndarray, benchmark: np.ndarray,
+                      risk_free_rate: float, periods_per_year: float):
+    """Beta, Jensen's alpha and information ratio of every column against one benchmark"""
+    benchmark_valid = ~np.isnan(benchmark)
+    _, benchmark_mean, benchmark_std = _column_moments(benchmark[:, None], benchmark_valid[:, None])
+    pair = valid & benchmark_valid[:, None]
+    pair_count = pair.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Covariance over the rows where both have a return
+        asset_mean = np.where(pair, values, 0.0).sum(axis=0) / pair_count
+        bench_mean = np.where(pair, benchmark[:, None], 0.0).sum(axis=0) / pair_count
+        covariance = np.where(pair, (values - asset_mean) * (benchmark[:, None] - bench_mean), 0.0).sum(axis=0) \
+            / (pair_count - 1)
+        beta = covariance / benchmark_std[0] ** 2
+
+        alpha = (mean * periods_per_year - risk_free_rate) - \
+            beta * (benchmark_mean[0] * periods_per_year - risk_free_rate)
+
+        _, active_mean, active_std = _column_moments(values - benchmark[:, None], pair)
+        information_ratio = (active_mean * periods_per_year) / (active_std * np.sqrt(periods_per_year))
+
+    return dict(zip(RELATIVE_METRICS, (beta, alpha, information_ratio)))
@@ -0,0 +1,143 @@
+# src/metrics_snapshots.py
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from backend import bars, data_processing, metrics_engine
+from backend.bars import TRADING_DAYS
+from backend.config import BENCHMARK_INDEX, BENCHMARKS
+from backend.data_processing import PortfolioAnalyzer
+
+# Modules whose code determines the metrics of a snapshot
+METRICS_CODE = (bars, data_processing, metrics_engine)
+
+
+def json_value(value):
+    """Plain JSON value: NaN/inf become None, timestamps ISO dates"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def json_records(df: pd.DataFrame):
+    return [{key: json_value(value) for key, value in row.items()} for row in df.to_dict(orient='records')]
+
+
+def metrics_fingerprint(analyzer: PortfolioAnalyzer) -> str:
+    """Hash of everything besides the market data that a snapshot depends on.
+
+    Covers the analyzer settings (risk-free rate, benchmarks, weights,
+    annualization) and the source of the modules computing the metrics, so
+    a snapshot stored before a config or code change is not served after it.
+    """
+    digest = hashlib.sha256()
+    for path in [module.__file__ for module in METRICS_CODE] + [__file__]:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    digest.update(json.dumps({
+        'risk_free_rate': analyzer.risk_free_rate,
+        'benchmark': analyzer.benchmark,
+        'benchmark_index': BENCHMARK_INDEX,
+        'benchmarks': sorted(BENCHMARKS.values()),
+        'weights': {ticker: float(weight) for ticker, weight in analyzer.portfolio_weights.items()},
+        'periods_per_year': analyzer.periods_per_year,
+    }, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def build_metrics_snapshot(analyzer: PortfolioAnalyzer, data_version: str) -> Dict:
+    """Every metric the API serves for one data version, as a JSON-ready dict.
+
+    The portfolio returns are computed once and shared by the universe table
+    (per-asset and portfolio metrics) and the portfolio series.
+    """
+    portfolio_returns = analyzer.calculate_portfolio_returns()
+    universe = analyzer.calculate_universe_metrics(portfolio_returns=portfolio_returns)
+    portfolio = analyzer.calculate_portfolio_metrics(universe)
+
+    wealth = (1 + portfolio_returns).cumprod()
+    bars_per_day = max(1, int(round(analyzer.periods_per_year / TRADING_DAYS)))
+    series = pd.DataFrame({
+        'date': portfolio_returns.index,
+        'value': (wealth * 100).to_numpy(),
+        'drawdown': (wealth / wealth.cummax() - 1).to_numpy(),
+        # 21 trading days, whatever the bar size
+        'rolling_volatility': (portfolio_returns.rolling(21 * bars_per_day).std()
+                               * np.sqrt(analyzer.periods_per_year)).to_numpy(),
+    })
+
+    assets = universe.drop(index='Portfolio').rename_axis('ticker').reset_index()
+    return {
+        'data_version': data_version,
+        'fingerprint': metrics_fingerprint(analyzer),
+        'computed_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data_end': json_value(analyzer.returns_df.index[-1]) if len(analyzer.returns_df) else None,
+        'benchmark': analyzer.benchmark,
+        'basic_metrics': {key: json_value(value) for key, value in portfolio['basic_metrics'].items()},
+        'risk_metrics': {key: json_value(value) for key, value in portfolio['risk_metrics'].items()},
+        'portfolio': {key: json_value(value) for key, value in universe.loc['Portfolio'].items()},
+        'assets': json_records(assets),
+        'series': json_records(series),
+    }
+
+
+class MetricsSnapshotStore:
+    """Metrics snapshots on disk, one JSON file per market data version and
+    metrics fingerprint (see `metrics_fingerprint`).
+
+    Snapshots are written to a temporary file and renamed into place, so a
+    reader never sees a partial one. Only the `keep` most recent versions
+    are kept.
+    """
+
+    def __init__(self, directory: str = os.path.join('data', 'processed', 'metrics'), keep: int = 3):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, version: str, fingerprint: str) -> str:
+        return os.path.join(self.directory, f"{version}-{fingerprint}.json")
+
+    def get(self, version: str, fingerprint: str) -> Optional[Dict]:
+        """The snapshot of `version` computed with `fingerprint`, or None if it was not materialized"""
+        try:
+            with open(self._path(version, fingerprint)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logging.warning(f"Ignoring unreadable metrics snapshot {version}")
+            return None
+
+    def put(self, snapshot: Dict) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(snapshot['data_version'], snapshot['fingerprint'])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, allow_nan=False)
+        os.replace(tmp_path, path)
+        self._remove_stale()
+        return path
+
+    def _remove_stale(self) -> None:
+        names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        paths = sorted((os.path.join(self.directory, name) for name in names), key=os.path.getmtime)
+        for path in paths[:-self.keep]:
+            os.remove(path)
+
+    def materialize(self, analyzer: PortfolioAnalyzer, data_version: str) -> Dict:
+        """Compute and store the snapshot of `data_version`"""
+        snapshot = build_metrics_snapshot(analyzer, data_version)
+        self.put(snapshot)
+        logging.info(f"Materialized metrics snapshot for market data version {data_version}")
+        return snapshot
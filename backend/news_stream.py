@@ -0,0 +1,221 @@
+# src/news_stream.py
+
+import os
+import time
+import queue
+import argparse
+import threading
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from articles_to_text import IncrementalArticleIngestor
+from scrape_engine import Fetcher, HttpCache, ScrapeEngine
+
+# Marks the end of a stream on the queues between stages
+STOP = None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(values, q)), 3) if values else None
+
+
+class NewsStream:
+    """Online news ingestion: scrape -> parse and annotate -> embed -> upsert.
+
+    Each stage runs in its own thread and hands work to the next one through
+    a bounded queue, so a slow stage (usually embedding) applies back-pressure
+    to the crawler instead of buffering without limit. Embeddings are
+    computed in micro-batches of up to `batch_size` chunks, waiting at most
+    `max_wait` seconds for a batch to fill, and every batch is upserted into
+    the live index snapshot that the chat endpoint reads.
+
+    The article `.txt` files and the append-only chunk store are still
+    written, so everything served online can be audited and rebuilt offline.
+    """
+
+    def __init__(self, start_urls: Iterable[str], articles_dir: str = 'articles',
+                 store_file: str = os.path.join('data', 'raw_processed', 'articles_chunks.jsonl.gz'),
+                 snapshot_store=None, embedder=None, fetcher: Optional[Fetcher] = None,
+                 selectors: Optional[Dict] = None, max_pages: int = 1, queue_size: int = 32,
+                 batch_size: int = 16, max_wait: float = 1.0, interval: Optional[float] = None):
+        self.start_urls = list(start_urls)
+        self.articles_dir = articles_dir
+        self.ingestor = IncrementalArticleIngestor(articles_dir, store_file)
+        self.snapshot_store = snapshot_store
+        self.embedder = embedder
+        self.fetcher = fetcher or Fetcher(HttpCache(os.path.join('data', 'cache', 'scraper')))
+        self.selectors = selectors
+        self.max_pages = max_pages
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.interval = interval
+
+        self.scraped = queue.Queue(maxsize=queue_size)
+        self.processed = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.metrics = {'articles': 0, 'chunks_indexed': 0, 'batches': 0, 'errors': 0,
+                        'lags': [], 'embed_seconds': 0.0, 'upsert_seconds': 0.0,
+                        'max_scraped_queue': 0, 'max_processed_queue': 0}
+
+    def put(self, target: queue.Queue, item, depth_metric: str) -> None:
+        target.put(item)
+        self.metrics[depth_metric] = max(self.metrics[depth_metric], target.qsize())
+
+    # ------------------------------------------------------------------ #
+    # Stages
+    # ------------------------------------------------------------------ #
+    def scrape(self) -> None:
+        """Crawl once, or every `interval` seconds until stopped"""
+        engine = ScrapeEngine(
+            self.articles_dir, self.fetcher, self.selectors, max_pages=self.max_pages,
+            on_article=lambda path: self.put(self.scraped, (os.path.basename(path), time.time()),
+                                             'max_scraped_queue')
+        )
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    engine.crawl(self.start_urls)
+                except Exception as e:
+                    print(f"Crawl failed: {e}")
+                    self.metrics['errors'] += 1
+                if self.interval is None:
+                    break
+                self.stop_event.wait(self.interval)
+        finally:
+            self.scraped.put(STOP)
+
+    def process(self) -> None:
+        """Parse, keyword-annotate and store each new article"""
+        while True:
+            item = self.scraped.get()
+            if item is STOP:
+                self.processed.put(STOP)
+                return
+            filename, scraped_at = item
+            try:
+                self.ingestor.ingest([filename], on_chunk=lambda chunk: self.put(
+                    self.processed, (chunk, scraped_at), 'max_processed_queue'
+                ))
+                self.metrics['articles'] += 1
+            except Exception as e:
+                print(f"Error processing {filename}: {e}")
+                self.metrics['errors'] += 1
+
+    def next_batch(self) -> List:
+        """Block for one chunk, then collect more until the batch is full or `max_wait` passes"""
+        batch = [self.processed.get()]
+        deadline = time.monotonic() + self.max_wait
+        while batch[-1] is not STOP and len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.processed.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def index(self) -> None:
+        """Embed micro-batches and upsert them into the live index"""
+        while True:
+            batch = self.next_batch()
+            done = batch[-1] is STOP
+            items = batch[:-1] if done else batch
+            if items:
+                try:
+                    self.upsert(items)
+                except Exception as e:
+                    print(f"Error indexing {len(items)} chunks: {e}")
+                    self.metrics['errors'] += 1
+            if done:
+                return
+
+    def upsert(self, items: List) -> None:
+        chunks = [chunk for chunk, _ in items]
+        start = time.perf_counter()
+        embeddings = np.asarray(self.embedder.generate_embeddings([chunk['content'] for chunk in chunks]))
+        embedded = time.perf_counter()
+        version = self.snapshot_store.upsert(embeddings, pd.DataFrame(chunks), self.embedder.model_name)
+        published = time.time()
+
+        self.metrics['embed_seconds'] += embedded - start
+        self.metrics['upsert_seconds'] += time.perf_counter() - embedded
+        self.metrics['batches'] += 1
+        self.metrics['chunks_indexed'] += len(chunks)
+        self.metrics['lags'].extend(published - scraped_at for _, scraped_at in items)
+        print(f"Published {version} with {len(chunks)} new chunks")
+
+    # ------------------------------------------------------------------ #
+    # Running
+    # ------------------------------------------------------------------ #
+    def run(self) -> Dict:
+        """Run all stages until the crawl(s) finish and every queue is drained"""
+        if self.embedder is None:
+            from generate_embeddings import EmbeddingsGenerator
+            self.embedder = EmbeddingsGenerator()
+        if self.snapshot_store is None:
+            from index_snapshots import IndexSnapshotStore
+            self.snapshot_store = IndexSnapshotStore(os.path.join('data', 'processed'))
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=stage, name=stage.__name__)
+                   for stage in (self.scrape, self.process, self.index)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("Stopping after the current crawl...")
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+        return self.summary(time.perf_counter() - start)
+
+    def summary(self, seconds: float) -> Dict:
+        lags = self.metrics['lags']
+        summary = {
+            'seconds': round(seconds, 3),
+            'articles': self.metrics['articles'],
+            'chunks_indexed': self.metrics['chunks_indexed'],
+            'batches': self.metrics['batches'],
+            'errors': self.metrics['errors'],
+            'articles_per_second': round(self.metrics['articles'] / seconds, 2) if seconds else None,
+            'freshness_lag_seconds': {'p50': percentile(lags, 50), 'p95': percentile(lags, 95),
+                                      'max': round(max(lags), 3) if lags else None},
+            'embed_seconds': round(self.metrics['embed_seconds'], 3),
+            'upsert_seconds': round(self.metrics['upsert_seconds'], 3),
+            'max_queue_depth': {'scraped': self.metrics['max_scraped_queue'],
+                                'processed': self.metrics['max_processed_queue']},
+        }
+        print("\nStreaming Summary:")
+        print(f"Articles ingested: {summary['articles']} ({summary['articles_per_second']}/s)")
+        print(f"Chunks indexed: {summary['chunks_indexed']} in {summary['batches']} batches")
+        print(f"Freshness lag (scrape -> live index): p50 {summary['freshness_lag_seconds']['p50']}s, "
+              f"p95 {summary['freshness_lag_seconds']['p95']}s")
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream newly scraped articles straight into the live index")
+    parser.add_argument('urls', nargs='*',
+                        default=["https://www.swissquote.com/en-ch/private/inspire/expert-insights/morning-news"])
+    parser.add_argument('--articles-dir', default='articles')
+    parser.add_argument('--interval', type=float, help="Re-crawl every N seconds instead of once")
+    parser.add_argument('--max-pages', type=int, default=1, help="Listing pages followed per start URL")
+    parser.add_argument('--article-link', help="CSS selector of links to full article pages")
+    parser.add_argument('--queue-size', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=16, help="Chunks embedded per micro-batch")
+    parser.add_argument('--max-wait', type=float, default=1.0, help="Seconds to wait for a batch to fill")
+    args = parser.parse_args()
+
+    selectors = {'article_link': args.article_link} if args.article_link else None
+    stream = NewsStream(args.urls, articles_dir=args.articles_dir, selectors=selectors,
+                        max_pages=args.max_pages, queue_size=args.queue_size, batch_size=args.batch_size,
+                        max_wait=args.max_wait, interval=args.interval)
+    stream.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 import os
+import argparse
 import PyPDF2
 import re
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Optional, Iterable, Iterator, Tuple
 import json
 from datetime import datetime
 from collections import defaultdict
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from concurrent.futures import ProcessPoolExecutor
+from keyword_engine import KeywordMatcher, KeywordAnnotations
+from sentence_index import SentenceIndex, SENTENCE_BREAK
+from chunk_io import open_chunk_writer, temporary_path, write_similarities
+from similarity import compute_similarities, default_vectorizer
+from extraction_cache import ExtractionCache, file_digest, make_key
+from token_counter import TokenCounter
 
 class FinancialKeywords:
     """Comprehensive financial keyword categorization"""
@@ -111,84 +116,125 @@ class FinancialKeywords:
         }
     }
 
+    _matcher = None
+
+    @classmethod
+    def taxonomy(cls) -> Dict[str, Dict[str, Set[str]]]:
+        """All keyword category groups by name"""
+        return {
+            'FINANCIAL_METRICS': cls.FINANCIAL_METRICS,
+            'COMPANY_STATE': cls.COMPANY_STATE,
+            'RISK_FACTORS': cls.RISK_FACTORS,
+            'BUSINESS_OUTLOOK': cls.BUSINESS_OUTLOOK
+        }
+
+    @classmethod
+    def matcher(cls) -> KeywordMatcher:
+        """Keyword automaton for the whole taxonomy, compiled once per process"""
+        if cls._matcher is None:
+            cls._matcher = KeywordMatcher(cls.taxonomy())
+        return cls._matcher
+
+    @classmethod
+    def fingerprint(cls) -> str:
+        """Hash of the taxonomy, used to invalidate cached keyword analyses"""
+        return cls.matcher().fingerprint
+
+
+def get_keyword_annotations(chunk: Dict) -> KeywordAnnotations:
+    """Compact keyword annotations of a chunk"""
+    return KeywordAnnotations.from_json(FinancialKeywords.matcher(), chunk['keyword_annotations'])
+
+
+def get_keyword_analysis(chunk: Dict, context_window: int = 100) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+    """Nested keyword findings of a chunk, materialized from its annotations.
+
+    Chunks written before annotations were introduced carry the dict view
+    under 'keyword_analysis' and are returned as-is.
+    """
+    if 'keyword_annotations' not in chunk:
+        return chunk.get('keyword_analysis', {})
+    return get_keyword_annotations(chunk).findings(chunk['content'], context_window)
+
 class EnhancedFinancialReportProcessor:
-    def __init__(self, input_dir: str, output_dir: str):
+    # Bump when extraction or cleaning changes so cached pages are not reused
+    EXTRACTOR_VERSION = f"PyPDF2-{PyPDF2.__version__}/1"
+    CHUNK_FILE_SUFFIX = '.jsonl.gz'
+    CHUNK_OVERLAP_SENTENCES = 2
+
+    def __init__(self, input_dir: str, output_dir: str, cache_dir: Optional[str] = None):
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.keywords = FinancialKeywords()
-        self.tfidf = TfidfVectorizer(max_features=1000, stop_words='english', ngram_range=(1, 2))
+        self.cache = ExtractionCache(cache_dir) if cache_dir else None
+        self.token_counter = TokenCounter()
+        self.tfidf = default_vectorizer()
         os.makedirs(output_dir, exist_ok=True)
 
-    def find_keywords_in_text(self, text: str) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
+    def find_keywords_in_text(self, text: str,
+                              sentence_index: Optional[SentenceIndex] = None) -> Dict[str, Dict[str, List[Dict[str, str]]]]:
         """Find all financial keywords in text with context"""
-        text_lower = text.lower()
-        findings = defaultdict(lambda: defaultdict(list))
-        
-        # Define context window size (in characters)
-        context_window = 100
-        
-        # Search through all keyword categories
-        for category_group_name, category_group in {
-            'FINANCIAL_METRICS': self.keywords.FINANCIAL_METRICS,
-            'COMPANY_STATE': self.keywords.COMPANY_STATE,
-            'RISK_FACTORS': self.keywords.RISK_FACTORS,
-            'BUSINESS_OUTLOOK': self.keywords.BUSINESS_OUTLOOK
-        }.items():
-            for category_name, keywords in category_group.items():
-                for keyword in keywords:
-                    for match in re.finditer(r'\b' + re.escape(keyword) + r'\b', text_lower):
-                        # Get surrounding context
-                        start = max(0, match.start() - context_window)
-                        end = min(len(text), match.end() + context_window)
-                        
-                        findings[category_group_name][category_name].append({
-                            'keyword': keyword,
-                            'context': text[start:end].strip(),
-                            'position': match.start(),
-                            'sentence': self.find_containing_sentence(text, match.start())
-                        })
-        
-        return dict(findings)
+        return self.keywords.matcher().find_keywords(text, sentence_index)
+
+    def annotate_keywords(self, text: str,
+                          sentence_index: Optional[SentenceIndex] = None) -> KeywordAnnotations:
+        """Find all financial keywords in text as compact offset records"""
+        return self.keywords.matcher().annotate(text, sentence_index)
 
     def find_containing_sentence(self, text: str, position: int) -> str:
         """Find the full sentence containing the given position"""
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        current_pos = 0
-        
-        for sentence in sentences:
-            sentence_length = len(sentence) + 2  # +2 for the delimiter and space
-            if current_pos <= position < current_pos + sentence_length:
-                return sentence.strip()
-            current_pos += sentence_length
-        
-        return ""
+        return SentenceIndex.from_text(text).sentence_at(position)
+
+    def open_pdf(self, file) -> PyPDF2.PdfReader:
+        """Open a PDF reader, decrypting it if necessary"""
+        reader = PyPDF2.PdfReader(file)
+
+        if reader.is_encrypted:
+            print(f"Warning: {getattr(file, 'name', file)} is encrypted. Attempting to decrypt...")
+            try:
+                reader.decrypt('')
+            except:
+                raise ValueError("PDF is encrypted and couldn't be decrypted")
 
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file with enhanced error handling"""
+        return reader
+
+    def count_pages(self, file_path: str) -> int:
+        """Number of pages in a PDF file"""
+        with open(file_path, 'rb') as file:
+            return len(self.open_pdf(file).pages)
+
+    def iter_pdf_pages(self, file_path: str, start_page: int = 0,
+                       end_page: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page number, text) for each page, one page at a time"""
+        with open(file_path, 'rb') as file:
+            reader = self.open_pdf(file)
+            end_page = len(reader.pages) if end_page is None else min(end_page, len(reader.pages))
+
+            for page_index in range(start_page, end_page):
+                try:
+                    yield page_index + 1, reader.pages[page_index].extract_text()
+                except Exception as e:
+                    print(f"Warning: Couldn't extract text from a page: {str(e)}")
+                    continue
+
+    def extract_pages(self, file_path: str, start_page: int = 0,
+                      end_page: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Extract (page number, text) pairs for a page range.
+
+        A range that cannot be read raises, naming the pages, so the whole
+        document is reported as failed instead of silently missing them.
+        """
         try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                
-                if reader.is_encrypted:
-                    print(f"Warning: {file_path} is encrypted. Attempting to decrypt...")
-                    try:
-                        reader.decrypt('')
-                    except:
-                        raise ValueError("PDF is encrypted and couldn't be decrypted")
-                
-                text = ''
-                for page in reader.pages:
-                    try:
-                        text += page.extract_text() + '\n'
-                    except Exception as e:
-                        print(f"Warning: Couldn't extract text from a page: {str(e)}")
-                        continue
-                
-                return text
-                
+            return list(self.iter_pdf_pages(file_path, start_page, end_page))
         except Exception as e:
-            print(f"Error processing {file_path}: {str(e)}")
-            return ""
+            pages = f"pages {start_page + 1}-{end_page}" if end_page is not None else f"pages {start_page + 1}-end"
+            print(f"Error processing {file_path} ({pages}): {str(e)}")
+            raise RuntimeError(f"Could not extract {pages}: {e}") from e
+
+    def extract_text_from_pdf(self, file_path: str, start_page: int = 0,
+                              end_page: Optional[int] = None) -> str:
+        """Extract text from PDF file (optionally a page range); raises if pages cannot be read"""
+        return ''.join(text + '\n' for _, text in self.extract_pages(file_path, start_page, end_page))
 
     def clean_text(self, text: str) -> str:
         """Clean and normalize text"""
@@ -197,148 +243,372 @@ class EnhancedFinancialReportProcessor:
         text = re.sub(r'[^\w\s.,;:?!-]', '', text)
         return text.strip()
 
-    def chunk_text(self, text: str, metadata: Dict) -> List[Dict]:
-        """Split text into chunks with keyword analysis"""
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        chunks = []
+    def iter_clean_sentences(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, int]]:
+        """Clean pages one at a time and yield (sentence, page number it starts on).
+
+        The unfinished sentence at the end of a page is carried over and
+        completed with the text of the next page.
+        """
+        carry, carry_page = '', None
+
+        for page_number, page_text in pages:
+            cleaned = self.clean_text(page_text)
+            if not cleaned:
+                continue
+
+            if carry:
+                buffer, start_page = f"{carry} {cleaned}", carry_page
+            else:
+                buffer, start_page = cleaned, page_number
+
+            sentences = SENTENCE_BREAK.split(buffer)
+            for sentence in sentences[:-1]:
+                yield sentence, start_page
+                start_page = page_number
+
+            carry, carry_page = sentences[-1], start_page
+
+        if carry:
+            yield carry, carry_page
+
+    def build_chunk(self, sentences: List[Tuple[str, Optional[int], int, int]],
+                    chunk_number: int, metadata: Dict) -> Dict:
+        """Assemble a chunk from its (sentence, page, tokens, words) entries and analyse its keywords"""
+        texts = [sentence for sentence, _, _, _ in sentences]
+        chunk_text = ' '.join(texts)
+
+        chunk = {
+            'chunk_id': f"{metadata['company']}_{metadata['year']}_{chunk_number:03d}",
+            'content': chunk_text,
+            'word_count': sum(words for _, _, _, words in sentences),
+            'embedding_tokens': sum(tokens for _, _, tokens, _ in sentences),
+            'prompt_tokens': self.token_counter.prompt_tokens(chunk_text),
+            # Reuse the known sentence offsets for the keyword analysis
+            'keyword_annotations': self.annotate_keywords(
+                chunk_text, SentenceIndex.from_sentences(texts)
+            ).to_json(),
+            **metadata
+        }
+
+        pages = [page for _, page, _, _ in sentences if page is not None]
+        if pages:
+            chunk['page_start'] = pages[0]
+            chunk['page_end'] = pages[-1]
+
+        return chunk
+
+    def iter_sized_sentences(self, sentences: Iterable[Tuple[str, Optional[int]]],
+                             budget: int) -> Iterator[Tuple[str, Optional[int], int, int]]:
+        """Attach token and word counts to sentences, splitting any that exceed the budget"""
+        for sentence, page in sentences:
+            tokens = self.token_counter.embedding_tokens(sentence)
+            if tokens <= budget:
+                yield sentence, page, tokens, len(sentence.split())
+                continue
+            for piece, piece_tokens in self.token_counter.split_to_budget(sentence, budget):
+                yield piece, page, piece_tokens, len(piece.split())
+
+    def iter_chunks(self, sentences: Iterable[Tuple[str, Optional[int]]], metadata: Dict) -> Iterator[Dict]:
+        """Incremental chunker: emit each chunk as soon as its embedding-token budget is full.
+
+        Chunks are sized in wordpieces of the embedding model, so none is
+        truncated when embedded; token counts are computed once per sentence.
+        """
         chunk_number = 1
-        
+
         current_chunk = []
-        current_length = 0
-        max_length = 500
-        overlap = 50
-        
-        for sentence in sentences:
-            sentence_words = len(sentence.split())
-            
-            if current_length + sentence_words > max_length and current_chunk:
-                chunk_text = ' '.join(current_chunk)
-                chunk_id = f"{metadata['company']}_{metadata['year']}_{chunk_number:03d}"
-                
-                # Analyze keywords in chunk
-                keyword_analysis = self.find_keywords_in_text(chunk_text)
-                
-                chunk = {
-                    'chunk_id': chunk_id,
-                    'content': chunk_text,
-                    'word_count': current_length,
-                    'keyword_analysis': keyword_analysis,
-                    **metadata
-                }
-                
-                chunks.append(chunk)
+        current_tokens = 0
+        budget = self.token_counter.embedding_budget
+        overlap = self.CHUNK_OVERLAP_SENTENCES
+
+        for entry in self.iter_sized_sentences(sentences, budget):
+            sentence_tokens = entry[2]
+
+            if current_tokens + sentence_tokens > budget and current_chunk:
+                yield self.build_chunk(current_chunk, chunk_number, metadata)
                 chunk_number += 1
-                
-                overlap_sentences = current_chunk[-2:] if len(current_chunk) > 2 else []
-                current_chunk = overlap_sentences + [sentence]
-                current_length = sum(len(s.split()) for s in current_chunk)
+
+                overlap_sentences = current_chunk[-overlap:] if len(current_chunk) > overlap else []
+                current_tokens = sum(tokens for _, _, tokens, _ in overlap_sentences)
+                # Drop overlap rather than exceed the budget
+                while overlap_sentences and current_tokens + sentence_tokens > budget:
+                    current_tokens -= overlap_sentences.pop(0)[2]
+                current_chunk = overlap_sentences + [entry]
+                current_tokens += sentence_tokens
             else:
-                current_chunk.append(sentence)
-                current_length += sentence_words
-        
+                current_chunk.append(entry)
+                current_tokens += sentence_tokens
+
         if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunks.append({
-                'chunk_id': f"{metadata['company']}_{metadata['year']}_{chunk_number:03d}",
-                'content': chunk_text,
-                'word_count': current_length,
-                'keyword_analysis': self.find_keywords_in_text(chunk_text),
-                **metadata
-            })
-        
-        return chunks
+            yield self.build_chunk(current_chunk, chunk_number, metadata)
 
-    def process_single_file(self, filename: str) -> List[Dict]:
-        """Process a single PDF file"""
-        file_path = os.path.join(self.input_dir, filename)
-        
-        raw_text = self.extract_text_from_pdf(file_path)
-        if not raw_text:
-            print(f"Warning: No text extracted from {filename}")
-            return []
-            
-        cleaned_text = self.clean_text(raw_text)
-        
-        metadata = {
+    def chunk_text(self, text: str, metadata: Dict) -> List[Dict]:
+        """Split text into chunks with keyword analysis"""
+        sentences = ((sentence, None) for sentence in SENTENCE_BREAK.split(text))
+        return list(self.iter_chunks(sentences, metadata))
+
+    def build_metadata(self, filename: str) -> Dict:
+        """Chunk metadata derived from the report filename"""
+        return {
             'company': filename.split('_')[0] if '_' in filename else filename.split('.')[0],
             'year': re.search(r'20\d{2}', filename).group(0) if re.search(r'20\d{2}', filename) else 'unknown',
             'source': filename,
             'processing_date': datetime.now().isoformat()
         }
-        
-        return self.chunk_text(cleaned_text, metadata)
 
-    def process_all_files(self) -> None:
-        """Process all PDF files with keyword analysis"""
-        all_chunks = []
-        processing_stats = defaultdict(int)
-        keyword_stats = defaultdict(lambda: defaultdict(int))
-        
-        for filename in os.listdir(self.input_dir):
-            if filename.endswith('.pdf'):
+    def process_pages(self, filename: str, pages: Iterable[Tuple[int, str]]) -> Iterator[Dict]:
+        """Stream pages through cleaning, sentence splitting and chunking"""
+        sentences = self.iter_clean_sentences(pages)
+        return self.iter_chunks(sentences, self.build_metadata(filename))
+
+    def cache_keys(self, file_path: str) -> Tuple[str, str, str]:
+        """Keys of the pages, chunks and keyword cache layers for a file"""
+        pages_key = make_key(file_digest(file_path), self.EXTRACTOR_VERSION)
+        chunks_key = make_key(pages_key, {
+            'overlap_sentences': self.CHUNK_OVERLAP_SENTENCES,
+            **self.token_counter.params()
+        })
+        keywords_key = make_key(chunks_key, self.keywords.fingerprint(), 'annotations')
+        return pages_key, chunks_key, keywords_key
+
+    def load_cached_chunks(self, filename: str, chunks_key: str, keywords_key: str) -> Optional[List[Dict]]:
+        """Rebuild a file's chunks from the cache, re-running only the keyword layer if it is stale"""
+        cached_chunks = self.cache.load('chunks', chunks_key)
+        if cached_chunks is None:
+            return None
+
+        annotations = self.cache.load('keywords', keywords_key)
+        if annotations is None:
+            print(f"Keyword taxonomy changed, re-analysing cached chunks of {filename}...")
+            annotations = [self.annotate_keywords(chunk['content']).to_json() for chunk in cached_chunks]
+            self.cache.store('keywords', keywords_key, annotations)
+
+        # Names and ids come from the current filename, the content from the cache
+        metadata = self.build_metadata(filename)
+        del metadata['processing_date']
+        chunks = []
+        for chunk_number, (chunk, chunk_annotations) in enumerate(zip(cached_chunks, annotations), start=1):
+            chunk.update(metadata)
+            chunk['chunk_id'] = f"{metadata['company']}_{metadata['year']}_{chunk_number:03d}"
+            chunk['keyword_annotations'] = chunk_annotations
+            chunks.append(chunk)
+        return chunks
+
+    def store_cached_chunks(self, chunks: Iterable[Dict], chunks_key: str, keywords_key: str) -> Iterator[Dict]:
+        """Yield chunks while writing them to the chunks and keyword cache layers"""
+        with self.cache.writer('chunks', chunks_key) as chunk_writer, \
+                self.cache.writer('keywords', keywords_key) as keyword_writer:
+            for chunk in chunks:
+                chunk_writer.write({k: v for k, v in chunk.items() if k != 'keyword_annotations'})
+                keyword_writer.write(chunk['keyword_annotations'])
+                yield chunk
+
+    def iter_file_chunks(self, filename: str) -> Iterator[Dict]:
+        """Stream the chunks of a single PDF file, reading it page by page"""
+        file_path = os.path.join(self.input_dir, filename)
+        if self.cache is None:
+            return self.process_pages(filename, self.iter_pdf_pages(file_path))
+        return self.iter_file_chunks_cached(filename, file_path)
+
+    def iter_file_chunks_cached(self, filename: str, file_path: str) -> Iterator[Dict]:
+        """Serve a file from the extraction cache, running PyPDF2 only for new or modified files"""
+        pages_key, chunks_key, keywords_key = self.cache_keys(file_path)
+
+        cached = self.load_cached_chunks(filename, chunks_key, keywords_key)
+        if cached is not None:
+            print(f"Using cached chunks for {filename}")
+            yield from cached
+            return
+
+        pages = self.cache.load('pages', pages_key)
+        if pages is None:
+            pages = self.cache.stream_through('pages', pages_key, self.iter_pdf_pages(file_path))
+
+        chunks = self.process_pages(filename, pages)
+        yield from self.store_cached_chunks(chunks, chunks_key, keywords_key)
+
+    def process_single_file(self, filename: str) -> List[Dict]:
+        """Process a single PDF file"""
+        return list(self.iter_file_chunks(filename))
+
+    def process_extracted_pages(self, filename: str, pages: List[Tuple[int, str]]) -> List[Dict]:
+        """Chunk and keyword-analyse pages extracted by a worker"""
+        return list(self.process_pages(filename, pages))
+
+    def iter_processed_files(self, filenames: List[str]) -> Iterator[Tuple[str, Iterable[Dict], Optional[str]]]:
+        """Process files one after the other, yielding (filename, chunk stream, error)"""
+        for filename in filenames:
+            print(f"Processing {filename}...")
+            yield filename, self.iter_file_chunks(filename), None
+
+    def iter_processed_files_parallel(self, filenames: List[str], workers: int,
+                                      pages_per_task: int = 50) -> Iterator[Tuple[str, List[Dict], Optional[str]]]:
+        """Process files across a process pool, yielding (filename, chunks, error) in input order.
+
+        Large files are split into page ranges that are extracted concurrently;
+        the ranges are joined in page order before chunking, so chunk ids and
+        ordering are identical to the sequential path. Files found in the
+        extraction cache skip the pool entirely.
+        """
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Stage 1: queue page-range extraction for every file not in the cache
+            extraction, cached, cached_pages, keys = {}, {}, {}, {}
+            for filename in filenames:
+                file_path = os.path.join(self.input_dir, filename)
+                try:
+                    if self.cache is not None:
+                        keys[filename] = self.cache_keys(file_path)
+                        pages_key, chunks_key, keywords_key = keys[filename]
+                        chunks = self.load_cached_chunks(filename, chunks_key, keywords_key)
+                        if chunks is not None:
+                            print(f"Using cached chunks for {filename}")
+                            cached[filename] = chunks
+                            continue
+                        pages = self.cache.load('pages', pages_key)
+                        if pages is not None:
+                            cached_pages[filename] = pages
+                            continue
+                    page_count = self.count_pages(file_path)
+                except Exception as e:
+                    extraction[filename] = str(e)
+                    continue
+                extraction[filename] = [
+                    executor.submit(self.extract_pages, file_path,
+                                    start, min(start + pages_per_task, page_count))
+                    for start in range(0, page_count, pages_per_task)
+                ]
+
+            # Stage 2: chunk and analyse each file as soon as its pages are in
+            processing, pages_by_file = {}, {}
+            for filename in filenames:
+                if filename in cached or isinstance(extraction.get(filename), str):
+                    continue
+                if filename in cached_pages:
+                    pages = cached_pages[filename]
+                else:
+                    try:
+                        pages = [page for future in extraction[filename] for page in future.result()]
+                    except Exception as e:
+                        extraction[filename] = str(e)
+                        continue
+                    pages_by_file[filename] = pages
+                print(f"Processing {filename}...")
+                processing[filename] = executor.submit(self.process_extracted_pages, filename, pages)
+
+            for filename in filenames:
+                if filename in cached:
+                    yield filename, cached[filename], None
+                    continue
+                if filename not in processing:
+                    yield filename, [], extraction[filename]
+                    continue
                 try:
-                    print(f"Processing {filename}...")
-                    chunks = self.process_single_file(filename)
-                    
-                    if chunks:
-                        all_chunks.extend(chunks)
-                        
-                        # Save individual file chunks
-                        output_file = os.path.join(
-                            self.output_dir, 
-                            f"{filename.replace('.pdf', '_chunks.json')}"
-                        )
-                        with open(output_file, 'w') as f:
-                            json.dump(chunks, f, indent=2)
-                        
-                        # Collect keyword statistics
-                        for chunk in chunks:
-                            for category_group, categories in chunk['keyword_analysis'].items():
-                                for category, findings in categories.items():
-                                    keyword_stats[category_group][category] += len(findings)
-                        
-                        processing_stats['successful_files'] += 1
-                        processing_stats['total_chunks'] += len(chunks)
-                    else:
-                        processing_stats['failed_files'] += 1
-                        
+                    chunks = processing[filename].result()
                 except Exception as e:
-                    print(f"Error processing {filename}: {str(e)}")
+                    yield filename, [], str(e)
+                    continue
+
+                if self.cache is not None:
+                    pages_key, chunks_key, keywords_key = keys[filename]
+                    if filename in pages_by_file:
+                        self.cache.store('pages', pages_key, pages_by_file[filename])
+                    chunks = list(self.store_cached_chunks(chunks, chunks_key, keywords_key))
+                yield filename, chunks, None
+
+    def process_all_files(self, workers: int = 1, pages_per_task: int = 50) -> None:
+        """Process all PDF files with keyword analysis.
+
+        Chunks are streamed straight into the per-file and combined JSON
+        outputs; only chunk ids and contents are kept for the similarity pass.
+        """
+        chunk_ids, texts = [], []
+        processing_stats = defaultdict(int)
+        keyword_stats = defaultdict(lambda: defaultdict(int))
+        failures = {}
+
+        # Sorted so that chunk ordering does not depend on directory listing order
+        filenames = sorted(f for f in os.listdir(self.input_dir) if f.endswith('.pdf'))
+        if workers > 1:
+            results = self.iter_processed_files_parallel(filenames, workers, pages_per_task)
+        else:
+            results = self.iter_processed_files(filenames)
+
+        all_chunks_file = os.path.join(self.output_dir, f"all_chunks{self.CHUNK_FILE_SUFFIX}")
+        with open_chunk_writer(temporary_path(all_chunks_file)) as all_writer:
+            for filename, chunks, error in results:
+                # Save individual file chunks
+                output_file = os.path.join(
+                    self.output_dir,
+                    f"{filename.replace('.pdf', '_chunks' + self.CHUNK_FILE_SUFFIX)}"
+                )
+                checkpoint = all_writer.mark()
+                file_keyword_stats = defaultdict(lambda: defaultdict(int))
+                file_chunks = 0
+
+                if error is None:
+                    try:
+                        with open_chunk_writer(temporary_path(output_file)) as file_writer:
+                            for chunk in chunks:
+                                file_writer.write(chunk)
+                                all_writer.write(chunk)
+                                chunk_ids.append(chunk['chunk_id'])
+                                texts.append(chunk['content'])
+                                file_chunks += 1
+
+                                # Collect keyword statistics
+                                counts = get_keyword_annotations(chunk).counts()
+                                for category_group, categories in counts.items():
+                                    for category, count in categories.items():
+                                        file_keyword_stats[category_group][category] += count
+                    except Exception as e:
+                        error = str(e)
+
+                if error is None and not file_chunks:
+                    print(f"Warning: No text extracted from {filename}")
+                    error = 'No text extracted'
+
+                if error is not None:
+                    # Drop whatever this file had already streamed
+                    print(f"Error processing {filename}: {error}")
+                    all_writer.rollback(checkpoint)
+                    del chunk_ids[checkpoint[1]:], texts[checkpoint[1]:]
+                    if os.path.exists(temporary_path(output_file)):
+                        os.remove(temporary_path(output_file))
                     processing_stats['failed_files'] += 1
-        
-        if all_chunks:
+                    failures[filename] = error
+                    continue
+
+                os.replace(temporary_path(output_file), output_file)
+                for category_group, categories in file_keyword_stats.items():
+                    for category, count in categories.items():
+                        keyword_stats[category_group][category] += count
+
+                processing_stats['successful_files'] += 1
+                processing_stats['total_chunks'] += file_chunks
+
+        if chunk_ids:
+            os.replace(temporary_path(all_chunks_file), all_chunks_file)
+
             # Calculate similarities
             print("Calculating similarities between chunks...")
-            texts = [chunk['content'] for chunk in all_chunks]
-            tfidf_matrix = self.tfidf.fit_transform(texts)
-            similarity_matrix = cosine_similarity(tfidf_matrix)
-            
-            similarities = {}
-            for i, chunk in enumerate(all_chunks):
-                similar_chunks = []
-                for j in np.argsort(similarity_matrix[i])[-4:-1][::-1]:
-                    if i != j and similarity_matrix[i][j] > 0.3:
-                        similar_chunks.append({
-                            'chunk_id': all_chunks[j]['chunk_id'],
-                            'similarity_score': float(similarity_matrix[i][j])
-                        })
-                similarities[chunk['chunk_id']] = similar_chunks
-            
+            similarities = compute_similarities(texts, chunk_ids, self.tfidf)
+
             # Save results
             print("Saving processed data...")
-            with open(os.path.join(self.output_dir, 'all_chunks.json'), 'w') as f:
-                json.dump(all_chunks, f, indent=2)
-            
-            with open(os.path.join(self.output_dir, 'similarities.json'), 'w') as f:
-                json.dump(similarities, f, indent=2)
-        
+            write_similarities(
+                os.path.join(self.output_dir, f"similarities{self.CHUNK_FILE_SUFFIX}"), similarities
+            )
+        else:
+            os.remove(temporary_path(all_chunks_file))
+
         # Save processing statistics with keyword analysis
         stats = {
             'processing_stats': {
                 'total_files': processing_stats['successful_files'] + processing_stats['failed_files'],
                 'successful_files': processing_stats['successful_files'],
                 'failed_files': processing_stats['failed_files'],
-                'total_chunks': processing_stats['total_chunks']
+                'total_chunks': processing_stats['total_chunks'],
+                'failures': failures
             },
             'keyword_stats': keyword_stats
         }
@@ -377,10 +647,10 @@ Generated on: {datetime.now().isoformat()}
         
         report_content += """
 ## Output Files
-- all_chunks.json: Contains all processed text chunks with keyword analysis
-- similarities.json: Cross-reference index of similar chunks
+- all_chunks.jsonl.gz: Contains all processed text chunks with keyword annotations (one JSON object per line)
+- similarities.jsonl.gz: Cross-reference index of similar chunks
 - processing_stats.json: Detailed processing statistics
-- Individual JSON files for each processed document
+- Individual JSON-lines chunk files for each processed document
 
 ## Keyword Categories Analyzed
 1. FINANCIAL_METRICS
@@ -420,8 +690,20 @@ The processed data can be used for:
 
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract, chunk and analyse financial reports")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (1 processes files sequentially)")
+    parser.add_argument('--pages-per-task', type=int, default=50,
+                        help="Pages extracted per task when splitting large files")
+    parser.add_argument('--cache-dir', default="data/cache/extraction",
+                        help="Extraction cache directory")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-extract every report, ignoring the cache")
+    args = parser.parse_args()
+
     processor = EnhancedFinancialReportProcessor(
         input_dir="data/raw/reports",
-        output_dir="data/raw_processed"
+        output_dir="data/raw_processed",
+        cache_dir=None if args.no_cache else args.cache_dir
     )
-    processor.process_all_files()
\ No newline at end of file
+    processor.process_all_files(workers=args.workers, pages_per_task=args.pages_per_task)
\ No newline at end of file
@@ -0,0 +1,450 @@
+# src/pipeline.py
+
+import os
+import json
+import time
+import argparse
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from extraction_cache import file_digest, make_key
+from chunk_io import iter_chunk_file, temporary_path, write_chunk_file, write_similarities
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+RAW_PROCESSED_DIR = os.path.join('data', 'raw_processed')
+PROCESSED_DIR = os.path.join('data', 'processed')
+STATE_FILE = os.path.join('data', 'cache', 'pipeline', 'state.json')
+# Modules pdf_to_text imports, shared by the report and article stages
+TEXT_CODE = ('pdf_to_text.py', 'keyword_engine.py', 'sentence_index.py', 'token_counter.py',
+             'similarity.py', 'extraction_cache.py', 'chunk_io.py')
+
+
+class Stage(ABC):
+    """A pipeline step with declared inputs and outputs.
+
+    A stage is split into partitions (e.g. one per report) that are
+    fingerprinted and re-run independently. Stages depend on each other
+    through their files: a stage runs after every stage producing one of its
+    inputs. Implementations must be picklable, as partitions may run in
+    worker processes.
+    """
+
+    name = ''
+    # Backend modules whose source is part of every partition's fingerprint
+    code: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def partitions(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        """Map partition key -> (input paths, output paths)"""
+
+    def params(self) -> Dict:
+        """Settings that change the outputs"""
+        return {}
+
+    @abstractmethod
+    def run(self, partition: str) -> None:
+        """Produce the outputs of one partition"""
+
+
+class ReportsStage(Stage):
+    """PDF report -> chunk file, one partition per report"""
+
+    name = 'reports'
+    code = TEXT_CODE
+
+    def __init__(self, input_dir: str = os.path.join('data', 'raw', 'reports'),
+                 output_dir: str = RAW_PROCESSED_DIR,
+                 cache_dir: Optional[str] = os.path.join('data', 'cache', 'extraction')):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self._processor = None
+
+    def __getstate__(self) -> Dict:
+        # Worker processes build their own processor
+        return {**self.__dict__, '_processor': None}
+
+    def processor(self):
+        if self._processor is None:
+            from pdf_to_text import EnhancedFinancialReportProcessor
+            self._processor = EnhancedFinancialReportProcessor(self.input_dir, self.output_dir, self.cache_dir)
+        return self._processor
+
+    def output_file(self, filename: str) -> str:
+        processor = self.processor()
+        return os.path.join(self.output_dir, filename.replace('.pdf', '_chunks' + processor.CHUNK_FILE_SUFFIX))
+
+    def partitions(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        if not os.path.isdir(self.input_dir):
+            return {}
+        return {
+            filename: ([os.path.join(self.input_dir, filename)], [self.output_file(filename)])
+            for filename in sorted(os.listdir(self.input_dir)) if filename.endswith('.pdf')
+        }
+
+    def params(self) -> Dict:
+        processor = self.processor()
+        return {
+            'extractor': processor.EXTRACTOR_VERSION,
+            'overlap_sentences': processor.CHUNK_OVERLAP_SENTENCES,
+            **processor.token_counter.params()
+        }
+
+    def run(self, partition: str) -> None:
+        output_file = self.output_file(partition)
+        count = write_chunk_file(temporary_path(output_file), self.processor().iter_file_chunks(partition))
+        if not count:
+            os.remove(temporary_path(output_file))
+            raise ValueError(f"No text extracted from {partition}")
+        os.replace(temporary_path(output_file), output_file)
+
+
+class ArticlesStage(Stage):
+    """News articles -> one append-only chunk file (only new articles are processed)"""
+
+    name = 'articles'
+    code = ('articles_to_text.py',) + TEXT_CODE
+
+    def __init__(self, articles_dir: str = 'articles',
+                 output_file: str = os.path.join(RAW_PROCESSED_DIR, 'articles_chunks.jsonl.gz')):
+        self.articles_dir = articles_dir
+        self.output_file = output_file
+
+    def partitions(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        if not os.path.isdir(self.articles_dir):
+            return {}
+        inputs = [os.path.join(self.articles_dir, name)
+                  for name in sorted(os.listdir(self.articles_dir)) if name.endswith('.txt')]
+        return {'articles': (inputs, [self.output_file])}
+
+    def run(self, partition: str) -> None:
+        from articles_to_text import IncrementalArticleIngestor
+        IncrementalArticleIngestor(self.articles_dir, self.output_file).ingest()
+
+
+class PortfolioStage(Stage):
+    """Portfolio weights description -> one chunk file"""
+
+    name = 'portfolio'
+    code = ('portfolio_to_text.py', 'chunk_io.py')
+
+    def __init__(self, output_file: str = os.path.join(RAW_PROCESSED_DIR, 'portfolio_chunks.jsonl.gz')):
+        self.output_file = output_file
+
+    def partitions(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        return {'portfolio': ([os.path.join(BACKEND_DIR, 'config.py')], [self.output_file])}
+
+    def run(self, partition: str) -> None:
+        from portfolio_to_text import create_portfolio_weights_chunk
+        write_chunk_file(self.output_file, [create_portfolio_weights_chunk()])
+
+
+class MergeStage(Stage):
+    """Chunk files of the source stages -> all_chunks and the similarity index"""
+
+    name = 'merge'
+    code = ('similarity.py', 'chunk_io.py')
+
+    def __init__(self, sources: Iterable[Stage], output_dir: str = RAW_PROCESSED_DIR):
+        self.sources = list(sources)
+        self.all_chunks_file = os.path.join(output_dir, 'all_chunks.jsonl.gz')
+        self.similarities_file = os.path.join(output_dir, 'similarities.jsonl.gz')
+        self.graph_dir = os.path.join(output_dir, 'similarity_graph')
+
+    def inputs(self) -> List[str]:
+        return [path for stage in self.sources
+                for _, outputs in stage.partitions().values() for path in outputs]
+
+    def partitions(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        return {'all': (self.inputs(), [self.all_chunks_file, self.similarities_file])}
+
+    def run(self, partition: str) -> None:
+        from similarity import SimilarityGraph
+
+        chunk_ids, texts = [], []
+
+        def chunks():
+            for path in self.inputs():
+                for chunk in iter_chunk_file(path):
+                    chunk_ids.append(chunk['chunk_id'])
+                    texts.append(chunk['content'])
+                    yield chunk
+
+        write_chunk_file(temporary_path(self.all_chunks_file), chunks())
+        os.replace(temporary_path(self.all_chunks_file), self.all_chunks_file)
+        # Only chunks that are new since the last run are scored
+        graph = SimilarityGraph(self.graph_dir)
+        print(f"[{self.name}] similarity graph {graph.sync(chunk_ids, texts)}")
+        write_similarities(self.similarities_file, graph.similarities())
+
+
+class EmbeddingsStage(Stage):
+    """all_chunks -> chunk embeddings"""
+
+    name = 'embeddings'
+    code = ('generate_embeddings.py', 'chunk_io.py')
+
+    def __init__(self, input_file: str = os.path.join(RAW_PROCESSED_DIR, 'all_chunks.jsonl.gz'),
+                 output_file: str = os.path.join(PROCESSED_DIR, 'chunks_with_embeddings.pkl'),
+                 model_name: str = 'all-MiniLM-L6-v2'):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.model_name = model_name
+
+    def partitions(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        sample_file = self.output_file.replace('.pkl', '_sample.json')
+        return {'all': ([self.input_file], [self.output_file, sample_file])}
+
+    def params(self) -> Dict:
+        return {'model_name': self.model_name}
+
+    def run(self, partition: str) -> None:
+        from generate_embeddings import EmbeddingsGenerator
+        EmbeddingsGenerator(self.model_name).process_chunks(self.input_file, self.output_file)
+
+
+class IndexStage(Stage):
+    """Chunk embeddings -> published FAISS index snapshot"""
+
+    name = 'index'
+    code = ('build_vector_db.py', 'index_snapshots.py')
+
+    def partitions(self) -> Dict[str, Tuple[List[str], List[str]]]:
+        inputs = [os.path.join(PROCESSED_DIR, 'chunks_with_embeddings.pkl'),
+                  os.path.join(PROCESSED_DIR, 'chunks_with_embeddings_sample.json')]
+        return {'all': (inputs, [os.path.join(PROCESSED_DIR, 'CURRENT')])}
+
+    def run(self, partition: str) -> None:
+        from build_vector_db import main as build_vector_db
+        build_vector_db()
+
+
+def default_stages(cache_dir: Optional[str] = os.path.join('data', 'cache', 'extraction')) -> List[Stage]:
+    """The knowledge-base ingestion pipeline"""
+    sources = [ReportsStage(cache_dir=cache_dir), ArticlesStage(), PortfolioStage()]
+    return sources + [MergeStage(sources), EmbeddingsStage(), IndexStage()]
+
+
+def run_partition(stage: Stage, partition: str) -> float:
+    """Run one partition, returning its wall time in seconds"""
+    start = time.perf_counter()
+    stage.run(partition)
+    return time.perf_counter() - start
+
+
+class PipelineRunner:
+    """Run the stale stages and partitions of a pipeline.
+
+    A partition is stale when its fingerprint (inputs, stage code and
+    parameters) differs from the last successful run, or when its outputs are
+    missing or were modified since. File digests are cached by size and
+    mtime, so unchanged inputs are not re-hashed on every run. Partitions
+    whose upstream stages are done run concurrently on a process pool.
+    """
+
+    def __init__(self, stages: List[Stage], state_file: str = STATE_FILE, workers: int = 1):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.workers = workers
+        self.state = self.load_state()
+
+    def load_state(self) -> Dict:
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {'files': {}, 'stages': {}}
+
+    def save_state(self) -> None:
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def digest(self, path: str) -> Optional[str]:
+        """Content digest of a file (None if missing), re-hashed only when its size or mtime change"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        entry = self.state['files'].get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        sha256 = file_digest(path)
+        self.state['files'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        return sha256
+
+    def fingerprint(self, stage: Stage, inputs: List[str]) -> str:
+        code = {name: self.digest(os.path.join(BACKEND_DIR, name)) for name in stage.code}
+        return make_key({path: self.digest(path) for path in inputs}, code, stage.params())
+
+    def is_stale(self, stage: Stage, partition: str, inputs: List[str], outputs: List[str]) -> bool:
+        record = self.state['stages'].get(stage.name, {}).get(partition)
+        if record is None or record['fingerprint'] != self.fingerprint(stage, inputs):
+            return True
+        return any(self.digest(path) != record['outputs'].get(path) for path in outputs)
+
+    def dependencies(self, plan: Dict[str, Dict]) -> Dict[str, Set[str]]:
+        """Stages whose outputs each stage reads"""
+        producers = {
+            path: name for name, partitions in plan.items()
+            for _, outputs in partitions.values() for path in outputs
+        }
+        return {
+            name: {producers[path] for inputs, _ in partitions.values()
+                   for path in inputs if producers.get(path, name) != name}
+            for name, partitions in plan.items()
+        }
+
+    def remove_orphans(self, stage: Stage, partitions: Dict) -> None:
+        """Forget partitions whose source is gone and delete their outputs"""
+        records = self.state['stages'].setdefault(stage.name, {})
+        for partition in [p for p in records if p not in partitions]:
+            print(f"[{stage.name}] removing outputs of {partition}")
+            for path in records.pop(partition)['outputs']:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def submit(self, executor: Optional[ProcessPoolExecutor], stage: Stage, partition: str) -> Future:
+        if executor is not None:
+            return executor.submit(run_partition, stage, partition)
+        # Sequential runs happen inline, wrapped in a completed future
+        future = Future()
+        try:
+            future.set_result(run_partition(stage, partition))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, force: Iterable[str] = (), dry_run: bool = False) -> Dict[str, Dict]:
+        """Bring every stage up to date, returning per-stage timings"""
+        force = set(force)
+        plan = {name: stage.partitions() for name, stage in self.stages.items()}
+        dependencies = self.dependencies(plan)
+        summary = {name: {'run': 0, 'skipped': 0, 'failed': 0, 'seconds': 0.0, 'wall_seconds': 0.0}
+                   for name in self.stages}
+
+        if dry_run:
+            self.print_plan(plan, dependencies, force)
+            return summary
+
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        pending = set(self.stages)
+        stage_start, remaining, failed_stages = {}, {}, set()
+        futures = {}
+        run_start = time.perf_counter()
+        try:
+            while pending or futures:
+                # Start every stage whose upstream stages have finished (stages with
+                # nothing stale finish at once and may unblock others in turn)
+                while True:
+                    ready = [n for n in self.stages if n in pending and not dependencies[n] & (pending | set(remaining))]
+                    if not ready:
+                        break
+                    for name in ready:
+                        pending.discard(name)
+                        stage = self.stages[name]
+                        if dependencies[name] & failed_stages:
+                            print(f"[{name}] skipped: upstream stage failed")
+                            failed_stages.add(name)
+                            continue
+                        self.remove_orphans(stage, plan[name])
+                        stage_start[name] = time.perf_counter()
+                        remaining[name] = 0
+                        for partition, (inputs, outputs) in plan[name].items():
+                            if name not in force and not self.is_stale(stage, partition, inputs, outputs):
+                                summary[name]['skipped'] += 1
+                                continue
+                            print(f"[{name}] running {partition}")
+                            remaining[name] += 1
+                            futures[self.submit(executor, stage, partition)] = (name, partition)
+                        self.finish_stage(name, remaining, stage_start, summary)
+
+                if not futures:
+                    if pending and not remaining:
+                        raise ValueError(f"Stages depend on each other: {', '.join(sorted(pending))}")
+                    continue
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, partition = futures.pop(future)
+                    inputs, outputs = plan[name][partition]
+                    stage = self.stages[name]
+                    try:
+                        seconds = future.result()
+                        missing = [path for path in outputs if not os.path.exists(path)]
+                        if missing:
+                            raise FileNotFoundError(f"outputs not produced: {', '.join(missing)}")
+                    except Exception as e:
+                        print(f"[{name}] {partition} failed: {e}")
+                        summary[name]['failed'] += 1
+                        failed_stages.add(name)
+                        self.state['stages'][name].pop(partition, None)
+                    else:
+                        summary[name]['run'] += 1
+                        summary[name]['seconds'] += seconds
+                        self.state['stages'][name][partition] = {
+                            'fingerprint': self.fingerprint(stage, inputs),
+                            'outputs': {path: self.digest(path) for path in outputs},
+                            'seconds': round(seconds, 3)
+                        }
+                    self.save_state()
+                    remaining[name] -= 1
+                    self.finish_stage(name, remaining, stage_start, summary)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self.save_state()
+
+        self.print_summary(summary, time.perf_counter() - run_start)
+        return summary
+
+    def finish_stage(self, name: str, remaining: Dict[str, int], stage_start: Dict[str, float],
+                     summary: Dict[str, Dict]) -> None:
+        if remaining.get(name) == 0:
+            del remaining[name]
+            summary[name]['wall_seconds'] = time.perf_counter() - stage_start[name]
+
+    def print_plan(self, plan: Dict[str, Dict], dependencies: Dict[str, Set[str]], force: Set[str]) -> None:
+        """Show what a run would do; anything downstream of a stale stage counts as stale"""
+        stale_stages = set()
+        for name, stage in self.stages.items():
+            upstream_stale = bool(dependencies[name] & stale_stages)
+            stale = [
+                partition for partition, (inputs, outputs) in plan[name].items()
+                if upstream_stale or name in force or self.is_stale(stage, partition, inputs, outputs)
+            ]
+            if stale:
+                stale_stages.add(name)
+            print(f"{name}: {len(stale)} of {len(plan[name])} partitions stale"
+                  + (f" ({', '.join(stale)})" if stale and len(plan[name]) > 1 else ""))
+
+    def print_summary(self, summary: Dict[str, Dict], total_seconds: float) -> None:
+        print("\nPipeline Summary:")
+        print(f"{'stage':<12}{'run':>6}{'skipped':>9}{'failed':>8}{'work s':>10}{'wall s':>10}")
+        for name, stats in summary.items():
+            print(f"{name:<12}{stats['run']:>6}{stats['skipped']:>9}{stats['failed']:>8}"
+                  f"{stats['seconds']:>10.2f}{stats['wall_seconds']:>10.2f}")
+        print(f"Total wall time: {total_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stale stages of the ingestion pipeline")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for independent partitions (1 runs everything inline)")
+    parser.add_argument('--force', nargs='*', default=[], metavar='STAGE',
+                        help="Re-run these stages even if they are up to date")
+    parser.add_argument('--dry-run', action='store_true', help="Only report which partitions are stale")
+    parser.add_argument('--state-file', default=STATE_FILE, help="Where fingerprints are recorded")
+    parser.add_argument('--no-cache', action='store_true', help="Bypass the PDF extraction cache")
+    args = parser.parse_args()
+
+    stages = default_stages(cache_dir=None if args.no_cache else os.path.join('data', 'cache', 'extraction'))
+    unknown = set(args.force) - {stage.name for stage in stages}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    runner = PipelineRunner(stages, state_file=args.state_file, workers=args.workers)
+    summary = runner.run(force=args.force, dry_run=args.dry_run)
+    if any(stats['failed'] for stats in summary.values()):
+        raise SystemExit(1)
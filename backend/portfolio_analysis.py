@@ -4,8 +4,8 @@ import pandas as pd
 import numpy as np
 from config import PORTFOLIO_WEIGHTS
 
-def calculate_portfolio_metrics(returns_df):
-    """Calculate main portfolio metrics"""
+def calculate_portfolio_metrics(returns_df, periods_per_year=252):
+    """Calculate main portfolio metrics; `periods_per_year` is 252 for daily bars"""
     # Verify which stocks we have data for
     available_stocks = set(returns_df.columns)
     portfolio_stocks = set(PORTFOLIO_WEIGHTS.keys())
@@ -32,9 +32,9 @@ def calculate_portfolio_metrics(returns_df):
     # Calculate metrics
     metrics = {
         'Total Return': (1 + portfolio_returns).prod() - 1,
-        'Annual Return': portfolio_returns.mean() * 252,
-        'Annual Volatility': portfolio_returns.std() * np.sqrt(252),
-        'Sharpe Ratio': (portfolio_returns.mean() * 252) / (portfolio_returns.std() * np.sqrt(252)),
+        'Annual Return': portfolio_returns.mean() * periods_per_year,
+        'Annual Volatility': portfolio_returns.std() * np.sqrt(periods_per_year),
+        'Sharpe Ratio': (portfolio_returns.mean() * periods_per_year) / (portfolio_returns.std() * np.sqrt(periods_per_year)),
         'Max Drawdown': calculate_max_drawdown(portfolio_returns)
     }
 
@@ -1,40 +1,70 @@
+import os
 import json
 from datetime import datetime
 from collections import defaultdict
 import re
+from chunk_io import (
+    is_jsonl, legacy_path, open_chunk_writer, read_chunk_file, write_chunk_file
+)
+from config import PORTFOLIO_WEIGHTS, STOCKS
 
-def create_portfolio_weights_chunk():
-    # Portfolio description with keywords for better RAG matching
-    content = """
-    Portfolio Asset Allocation and Weights Distribution Analysis
-    
-    The investment portfolio follows a balanced sector allocation strategy across Swiss and Global markets. 
-    The total portfolio allocation equals 100% (1.0) distributed across multiple sectors and companies:
+# Company names for the portfolio description; tickers missing here are shown as is
+COMPANY_NAMES = {
+    'UBSG.SW': 'UBS Group',
+    'ABBN.SW': 'ABB Group',
+    'SCHN.SW': 'Schindler',
+    'NESN.SW': 'Nestlé',
+    'ROG.SW': 'Roche',
+    'NOVN.SW': 'Novartis',
+    'AAPL': 'Apple Inc.',
+    'MSFT': 'Microsoft Corporation',
+    'GOOGL': 'Alphabet Inc.',
+    'BLK': 'BlackRock Inc.',
+    'JPM': 'JP Morgan Chase',
+    'GS': 'Goldman Sachs Group',
+}
 
-    Swiss Banking & Finance Sector (10%):
-    - UBS Group (UBSG.SW): 10% allocation
-    
-    Swiss Technology Sector (15%):
-    - ABB Group (ABBN.SW): 7.5% allocation
-    - Schindler (SCHN.SW): 7.5% allocation
-    
-    Swiss Healthcare & Consumer Sector (25%):
-    - Nestlé (NESN.SW): 10% allocation
-    - Roche (ROG.SW): 7.5% allocation
-    - Novartis (NOVN.SW): 7.5% allocation
-    
-    Global Technology Sector (25%):
-    - Apple Inc. (AAPL): 10% allocation
-    - Microsoft Corporation (MSFT): 7.5% allocation
-    - Alphabet Inc. (GOOGL): 7.5% allocation
-    
-    Global Finance Sector (25%):
-    - BlackRock Inc. (BLK): 10% allocation
-    - JP Morgan Chase (JPM): 7.5% allocation
-    - Goldman Sachs Group (GS): 7.5% allocation
 
-    This allocation strategy maintains a balanced exposure across sectors while emphasizing both Swiss and global market opportunities. The portfolio construction focuses on blue-chip companies with strong market positions in their respective sectors.
-    """
+def format_weight(weight: float) -> str:
+    return f"{round(weight * 100, 4):g}%"
+
+
+def portfolio_sectors():
+    """Sector -> {ticker: weight} of the configured portfolio, in STOCKS order"""
+    sectors = {}
+    for sector, tickers in STOCKS.items():
+        stocks = {ticker: PORTFOLIO_WEIGHTS[ticker] for ticker in tickers if PORTFOLIO_WEIGHTS.get(ticker)}
+        if stocks:
+            sectors[sector] = stocks
+    listed = {ticker for stocks in sectors.values() for ticker in stocks}
+    others = {ticker: weight for ticker, weight in PORTFOLIO_WEIGHTS.items() if weight and ticker not in listed}
+    if others:
+        sectors['Other'] = others
+    return sectors
+
+
+def create_portfolio_weights_chunk():
+    # Portfolio description with keywords for better RAG matching, generated from config
+    sectors = portfolio_sectors()
+    total_weight = sum(PORTFOLIO_WEIGHTS.values())
+    lines = [
+        "Portfolio Asset Allocation and Weights Distribution Analysis",
+        "",
+        "The investment portfolio follows a balanced sector allocation strategy across Swiss and Global markets.",
+        f"The total portfolio allocation equals {format_weight(total_weight)} ({round(total_weight, 6)}) "
+        "distributed across multiple sectors and companies:",
+    ]
+    for sector, stocks in sectors.items():
+        lines += ["", f"{sector} Sector ({format_weight(sum(stocks.values()))}):"]
+        lines += [f"- {COMPANY_NAMES.get(ticker, ticker)} ({ticker}): {format_weight(weight)} allocation"
+                  for ticker, weight in stocks.items()]
+    lines += [
+        "",
+        "This allocation strategy maintains a balanced exposure across sectors while emphasizing both Swiss "
+        "and global market opportunities. The portfolio construction focuses on blue-chip companies with "
+        "strong market positions in their respective sectors.",
+    ]
+    content = "\n".join(lines)
 
     # Create chunk with the same structure as your previous chunks
     chunk = {
@@ -79,35 +109,29 @@ def create_portfolio_weights_chunk():
         "processing_date": datetime.now().isoformat(),
         "portfolio_weights": {
             "sectors": {
-                "Swiss Banking & Finance": {
-                    "weight": 0.10,
-                    "stocks": {"UBSG.SW": 0.10}
-                },
-                "Swiss Technology": {
-                    "weight": 0.15,
-                    "stocks": {"ABBN.SW": 0.075, "SCHN.SW": 0.075}
-                },
-                "Swiss Healthcare & Consumer": {
-                    "weight": 0.25,
-                    "stocks": {"NESN.SW": 0.10, "ROG.SW": 0.075, "NOVN.SW": 0.075}
-                },
-                "Global Technology": {
-                    "weight": 0.25,
-                    "stocks": {"AAPL": 0.10, "MSFT": 0.075, "GOOGL": 0.075}
-                },
-                "Global Finance": {
-                    "weight": 0.25,
-                    "stocks": {"BLK": 0.10, "JPM": 0.075, "GS": 0.075}
+                sector: {
+                    "weight": round(sum(stocks.values()), 6),
+                    "stocks": dict(stocks)
                 }
+                for sector, stocks in sectors.items()
             },
-            "total_weight": 1.0
+            "total_weight": round(total_weight, 6)
         }
     }
 
     return chunk
 
-def add_chunk_to_existing_file(new_chunk, file_path='data/raw_processed/all_chunks.json'):
+def add_chunk_to_existing_file(new_chunk, file_path='data/raw_processed/all_chunks.jsonl.gz'):
     try:
+        if is_jsonl(file_path):
+            # Line-delimited files are appended to without reading them
+            if not os.path.exists(file_path) and os.path.exists(legacy_path(file_path)):
+                write_chunk_file(file_path, read_chunk_file(legacy_path(file_path)))
+            with open_chunk_writer(file_path, append=True) as writer:
+                writer.write(new_chunk)
+            print(f"Successfully added portfolio weights chunk to {file_path}")
+            return
+
         # Read existing chunks
         with open(file_path, 'r') as f:
             chunks = json.load(f)
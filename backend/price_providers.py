@@ -0,0 +1,161 @@
+# src/price_providers.py
+
+import time
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+
+
+class PriceProvider(ABC):
+    """Source of daily adjusted close prices.
+
+    `fetch` returns a DataFrame indexed by date with one column per ticker,
+    covering `start <= date < end`; tickers without data may be missing or
+    all NaN.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def fetch(self, tickers: Sequence[str], start, end) -> pd.DataFrame:
+        """Adjusted closes of `tickers`; raises if any ticker could not be fetched"""
+
+
+class YahooPriceProvider(PriceProvider):
+    """Prices from Yahoo Finance through yfinance.
+
+    Each ticker is fetched with its own `yf.Ticker(...).history` call, which
+    raises its own errors instead of going through the module-wide result
+    and error dicts of `yf.download`. Calls share no state, so the provider
+    is safe to run from ParallelPriceProvider's worker threads.
+    """
+
+    name = 'yahoo'
+
+    def fetch_ticker(self, ticker: str, start, end) -> pd.Series:
+        import yfinance as yf
+
+        try:
+            df = yf.Ticker(ticker).history(
+                start=pd.Timestamp(start).strftime('%Y-%m-%d'),
+                end=pd.Timestamp(end).strftime('%Y-%m-%d'),
+                auto_adjust=False,
+                raise_errors=True
+            )
+        except Exception as e:
+            # An empty window (weekend, holiday, nothing new yet) is not an error
+            if 'no data found' in str(e).lower() or 'no price data found' in str(e).lower():
+                return pd.Series(index=pd.DatetimeIndex([]), dtype='float64', name=ticker)
+            raise
+        if df.empty:
+            return pd.Series(index=pd.DatetimeIndex([]), dtype='float64', name=ticker)
+        prices = df['Adj Close'].rename(ticker)
+        # Exchange-local dates, so tickers of different exchanges align
+        prices.index = pd.DatetimeIndex(prices.index).tz_localize(None).normalize().as_unit('ns')
+        return prices
+
+    def fetch(self, tickers: Sequence[str], start, end) -> pd.DataFrame:
+        tickers = list(tickers)
+        print(f"Fetching market data for {len(tickers)} tickers from {pd.Timestamp(start).date()}...")
+        series, errors = [], {}
+        for ticker in tickers:
+            try:
+                series.append(self.fetch_ticker(ticker, start, end))
+            except Exception as e:
+                errors[ticker] = e
+        if errors:
+            raise RuntimeError(f"Download failed for {sorted(errors)}: {next(iter(errors.values()))}")
+
+        prices_df = pd.concat(series, axis=1).sort_index()
+        prices_df.index.name = 'Date'
+        return prices_df.reindex(columns=tickers)
+
+
+class RateLimiter:
+    """Spaces request starts at least 1 / `rate` seconds apart across threads"""
+
+    def __init__(self, rate: Optional[float] = None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class ParallelPriceProvider(PriceProvider):
+    """Fetches tickers in parallel batches through another provider.
+
+    Tickers are split into batches of `batch_size` and fetched by at most
+    `workers` threads, with request starts rate limited to `rate` per
+    second. A failing batch is retried with exponential backoff; if it keeps
+    failing it is split into single-ticker requests (each retried too), so
+    one bad ticker only costs itself. Tickers that still fail are left out
+    of the result and reported in `failures` (ticker -> error message) for
+    the last call.
+    """
+
+    def __init__(self, provider: PriceProvider, batch_size: int = 20, workers: int = 4,
+                 retries: int = 2, backoff: float = 1.0, rate: Optional[float] = None):
+        self.provider = provider
+        self.name = f'parallel-{provider.name}'
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(rate)
+        self.failures: Dict[str, str] = {}
+
+    def _attempt(self, tickers: List[str], start, end) -> pd.DataFrame:
+        """One request with retries; raises the last error"""
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait()
+            try:
+                return self.provider.fetch(tickers, start, end)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _fetch_batch(self, tickers: List[str], start, end) -> Tuple[List[pd.DataFrame], Dict[str, str]]:
+        try:
+            return [self._attempt(tickers, start, end)], {}
+        except Exception as e:
+            if len(tickers) == 1:
+                return [], {tickers[0]: str(e)}
+
+        frames, failures = [], {}
+        for ticker in tickers:
+            try:
+                frames.append(self._attempt([ticker], start, end))
+            except Exception as e:
+                failures[ticker] = str(e)
+        return frames, failures
+
+    def fetch(self, tickers: Sequence[str], start, end) -> pd.DataFrame:
+        tickers = list(tickers)
+        batches = [tickers[i:i + self.batch_size] for i in range(0, len(tickers), self.batch_size)]
+        frames, failures = [], {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches) or 1)) as executor:
+            for batch_frames, batch_failures in executor.map(
+                lambda batch: self._fetch_batch(batch, start, end), batches
+            ):
+                frames.extend(frame for frame in batch_frames if not frame.empty)
+                failures.update(batch_failures)
+
+        self.failures = failures
+        for ticker, error in failures.items():
+            print(f"Failed to fetch {ticker}: {error}")
+        if not frames:
+            return pd.DataFrame()
+        prices_df = pd.concat(frames, axis=1).sort_index()
+        return prices_df.reindex(columns=[ticker for ticker in tickers if ticker in prices_df.columns])
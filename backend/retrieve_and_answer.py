@@ -9,17 +9,26 @@ from backend.utils import (
     construct_prompt,
     generate_answer
 )
+from backend.index_snapshots import IndexSnapshotStore
+
+# Shared across requests so the live and previous snapshots stay loaded
+snapshot_store = IndexSnapshotStore(os.path.join('data', 'processed'))
+
+def load_index_and_metadata():
+    """Load the live index snapshot, falling back to the legacy unversioned files."""
+    if snapshot_store.current_version() is not None:
+        index, df, _ = snapshot_store.get_current()
+        return index, df
+
+    index_file = os.path.join('data', 'processed', 'faiss_index.bin')
+    metadata_file = os.path.join('data', 'processed', 'chunks_metadata.pkl')
+    return load_faiss_index(index_file), load_metadata(metadata_file)
 
 def retrieve_and_answer(query, top_k=10, model='gpt-3.5-turbo'):
     try:
-        # Paths
-        index_file = os.path.join('data', 'processed', 'faiss_index.bin')
-        metadata_file = os.path.join('data', 'processed', 'chunks_metadata.pkl')
-
         # Load index and metadata
         print("Loading FAISS index and metadata...")
-        index = load_faiss_index(index_file)
-        df = load_metadata(metadata_file)
+        index, df = load_index_and_metadata()
 
         # Retrieve relevant chunks
         print(f"\nRetrieving top {top_k} relevant chunks...")
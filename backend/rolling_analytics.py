@@ -0,0 +1,204 @@
+# src/rolling_analytics.py
+
+import copy
+from typing import Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Statistics of RollingAnalytics.compute, one frame per window and statistic
+ROLLING_STATS = ('return', 'volatility', 'sharpe', 'beta', 'drawdown', 'max_drawdown')
+
+
+def _cumulative(values: np.ndarray) -> np.ndarray:
+    """Cumulative sum along the rows with a leading zero row"""
+    cumulative = np.zeros((len(values) + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    return cumulative
+
+
+def _window_sums(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """Sums over the trailing `window` rows (fewer at the start) from `_cumulative`"""
+    sums = cumulative[1:].copy()
+    sums[window:] -= cumulative[1:-window]
+    return sums
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing max over `window` rows of every column in O(n).
+
+    Van Herk/Gil-Werman: the rows are cut into blocks of `window`, and the
+    max of a window is the max of a suffix max of one block and a prefix max
+    of the next. That is the monotonic-deque bound (three comparisons per
+    value, independent of the window) with only whole-array NumPy
+    operations, so all columns are done at once. The first `window - 1` rows
+    hold the max of the rows so far; values must not be NaN.
+    """
+    n_rows = len(values)
+    pad = (-n_rows) % window
+    padded = np.concatenate([values, np.full((pad,) + values.shape[1:], -np.inf)])
+    blocks = padded.reshape((-1, window) + values.shape[1:])
+    prefix = np.maximum.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+
+    result = prefix[:n_rows].copy()
+    np.maximum(suffix[:n_rows - window + 1], prefix[window - 1:n_rows], out=result[window - 1:])
+    return result
+
+
+class RollingAnalytics:
+    """Rolling statistics of every column of a returns matrix for many windows.
+
+    Cumulative sums of the returns, their squares and their products with
+    the benchmark are built once; the sums over any window are then one
+    subtraction, so each extra window or statistic costs O(rows x columns)
+    whatever its length. Returns are centered on their column mean before
+    summing, which keeps the differences of large cumulative sums accurate.
+
+    Like pandas `rolling(window)`, a value needs `min_periods` (default: the
+    window) non-NaN returns in its window; beta counts only rows where the
+    benchmark has a return too.
+    """
+
+    def __init__(self, returns_df: pd.DataFrame, benchmark_returns: Optional[pd.Series] = None,
+                 risk_free_rate: float = 0.0, periods_per_year: float = 252):
+        self.returns_df = returns_df
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year
+
+        values = returns_df.to_numpy(dtype='float64')
+        self.valid = ~np.isnan(values)
+        with np.errstate(invalid='ignore'):
+            self.center = np.nanmean(values, axis=0)
+        self.centered = np.where(self.valid, values - self.center, 0.0)
+        self.filled = np.where(self.valid, values, 0.0)
+
+        self._count = _cumulative(self.valid.astype('float64'))
+        self._sum = _cumulative(self.centered)
+        self._squares = _cumulative(self.centered * self.centered)
+
+        self.benchmark = None
+        if benchmark_returns is not None:
+            self.benchmark = benchmark_returns.name
+            benchmark = benchmark_returns.reindex(returns_df.index).to_numpy(dtype='float64')
+            pair = self.valid & ~np.isnan(benchmark)[:, None]
+            centered_benchmark = np.where(pair, (benchmark - np.nanmean(benchmark))[:, None], 0.0)
+            centered = np.where(pair, self.centered, 0.0)
+            self._pair_count = _cumulative(pair.astype('float64'))
+            self._pair_sum = _cumulative(centered)
+            self._benchmark_sum = _cumulative(centered_benchmark)
+            self._benchmark_squares = _cumulative(centered_benchmark * centered_benchmark)
+            self._products = _cumulative(centered * centered_benchmark)
+
+        # Growth of 1 per column; missing returns count as flat periods
+        self.wealth = np.cumprod(1.0 + self.filled, axis=0)
+        # Window sums shared by the statistics of one window, only during `compute`
+        self._cache: Optional[Dict[tuple, object]] = None
+
+    def _cached(self, key: tuple, compute):
+        if self._cache is None:
+            return compute()
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def _frame(self, values: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(values, index=self.returns_df.index, columns=self.returns_df.columns)
+
+    def _moments(self, window: int, min_periods: Optional[int]):
+        return self._cached(('moments', window, min_periods), lambda: self._compute_moments(window, min_periods))
+
+    def _compute_moments(self, window: int, min_periods: Optional[int]):
+        count = _window_sums(self._count, window)
+        total = _window_sums(self._sum, window)
+        squares = _window_sums(self._squares, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            variance = np.maximum(squares - total * mean, 0.0) / (count - 1)
+        enough = count >= (min_periods or window)
+        return np.where(enough, mean + self.center, np.nan), np.where(enough, variance, np.nan)
+
+    def annual_return(self, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        mean, _ = self._moments(window, min_periods)
+        return mean * self.periods_per_year
+
+    def volatility(self, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        _, variance = self._moments(window, min_periods)
+        return np.sqrt(variance * self.periods_per_year)
+
+    def sharpe(self, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        mean, variance = self._moments(window, min_periods)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (mean * self.periods_per_year - self.risk_free_rate) / np.sqrt(variance * self.periods_per_year)
+
+    def beta(self, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        """Covariance with the benchmark over its variance, on the rows both have"""
+        if self.benchmark is None:
+            raise ValueError("Rolling beta needs benchmark returns")
+        count = _window_sums(self._pair_count, window)
+        asset = _window_sums(self._pair_sum, window)
+        benchmark = _window_sums(self._benchmark_sum, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = _window_sums(self._products, window) - asset * benchmark / count
+            variance = _window_sums(self._benchmark_squares, window) - benchmark * benchmark / count
+            beta = covariance / variance
+        return np.where(count >= (min_periods or window), beta, np.nan)
+
+    def drawdown(self, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        """Drawdown from the highest wealth of the trailing window"""
+        return self._cached(('drawdown', window, min_periods), lambda: self._compute_drawdown(window, min_periods))
+
+    def _compute_drawdown(self, window: int, min_periods: Optional[int]) -> np.ndarray:
+        drawdown = self.wealth / rolling_max(self.wealth, window) - 1.0
+        count = _window_sums(self._count, window)
+        return np.where(count >= (min_periods or window), drawdown, np.nan)
+
+    def max_drawdown(self, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        """Worst trailing-window drawdown seen over the last `window` rows"""
+        drawdown = self.drawdown(window, min_periods)
+        available = ~np.isnan(drawdown)
+        worst = -rolling_max(np.where(available, -drawdown, -np.inf), window)
+        enough = _window_sums(_cumulative(available.astype('float64')), window) >= (min_periods or window)
+        return np.where(enough, worst, np.nan)
+
+    def correlation(self, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+        """Pairwise rolling correlation matrices, shape (rows, columns, columns).
+
+        Memory grows with columns squared; meant for portfolio-sized
+        universes, not thousands of assets.
+        """
+        valid = self.valid.astype('float64')
+        x = self.centered
+        pair_valid = valid[:, :, None] * valid[:, None, :]
+        count = _window_sums(_cumulative(pair_valid), window)
+        # Sums of column i over the rows where column j is valid too
+        total = _window_sums(_cumulative(x[:, :, None] * valid[:, None, :]), window)
+        squares = _window_sums(_cumulative((x * x)[:, :, None] * valid[:, None, :]), window)
+        products = _window_sums(_cumulative(x[:, :, None] * x[:, None, :]), window)
+        other = total.transpose(0, 2, 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = products - total * other / count
+            variances = (squares - total * total / count) * (squares.transpose(0, 2, 1) - other * other / count)
+            correlation = covariance / np.sqrt(np.maximum(variances, 0.0))
+        return np.where(count >= (min_periods or window), correlation, np.nan)
+
+    def compute(self, windows: Sequence[int], stats: Sequence[str] = ROLLING_STATS,
+                min_periods: Optional[int] = None) -> Dict[int, Dict[str, pd.DataFrame]]:
+        """`{window: {stat: frame}}` for every requested window and statistic"""
+        methods = {
+            'return': 'annual_return', 'volatility': 'volatility', 'sharpe': 'sharpe',
+            'beta': 'beta', 'drawdown': 'drawdown', 'max_drawdown': 'max_drawdown',
+        }
+        unknown = set(stats) - set(methods)
+        if unknown:
+            raise ValueError(f"Unknown rolling statistics: {sorted(unknown)}")
+        for window in windows:
+            if not 2 <= window <= len(self.returns_df):
+                raise ValueError(f"Window {window} must be between 2 and {len(self.returns_df)} periods")
+        # A private view, so concurrent calls on a shared instance do not share
+        # (or keep alive) each other's window sums
+        view = copy.copy(self)
+        view._cache = {}
+        return {
+            window: {stat: self._frame(getattr(view, methods[stat])(window, min_periods)) for stat in stats}
+            for window in windows
+        }
@@ -0,0 +1,306 @@
+# src/scrape_engine.py
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import argparse
+import threading
+from urllib.parse import urljoin, urlsplit
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
+from scrapper import article_filename, save_article
+
+# Page structure of the Swissquote morning-news listing (see scrapper.scrape_articles)
+DEFAULT_SELECTORS = {
+    'container_class': 'styles_container__zdTXi',
+    'title_class': 'styles_title__1L5aY',
+    'subtitle_class': 'styles_subtitle__NDNZ4',
+    'content_class': 'styles_content__fcopH',
+    # CSS selectors for links to full article pages and to the next listing page
+    'article_link': None,
+    'next_page': 'a[rel="next"]',
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def extract_article(element, selectors: Dict) -> Optional[Dict]:
+    """Title, date text and content of one article container"""
+    title_element = element.find('div', class_=selectors['title_class'])
+    if not title_element:
+        return None
+    date_element = element.find('div', class_=selectors['subtitle_class'])
+    content_element = element.find('div', class_=selectors['content_class'])
+    return {
+        'title': title_element.text.strip(),
+        'date_text': date_element.text.strip() if date_element else '',
+        'content': content_element.text.strip() if content_element else '',
+    }
+
+
+def parse_listing(html: str, base_url: str, selectors: Dict) -> Dict:
+    """Articles shown on a listing page, links to article pages and the next listing page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    articles = [
+        article for article in (
+            extract_article(container, selectors)
+            for container in soup.find_all('div', class_=selectors['container_class'])
+        ) if article is not None
+    ]
+    links = []
+    if selectors.get('article_link'):
+        links = [urljoin(base_url, a['href']) for a in soup.select(selectors['article_link']) if a.get('href')]
+    next_link = soup.select_one(selectors['next_page']) if selectors.get('next_page') else None
+    next_url = urljoin(base_url, next_link['href']) if next_link is not None and next_link.get('href') else None
+    return {'articles': articles, 'links': links, 'next': next_url}
+
+
+def parse_article_page(html: str, selectors: Dict) -> Optional[Dict]:
+    """The article on a full article page"""
+    soup = BeautifulSoup(html, 'html.parser')
+    container = soup.find('div', class_=selectors['container_class']) or soup
+    return extract_article(container, selectors)
+
+
+class HttpCache:
+    """ETag / Last-Modified validators and bodies of previously fetched pages"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_file, 'r') as f:
+                self.index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.index = {}
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.html.gz')
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.index.get(url, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body(self, url: str) -> Optional[str]:
+        try:
+            with gzip.open(self._body_path(url), 'rt', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def store(self, url: str, response: requests.Response) -> None:
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return
+        with gzip.open(self._body_path(url), 'wt', encoding='utf-8') as f:
+            f.write(response.text)
+        with self._lock:
+            self.index[url] = {**self.index.get(url, {}), 'etag': etag, 'last_modified': last_modified}
+
+    def annotate(self, url: str, **fields) -> None:
+        """Attach extra fields to a cached page's entry"""
+        with self._lock:
+            if url in self.index:
+                self.index[url].update(fields)
+
+    def save(self) -> None:
+        with self._lock:
+            tmp_path = f"{self.index_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_path, self.index_file)
+
+
+class Fetcher:
+    """Pooled HTTP client with per-host concurrency limits, retries and conditional GETs"""
+
+    def __init__(self, cache: Optional[HttpCache] = None, per_host_limit: int = 4,
+                 timeout: float = 10.0, retries: int = 3, backoff: float = 0.5,
+                 user_agent: str = 'portfolio-news-scraper/1.0'):
+        self.cache = cache
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                           allowed_methods=frozenset({'GET'}), respect_retry_after_header=True,
+                           raise_on_status=False)
+        self.user_agent = user_agent
+        self._local = threading.local()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+
+    def session(self) -> requests.Session:
+        """One keep-alive session (and connection pool) per worker thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.per_host_limit, max_retries=self.retry)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = self.user_agent
+            self._local.session = session
+        return session
+
+    def host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def fetch(self, url: str) -> Dict:
+        """GET a page; returns {'url', 'status', 'text', 'not_modified', 'seconds'}"""
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        start = time.perf_counter()
+        with self.host_slot(url):
+            response = self.session().get(url, headers=headers, timeout=self.timeout)
+        seconds = time.perf_counter() - start
+
+        if response.status_code == 304 and self.cache is not None:
+            body = self.cache.body(url)
+            if body is not None:
+                return {'url': url, 'status': 304, 'text': body, 'not_modified': True, 'seconds': seconds}
+            # Validators without a body: fetch unconditionally
+            with self.host_slot(url):
+                response = self.session().get(url, timeout=self.timeout)
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.store(url, response)
+        return {'url': url, 'status': response.status_code, 'text': response.text,
+                'not_modified': False, 'seconds': time.perf_counter() - start}
+
+
+class ScrapeEngine:
+    """Crawl listing pages and article pages concurrently and save new articles.
+
+    Pages are fetched on a thread pool (network bound) and parsed on a
+    process pool (BeautifulSoup is CPU bound); the crawl follows each start
+    URL's "next page" links up to `max_pages` listing pages. Articles whose
+    file already exists are not rewritten, and unmodified article pages
+    (HTTP 304) whose file exists are not parsed again. `on_article` is
+    called with the path of every newly saved article as soon as it is written.
+    """
+
+    def __init__(self, output_dir: str, fetcher: Fetcher, selectors: Optional[Dict] = None,
+                 max_pages: int = 5, fetch_workers: int = 8, parse_workers: Optional[int] = None,
+                 on_article: Optional[Callable[[str], None]] = None):
+        self.output_dir = output_dir
+        self.on_article = on_article
+        self.fetcher = fetcher
+        self.selectors = {**DEFAULT_SELECTORS, **(selectors or {})}
+        self.max_pages = max_pages
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+
+    def save(self, article: Dict, stats: Dict) -> None:
+        path = save_article(self.output_dir, article['title'], article['date_text'], article['content'])
+        stats['saved' if path else 'existing'] += 1
+        if path:
+            stats['saved_files'].append(path)
+            if self.on_article is not None:
+                self.on_article(path)
+
+    def crawl(self, start_urls: Iterable[str]) -> Dict:
+        """Crawl from the listing pages in `start_urls`; returns crawl statistics"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stats = {'listing_pages': 0, 'article_pages': 0, 'not_modified': 0, 'saved': 0,
+                 'existing': 0, 'errors': [], 'saved_files': []}
+        start = time.perf_counter()
+        seen = set()
+        # future -> (kind, url, listing page number)
+        pending = {}
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool, \
+                ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool:
+
+            def fetch(url: str, kind: str, page: int = 0) -> None:
+                if url not in seen:
+                    seen.add(url)
+                    pending[fetch_pool.submit(self.fetcher.fetch, url)] = (f'fetch_{kind}', url, page)
+
+            for url in start_urls:
+                fetch(url, 'listing', 1)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, url, page = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Error fetching {url}: {e}")
+                        stats['errors'].append({'url': url, 'error': str(e)})
+                        continue
+
+                    if kind == 'fetch_listing':
+                        stats['listing_pages'] += 1
+                        stats['not_modified'] += result['not_modified']
+                        pending[parse_pool.submit(parse_listing, result['text'], url, self.selectors)] = \
+                            ('parse_listing', url, page)
+                    elif kind == 'fetch_article':
+                        stats['article_pages'] += 1
+                        stats['not_modified'] += result['not_modified']
+                        if result['not_modified'] and self.known_article(url):
+                            continue
+                        pending[parse_pool.submit(parse_article_page, result['text'], self.selectors)] = \
+                            ('parse_article', url, page)
+                    elif kind == 'parse_listing':
+                        for article in result['articles']:
+                            self.save(article, stats)
+                        for link in result['links']:
+                            fetch(link, 'article')
+                        if result['next'] and page < self.max_pages:
+                            fetch(result['next'], 'listing', page + 1)
+                    elif result is not None:
+                        self.save(result, stats)
+                        if self.fetcher.cache is not None:
+                            self.fetcher.cache.annotate(
+                                url, article_file=article_filename(result['title'], result['date_text'])
+                            )
+
+        if self.fetcher.cache is not None:
+            self.fetcher.cache.save()
+        stats['seconds'] = round(time.perf_counter() - start, 3)
+        print(f"Crawled {stats['listing_pages']} listing and {stats['article_pages']} article pages "
+              f"({stats['not_modified']} not modified): {stats['saved']} new articles in {stats['seconds']}s")
+        return stats
+
+    def known_article(self, url: str) -> bool:
+        """Whether an article page was parsed and saved before"""
+        cache = self.fetcher.cache
+        filename = cache.index.get(url, {}).get('article_file') if cache is not None else None
+        return filename is not None and os.path.exists(os.path.join(self.output_dir, filename))
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Crawl news listing pages and save new articles")
+    parser.add_argument('urls', nargs='*',
+                        default=["https://www.swissquote.com/en-ch/private/inspire/expert-insights/morning-news"])
+    parser.add_argument('--output-dir', default=os.path.join(os.path.dirname(script_dir), 'articles'))
+    parser.add_argument('--cache-dir', default=os.path.join('data', 'cache', 'scraper'))
+    parser.add_argument('--max-pages', type=int, default=5, help="Listing pages followed per start URL")
+    parser.add_argument('--article-link', help="CSS selector of links to full article pages")
+    parser.add_argument('--per-host', type=int, default=4, help="Concurrent requests per host")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent fetches")
+    args = parser.parse_args()
+
+    fetcher = Fetcher(HttpCache(args.cache_dir), per_host_limit=args.per_host)
+    selectors = {'article_link': args.article_link} if args.article_link else None
+    engine = ScrapeEngine(args.output_dir, fetcher, selectors, max_pages=args.max_pages, fetch_workers=args.workers)
+    engine.crawl(args.urls)
+
+
+if __name__ == "__main__":
+    main()
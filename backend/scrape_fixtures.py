@@ -0,0 +1,171 @@
+# src/scrape_fixtures.py
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from scrape_engine import DEFAULT_SELECTORS, Fetcher, HttpCache, ScrapeEngine
+
+ARTICLE_LINK = 'a.article-link'
+
+
+class FixtureSite:
+    """Pages served by the fixture server, with failure injection and a request log"""
+
+    def __init__(self, delay: float = 0.0):
+        self.pages: Dict[str, Tuple[str, str, str]] = {}
+        self.failures: Dict[str, int] = {}
+        self.delay = delay
+        self.requests: List[Tuple[str, int]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def add_page(self, path: str, html: str) -> None:
+        etag = f'"{abs(hash(html)):x}"'
+        self.pages[path] = (html, etag, formatdate(time.time(), usegmt=True))
+
+    def fail(self, path: str, times: int = -1) -> None:
+        """Answer `path` with 503 for the next `times` requests (-1: always 500)"""
+        self.failures[path] = times
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    site: FixtureSite = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status: int, body: str = '', headers: Optional[Dict[str, str]] = None) -> None:
+        encoded = body.encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+        with self.site.lock:
+            self.site.requests.append((self.path, status))
+
+    def do_GET(self):
+        site = self.site
+        with site.lock:
+            site.in_flight += 1
+            site.max_in_flight = max(site.max_in_flight, site.in_flight)
+        try:
+            time.sleep(site.delay)
+            remaining = site.failures.get(self.path, 0)
+            if remaining == -1:
+                return self.respond(500, 'broken')
+            if remaining > 0:
+                site.failures[self.path] = remaining - 1
+                return self.respond(503, 'try again', {'Retry-After': '0'})
+            if self.path not in site.pages:
+                return self.respond(404, 'not found')
+
+            html, etag, last_modified = site.pages[self.path]
+            if self.headers.get('If-None-Match') == etag:
+                return self.respond(304)
+            self.respond(200, html, {'ETag': etag, 'Last-Modified': last_modified})
+        finally:
+            with site.lock:
+                site.in_flight -= 1
+
+
+class FixtureServer:
+    """Serve a FixtureSite on localhost from a background thread"""
+
+    def __init__(self, site: FixtureSite):
+        handler = type('Handler', (FixtureHandler,), {'site': site})
+        self.site = site
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'FixtureServer':
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+
+def article_html(number: int) -> str:
+    s = DEFAULT_SELECTORS
+    return (
+        f'<html><body><div class="{s["container_class"]}">'
+        f'<div class="{s["title_class"]}">Company {number} Beats Revenue Expectations</div>'
+        f'<div class="{s["subtitle_class"]}">By Fixture Desk10/{number % 28 + 1:02d}/2024</div>'
+        f'<div class="{s["content_class"]}">Company {number} reported revenue growth and a higher '
+        f'operating margin. Free cash flow improved while net debt declined.</div>'
+        f'</div></body></html>'
+    )
+
+
+def listing_html(page: int, pages: int, per_page: int) -> str:
+    links = ''.join(
+        f'<li><a class="article-link" href="/articles/{number}">Article {number}</a></li>'
+        for number in range((page - 1) * per_page, page * per_page)
+    )
+    next_link = f'<a rel="next" href="/news?page={page + 1}">Next</a>' if page < pages else ''
+    return f'<html><body><ul>{links}</ul>{next_link}</body></html>'
+
+
+def build_site(pages: int = 3, per_page: int = 5, delay: float = 0.0) -> FixtureSite:
+    site = FixtureSite(delay)
+    for page in range(1, pages + 1):
+        site.add_page(f'/news?page={page}', listing_html(page, pages, per_page))
+    for number in range(pages * per_page):
+        site.add_page(f'/articles/{number}', article_html(number))
+    return site
+
+
+def main():
+    """Crawl the fixture site twice and check retries, host limits and conditional GETs"""
+    pages, per_page, per_host_limit = 3, 5, 2
+    site = build_site(pages, per_page, delay=0.05)
+    site.fail('/articles/3', times=2)
+    site.fail('/articles/7')
+    work_dir = tempfile.mkdtemp(prefix='scrape-fixtures-')
+
+    try:
+        with FixtureServer(site) as server:
+            def crawl():
+                fetcher = Fetcher(HttpCache(os.path.join(work_dir, 'cache')), per_host_limit=per_host_limit,
+                                  retries=3, backoff=0.01)
+                engine = ScrapeEngine(os.path.join(work_dir, 'articles'), fetcher,
+                                      {'article_link': ARTICLE_LINK}, max_pages=pages, fetch_workers=8)
+                return engine.crawl([server.url('/news?page=1')])
+
+            first = crawl()
+            assert first['listing_pages'] == pages, first
+            # Article 3 recovers after two 503s, article 7 keeps failing
+            assert first['saved'] == pages * per_page - 1, first
+            assert [error['url'] for error in first['errors']] == [server.url('/articles/7')], first['errors']
+            assert site.max_in_flight <= per_host_limit, site.max_in_flight
+            assert sum(1 for path, status in site.requests if path == '/articles/3' and status == 503) == 2
+
+            site.requests.clear()
+            second = crawl()
+            statuses = [status for path, status in site.requests if path != '/articles/7']
+            assert statuses and all(status == 304 for status in statuses), statuses
+            assert second['saved'] == 0 and second['not_modified'] == len(statuses), second
+
+            print(f"First crawl:  {first['saved']} articles saved in {first['seconds']}s, "
+                  f"max {site.max_in_flight} concurrent requests")
+            print(f"Second crawl: {second['not_modified']} pages not modified, {second['saved']} saved")
+            print("All scraper fixture checks passed")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,34 @@ def parse_date(date_str):
     except (ValueError, AttributeError):
         return "00000000"  # Return placeholder if parsing fails
 
+def article_filename(title, date_text):
+    """File name of a scraped article"""
+    clean_title = clean_filename(title)
+    return f"news_{parse_date(date_text)}_{clean_title[:50]}.txt"  # Limit title length
+
+def save_article(output_dir, title, date_text, content):
+    """Write an article file unless it exists; returns the path written or None"""
+    filename = article_filename(title, date_text)
+    full_path = os.path.join(output_dir, filename)
+
+    # Create content structure with proper formatting
+    article_content = f"""header: {title}
+date: {date_text}
+content: {content}
+"""
+    
+    # Check if file already exists
+    if os.path.exists(full_path):
+        print(f"File already exists, skipping: {filename}")
+        return None
+    
+    # Save to file
+    print(f"Creating file: {filename}")
+    with open(full_path, 'w', encoding='utf-8') as f:
+        f.write(article_content)
+    print(f"Successfully saved: {filename}")
+    return full_path
+
 def scrape_articles(url, output_dir):
     """Scrape articles from the given URL"""
     try:
@@ -48,33 +76,12 @@ def scrape_articles(url, output_dir):
                 # Extract date and author
                 date_element = article.find('div', class_='styles_subtitle__NDNZ4')
                 date_text = date_element.text.strip() if date_element else ''
-                formatted_date = parse_date(date_text)
                 
                 # Extract content
                 content_element = article.find('div', class_='styles_content__fcopH')
                 content = content_element.text.strip() if content_element else ''
                 
-                # Create filename
-                clean_title = clean_filename(title)
-                filename = f"news_{formatted_date}_{clean_title[:50]}.txt"  # Limit title length
-                full_path = os.path.join(output_dir, filename)
-
-                # Create content structure with proper formatting
-                article_content = f"""header: {title}
-date: {date_text}
-content: {content}
-"""
-                
-                # Check if file already exists
-                if os.path.exists(full_path):
-                    print(f"File already exists, skipping: {filename}")
-                    continue
-                
-                # Save to file
-                print(f"Creating file: {filename}")
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    f.write(article_content)
-                print(f"Successfully saved: {filename}")
+                save_article(output_dir, title, date_text, content)
                 
             except Exception as e:
                 print(f"Error processing article: {str(e)}")
@@ -99,7 +106,10 @@ def main():
     
     print("Starting article scraping...")
     print(f"Saving articles to: {articles_dir}")
-    scrape_articles(url, articles_dir)
+    # Concurrent crawler with conditional GETs and retries (scrape_engine.py)
+    from scrape_engine import Fetcher, HttpCache, ScrapeEngine
+    fetcher = Fetcher(HttpCache(os.path.join(project_root, 'data', 'cache', 'scraper')))
+    ScrapeEngine(articles_dir, fetcher).crawl([url])
     print("Scraping completed!")
 
 if __name__ == "__main__":
@@ -0,0 +1,74 @@
+# src/sentence_index.py
+
+import re
+from bisect import bisect_right
+from typing import List, Sequence, Tuple
+
+# Sentence boundary used by the chunkers: whitespace following . ! or ?
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+
+class SentenceIndex:
+    """Sentence boundary offsets of one text.
+
+    Offsets are computed once per text; each lookup is a binary search over the
+    sentence start offsets instead of a re-split of the whole text.
+    """
+
+    def __init__(self, text: str, starts: List[int], ends: List[int]):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_text(cls, text: str) -> 'SentenceIndex':
+        """Index sentences by scanning the text for boundaries once"""
+        starts, ends = [0], []
+        for match in SENTENCE_BREAK.finditer(text):
+            ends.append(match.start())
+            starts.append(match.end())
+        ends.append(len(text))
+        return cls._stripped(text, starts, ends)
+
+    @classmethod
+    def from_sentences(cls, sentences: Sequence[str], separator: str = ' ') -> 'SentenceIndex':
+        """Index the text `separator.join(sentences)` without rescanning it"""
+        text = separator.join(sentences)
+        starts, ends = [], []
+        offset = 0
+        for sentence in sentences:
+            starts.append(offset)
+            offset += len(sentence)
+            ends.append(offset)
+            offset += len(separator)
+        return cls._stripped(text, starts, ends)
+
+    @classmethod
+    def _stripped(cls, text: str, starts: List[int], ends: List[int]) -> 'SentenceIndex':
+        """Trim surrounding whitespace from every span"""
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            starts[i], ends[i] = start, end
+        return cls(text, starts, ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def locate(self, position: int) -> int:
+        """Index of the sentence containing `position` (whitespace belongs to the sentence before it)"""
+        return max(0, bisect_right(self.starts, position) - 1)
+
+    def span_at(self, position: int) -> Tuple[int, int]:
+        """Exact (start, end) offsets of the sentence containing `position`"""
+        if not self.starts:
+            return 0, 0
+        i = self.locate(position)
+        return self.starts[i], self.ends[i]
+
+    def sentence_at(self, position: int) -> str:
+        """Text of the sentence containing `position`"""
+        start, end = self.span_at(position)
+        return self.text[start:end]
@@ -0,0 +1,272 @@
+# src/similarity.py
+
+import os
+import json
+import pickle
+import hashlib
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+
+# Memory for one block of dense float64 scores; sizes blocks to the corpus
+SCORE_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def score_block_rows(n_columns: int, block_size: Optional[int] = None) -> int:
+    """Rows per block: `block_size` if given, else as many as fit in SCORE_BLOCK_BYTES"""
+    if block_size:
+        return block_size
+    return max(1, SCORE_BLOCK_BYTES // (8 * max(1, n_columns)))
+
+
+def default_vectorizer() -> TfidfVectorizer:
+    """TF-IDF settings shared by the report and article processors"""
+    return TfidfVectorizer(max_features=1000, stop_words='english', ngram_range=(1, 2))
+
+
+def top_k_arrays(vectors, top_k: int = 3, min_score: float = 0.3,
+                 block_size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k cosine neighbours of every row of a normalized vector matrix.
+
+    Rows are compared block by block (`block_size` x N scores at a time) and
+    the best `top_k` per row are picked with `argpartition`, so memory stays
+    O(block_size * N + N * k) instead of a dense N x N matrix. By default the
+    block holds SCORE_BLOCK_BYTES of scores whatever N is. Returns
+    (indices, scores) arrays of shape N x top_k, best first; slots without a
+    neighbour above `min_score` hold index -1.
+    """
+    transposed = vectors.T.tocsr() if sparse.issparse(vectors) else vectors.T
+    n_rows = vectors.shape[0]
+    k = min(top_k, n_rows - 1)
+    block_size = score_block_rows(n_rows, block_size)
+
+    indices = np.full((n_rows, top_k), -1, dtype=np.int64)
+    neighbour_scores = np.zeros((n_rows, top_k))
+    if k <= 0:
+        return indices, neighbour_scores
+
+    for block_start in range(0, n_rows, block_size):
+        block_stop = min(block_start + block_size, n_rows)
+        scores = vectors[block_start:block_stop] @ transposed
+        scores = scores.toarray() if sparse.issparse(scores) else np.asarray(scores)
+
+        # A chunk is never its own neighbour
+        rows = np.arange(block_stop - block_start)
+        scores[rows, rows + block_start] = -np.inf
+
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        candidate_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+        keep = candidate_scores > min_score
+        indices[block_start:block_stop, :k] = np.where(keep, candidates, -1)
+        neighbour_scores[block_start:block_stop, :k] = np.where(keep, candidate_scores, 0.0)
+
+    return indices, neighbour_scores
+
+
+def neighbour_lists(indices: np.ndarray, scores: np.ndarray,
+                    chunk_ids: Sequence[str]) -> Dict[str, List[Dict]]:
+    """Format neighbour arrays as the `similarities.json` mapping"""
+    return {
+        chunk_id: [
+            {'chunk_id': chunk_ids[j], 'similarity_score': float(score)}
+            for j, score in zip(row_indices, row_scores) if j >= 0
+        ]
+        for chunk_id, row_indices, row_scores in zip(chunk_ids, indices, scores)
+    }
+
+
+def top_k_neighbours(vectors, chunk_ids: Sequence[str], top_k: int = 3,
+                     min_score: float = 0.3, block_size: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """Top-k cosine neighbours for every row of a sparse or dense vector matrix"""
+    indices, scores = top_k_arrays(normalize(vectors), top_k, min_score, block_size)
+    return neighbour_lists(indices, scores, chunk_ids)
+
+
+def compute_similarities(texts: Sequence[str], chunk_ids: Sequence[str],
+                         vectorizer: Optional[TfidfVectorizer] = None,
+                         top_k: int = 3, min_score: float = 0.3,
+                         block_size: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """Fit TF-IDF on the texts and return the `similarities.json` mapping"""
+    vectorizer = vectorizer or default_vectorizer()
+    tfidf_matrix = vectorizer.fit_transform(texts)
+    return top_k_neighbours(tfidf_matrix, chunk_ids, top_k, min_score, block_size)
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SimilarityGraph:
+    """Persistent top-k similarity graph that grows with the corpus.
+
+    New chunks are vectorized with the vocabulary and IDF weights of the last
+    full fit and only they are scored against the stored vectors (one sparse
+    new x N product), so an update is O(new x N) sparse work plus O(k) per
+    affected list instead of a refit and an N x N pass. The neighbour lists
+    of existing chunks that a new chunk beats are updated in place. Once the
+    chunks added since the last fit exceed `refit_ratio` of the fitted corpus
+    (vocabulary drift), or when a chunk's content changes or disappears, the
+    graph is refit from scratch.
+
+    On disk, vectors are stored as one segment per update, so saving an
+    update only writes the new rows.
+    """
+
+    def __init__(self, directory: str, top_k: int = 3, min_score: float = 0.3,
+                 refit_ratio: float = 0.25, block_size: Optional[int] = None):
+        self.directory = directory
+        self.top_k = top_k
+        self.min_score = min_score
+        self.refit_ratio = refit_ratio
+        self.block_size = block_size
+
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.vectors = None
+        self.chunk_ids: List[str] = []
+        self.digests: List[str] = []
+        self.indices = np.full((0, top_k), -1, dtype=np.int64)
+        self.scores = np.zeros((0, top_k))
+        self.fitted_count = 0
+        self.segments: List[str] = []
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load(self) -> bool:
+        """Load the saved graph; False if there is none or it was built with other settings"""
+        try:
+            with open(self._path('state.json'), 'r') as f:
+                state = json.load(f)
+            if (state['top_k'], state['min_score']) != (self.top_k, self.min_score):
+                return False
+            with open(self._path('vectorizer.pkl'), 'rb') as f:
+                self.vectorizer = pickle.load(f)
+            self.vectors = sparse.vstack(
+                [sparse.load_npz(self._path(segment)) for segment in state['segments']], format='csr'
+            )
+            neighbours = np.load(self._path('neighbours.npz'))
+            self.indices, self.scores = neighbours['indices'], neighbours['scores']
+        except (OSError, KeyError, ValueError, json.JSONDecodeError, pickle.UnpicklingError):
+            return False
+        self.chunk_ids, self.digests = state['chunk_ids'], state['digests']
+        self.fitted_count, self.segments = state['fitted_count'], state['segments']
+        return True
+
+    def save(self, new_segment=None) -> None:
+        """Write the state; only the vectors of `new_segment` (or all after a fit) are written"""
+        os.makedirs(self.directory, exist_ok=True)
+        if new_segment is None:
+            for segment in self.segments:
+                if os.path.exists(self._path(segment)):
+                    os.remove(self._path(segment))
+            self.segments = []
+            new_segment = self.vectors
+            with open(self._path('vectorizer.pkl'), 'wb') as f:
+                pickle.dump(self.vectorizer, f)
+        segment = f"vectors-{len(self.segments):05d}.npz"
+        sparse.save_npz(self._path(segment), sparse.csr_matrix(new_segment))
+        self.segments.append(segment)
+
+        np.savez(self._path('neighbours.npz'), indices=self.indices, scores=self.scores)
+        state = {
+            'top_k': self.top_k,
+            'min_score': self.min_score,
+            'fitted_count': self.fitted_count,
+            'segments': self.segments,
+            'chunk_ids': self.chunk_ids,
+            'digests': self.digests,
+        }
+        tmp_path = self._path('state.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._path('state.json'))
+
+    def fit(self, chunk_ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Refit the vocabulary and rebuild every neighbour list"""
+        self.vectorizer = default_vectorizer()
+        self.vectors = normalize(self.vectorizer.fit_transform(texts)).tocsr()
+        self.chunk_ids = list(chunk_ids)
+        self.digests = [text_digest(text) for text in texts]
+        self.indices, self.scores = top_k_arrays(self.vectors, self.top_k, self.min_score, self.block_size)
+        self.fitted_count = len(self.chunk_ids)
+        self.save()
+
+    def _insert(self, row: int, neighbour: int, score: float) -> None:
+        """Insert a neighbour into a row's best-first list if it makes the top k"""
+        row_indices, row_scores = self.indices[row], self.scores[row]
+        filled = row_indices >= 0
+        if filled.all() and score <= row_scores[-1]:
+            return
+        position = int(np.sum(filled & (row_scores >= score)))
+        row_indices[position + 1:] = row_indices[position:-1].copy()
+        row_scores[position + 1:] = row_scores[position:-1].copy()
+        row_indices[position], row_scores[position] = neighbour, score
+
+    def add(self, chunk_ids: Sequence[str], texts: Sequence[str]) -> None:
+        """Add new chunks using the frozen vocabulary and update affected neighbour lists"""
+        n_old = len(self.chunk_ids)
+        new_vectors = normalize(self.vectorizer.transform(texts)).tocsr()
+        self.vectors = sparse.vstack([self.vectors, new_vectors], format='csr')
+        self.chunk_ids.extend(chunk_ids)
+        self.digests.extend(text_digest(text) for text in texts)
+
+        new_indices = np.full((len(chunk_ids), self.top_k), -1, dtype=np.int64)
+        new_scores = np.zeros((len(chunk_ids), self.top_k))
+        self.indices = np.vstack([self.indices, new_indices])
+        self.scores = np.vstack([self.scores, new_scores])
+
+        transposed = self.vectors.T.tocsr()
+        block_size = score_block_rows(len(self.chunk_ids), self.block_size)
+        for block_start in range(0, len(chunk_ids), block_size):
+            block = new_vectors[block_start:block_start + block_size]
+            # Sparse scores: only chunks sharing a term with a new chunk appear
+            scores = (block @ transposed).tocoo()
+            keep = (scores.data > self.min_score) & (scores.col != scores.row + n_old + block_start)
+            for row, col, score in sorted(zip(scores.row[keep], scores.col[keep], scores.data[keep]),
+                                          key=lambda entry: -entry[2]):
+                new_row = n_old + block_start + int(row)
+                self._insert(new_row, int(col), float(score))
+                if col < n_old:
+                    # Similarity is symmetric: the new chunk may enter an existing list
+                    self._insert(int(col), new_row, float(score))
+
+        self.save(new_vectors)
+
+    def sync(self, chunk_ids: Sequence[str], texts: Sequence[str]) -> str:
+        """Bring the graph in line with the current chunks; returns 'unchanged', 'updated' or 'refit'"""
+        if self.vectorizer is None and not self.load():
+            self.fit(chunk_ids, texts)
+            return 'refit'
+
+        # Chunks are matched on (id, content) so edited chunks count as removed and re-added
+        known = Counter(zip(self.chunk_ids, self.digests))
+        new_positions = []
+        for position, (chunk_id, text) in enumerate(zip(chunk_ids, texts)):
+            key = (chunk_id, text_digest(text))
+            if known[key]:
+                known[key] -= 1
+            else:
+                new_positions.append(position)
+
+        # Removed chunks would leave holes in other neighbour lists
+        removed = sum(known.values())
+        drift = len(self.chunk_ids) + len(new_positions) - self.fitted_count
+        if removed or drift > self.refit_ratio * max(self.fitted_count, 1):
+            self.fit(chunk_ids, texts)
+            return 'refit'
+        if not new_positions:
+            return 'unchanged'
+        self.add([chunk_ids[i] for i in new_positions], [texts[i] for i in new_positions])
+        return 'updated'
+
+    def similarities(self) -> Dict[str, List[Dict]]:
+        """The graph as the `similarities.json` mapping"""
+        return neighbour_lists(self.indices, self.scores, self.chunk_ids)
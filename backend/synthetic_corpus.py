@@ -0,0 +1,165 @@
+# src/synthetic_corpus.py
+
+import os
+import random
+import argparse
+from datetime import date, timedelta
+from typing import List, Tuple
+from pdf_to_text import FinancialKeywords
+
+# Filler vocabulary for the non-keyword part of generated sentences
+FILLER_WORDS = (
+    'the', 'group', 'during', 'year', 'reported', 'continued', 'compared', 'with', 'previous',
+    'period', 'management', 'board', 'regional', 'segment', 'customers', 'products', 'across',
+    'markets', 'while', 'remained', 'stable', 'higher', 'lower', 'overall', 'division',
+    'strategy', 'investment', 'demand', 'volumes', 'prices', 'currency', 'effects', 'impact',
+    'quarter', 'results', 'significant', 'moderate', 'improvement', 'decline', 'further',
+    'new', 'orders', 'services', 'operations', 'employees', 'locations', 'projects', 'in',
+    'and', 'of', 'to', 'for', 'on', 'by', 'its', 'our', 'this', 'was', 'were', 'has', 'have'
+)
+COMPANIES = ('Alpine', 'Helvetia', 'Matterhorn', 'Rhine', 'Lakeside', 'Summit', 'Glacier', 'Jura')
+
+# Page geometry of generated PDFs (A4, 10pt Helvetica)
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+LINE_HEIGHT = 12
+LINE_CHARS = 95
+
+
+class SyntheticText:
+    """Reproducible financial-report-like text with a controlled keyword density"""
+
+    def __init__(self, seed: int = 0, keyword_density: float = 0.03):
+        self.rng = random.Random(seed)
+        self.keyword_density = keyword_density
+        self.keywords = FinancialKeywords.matcher().keywords
+
+    def sentence(self, min_words: int = 8, max_words: int = 30) -> str:
+        words = []
+        for _ in range(self.rng.randint(min_words, max_words)):
+            if self.rng.random() < self.keyword_density:
+                words.append(self.rng.choice(self.keywords))
+            else:
+                words.append(self.rng.choice(FILLER_WORDS))
+        if self.rng.random() < 0.3:
+            words.append(f"{self.rng.uniform(-20, 40):.1f}%")
+        return words[0].capitalize() + ' ' + ' '.join(words[1:]) + self.rng.choice('...!?')
+
+    def paragraph(self, sentences: int) -> str:
+        return ' '.join(self.sentence() for _ in range(sentences))
+
+    def page_lines(self, lines: int) -> List[str]:
+        """Lines of a page, wrapped to the page width; sentences run across lines and pages"""
+        text = self.paragraph(lines)
+        wrapped, line = [], ''
+        for word in text.split():
+            if line and len(line) + len(word) + 1 > LINE_CHARS:
+                wrapped.append(line)
+                if len(wrapped) == lines:
+                    break
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        if len(wrapped) < lines and line:
+            wrapped.append(line)
+        return wrapped
+
+
+def pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path: str, pages: List[List[str]]) -> None:
+    """Write a minimal PDF with one text line per string, using the built-in Helvetica font"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for lines in pages:
+        operations = [f"BT /F1 10 Tf {LINE_HEIGHT} TL 50 {PAGE_HEIGHT - 60} Td"]
+        operations.extend(f"({pdf_escape(line)}) Tj T*" for line in lines)
+        operations.append("ET")
+        stream = '\n'.join(operations).encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        ).encode('ascii'))
+        page_ids.append(len(objects))
+    kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode('ascii')
+
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def generate_reports(output_dir: str, reports: int = 4, pages: int = 20,
+                     keyword_density: float = 0.03, seed: int = 0) -> List[str]:
+    """Write synthetic annual reports named like the real ones (<company>_<year>.pdf)"""
+    os.makedirs(output_dir, exist_ok=True)
+    text = SyntheticText(seed, keyword_density)
+    lines_per_page = (PAGE_HEIGHT - 100) // LINE_HEIGHT
+    paths = []
+    for number in range(reports):
+        company = f"{COMPANIES[number % len(COMPANIES)]}{number // len(COMPANIES) or ''}"
+        path = os.path.join(output_dir, f"{company}_{2020 + number % 5}.pdf")
+        write_pdf(path, [text.page_lines(lines_per_page) for _ in range(pages)])
+        paths.append(path)
+    return paths
+
+
+def generate_articles(output_dir: str, articles: int = 20, keyword_density: float = 0.03,
+                      seed: int = 0, start: date = date(2024, 10, 1)) -> List[str]:
+    """Write synthetic news articles in the articles/ format (header, date, content)"""
+    os.makedirs(output_dir, exist_ok=True)
+    text = SyntheticText(seed + 1, keyword_density)
+    paths = []
+    for number in range(articles):
+        day = start + timedelta(days=number)
+        company = COMPANIES[number % len(COMPANIES)]
+        header = f"{company} Reports Quarterly Results {number + 1}"
+        path = os.path.join(output_dir, f"news_{day:%Y%m%d}_{company}_{number + 1:04d}.txt")
+        with open(path, 'w') as f:
+            f.write(f"{header}\n{day:%B %d, %Y}\n")
+            f.write('\n\n'.join(text.paragraph(6) for _ in range(text.rng.randint(3, 8))))
+        paths.append(path)
+    return paths
+
+
+def generate_corpus(output_dir: str, reports: int = 4, pages: int = 20, articles: int = 20,
+                    keyword_density: float = 0.03, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """Generate reports under <output_dir>/reports and articles under <output_dir>/articles"""
+    return (
+        generate_reports(os.path.join(output_dir, 'reports'), reports, pages, keyword_density, seed),
+        generate_articles(os.path.join(output_dir, 'articles'), articles, keyword_density, seed)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic financial reports and news articles")
+    parser.add_argument('output_dir')
+    parser.add_argument('--reports', type=int, default=4)
+    parser.add_argument('--pages', type=int, default=20, help="Pages per report")
+    parser.add_argument('--articles', type=int, default=20)
+    parser.add_argument('--keyword-density', type=float, default=0.03,
+                        help="Fraction of words drawn from the keyword taxonomy")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    reports, articles = generate_corpus(args.output_dir, args.reports, args.pages, args.articles,
+                                        args.keyword_density, args.seed)
+    print(f"Wrote {len(reports)} reports and {len(articles)} articles to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
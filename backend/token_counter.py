@@ -0,0 +1,91 @@
+# src/token_counter.py
+
+from typing import Dict, List, Tuple
+
+# Tokenizer of the sentence-transformers model used for chunk embeddings and
+# the number of wordpieces it embeds (everything after that is truncated)
+EMBEDDING_TOKENIZER = 'sentence-transformers/all-MiniLM-L6-v2'
+EMBEDDING_MAX_TOKENS = 256
+# Encoding used to budget the LLM prompt (see utils.construct_prompt)
+PROMPT_ENCODING = 'cl100k_base'
+
+
+class TokenCounter:
+    """Token counts for the embedding and prompt tokenizers.
+
+    The BERT-style embedding tokenizer splits on whitespace before applying
+    wordpieces, so a text's count is the sum of its words' counts; those are
+    cached per word, making counting incremental and mostly dictionary
+    lookups. Tokenizers are loaded lazily, once per process.
+    """
+
+    def __init__(self, embedding_tokenizer: str = EMBEDDING_TOKENIZER,
+                 embedding_max_tokens: int = EMBEDDING_MAX_TOKENS,
+                 prompt_encoding: str = PROMPT_ENCODING):
+        self.embedding_tokenizer_name = embedding_tokenizer
+        self.embedding_max_tokens = embedding_max_tokens
+        self.prompt_encoding_name = prompt_encoding
+        self._embedding_tokenizer = None
+        self._prompt_encoding = None
+        self._word_counts: Dict[str, int] = {}
+
+    def __getstate__(self) -> Dict:
+        # Worker processes load their own tokenizers
+        state = self.__dict__.copy()
+        state.update(_embedding_tokenizer=None, _prompt_encoding=None, _word_counts={})
+        return state
+
+    @property
+    def embedding_budget(self) -> int:
+        """Wordpieces available for content once [CLS] and [SEP] are added"""
+        return self.embedding_max_tokens - 2
+
+    def params(self) -> Dict:
+        """Settings that change chunk boundaries (used in cache keys)"""
+        return {
+            'embedding_tokenizer': self.embedding_tokenizer_name,
+            'embedding_max_tokens': self.embedding_max_tokens,
+        }
+
+    def _embedding(self):
+        if self._embedding_tokenizer is None:
+            from transformers import AutoTokenizer
+            self._embedding_tokenizer = AutoTokenizer.from_pretrained(self.embedding_tokenizer_name, use_fast=True)
+        return self._embedding_tokenizer
+
+    def _prompt(self):
+        if self._prompt_encoding is None:
+            import tiktoken
+            self._prompt_encoding = tiktoken.get_encoding(self.prompt_encoding_name)
+        return self._prompt_encoding
+
+    def word_tokens(self, word: str) -> int:
+        """Embedding tokens of a single whitespace-free word"""
+        count = self._word_counts.get(word)
+        if count is None:
+            count = len(self._embedding().tokenize(word))
+            self._word_counts[word] = count
+        return count
+
+    def embedding_tokens(self, text: str) -> int:
+        """Embedding tokens of a text, excluding special tokens"""
+        return sum(self.word_tokens(word) for word in text.split())
+
+    def prompt_tokens(self, text: str) -> int:
+        """Prompt tokens of a text"""
+        return len(self._prompt().encode(text))
+
+    def split_to_budget(self, text: str, budget: int) -> List[Tuple[str, int]]:
+        """Split an over-long text at word boundaries into (piece, tokens) pieces within `budget`"""
+        pieces = []
+        words, tokens = [], 0
+        for word in text.split():
+            word_count = self.word_tokens(word)
+            if words and tokens + word_count > budget:
+                pieces.append((' '.join(words), tokens))
+                words, tokens = [], 0
+            words.append(word)
+            tokens += word_count
+        if words:
+            pieces.append((' '.join(words), tokens))
+        return pieces
@@ -19,6 +19,9 @@ client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 embedding_model_name = 'all-MiniLM-L6-v2'
 embedding_model = SentenceTransformer(embedding_model_name)
 
+# Tokenizer for counting prompt tokens (same encoding the chunker records)
+prompt_tokenizer = tiktoken.get_encoding('cl100k_base')
+
 def load_faiss_index(index_file):
     """Load FAISS index from file."""
     index = faiss.read_index(index_file)
@@ -51,14 +54,14 @@ def construct_prompt(question, relevant_chunks, max_tokens=3000):
     prompt += f"Question: {question}\n\n"
     prompt += "Context:\n"
 
-    # Tokenizer for counting tokens
-    tokenizer = tiktoken.get_encoding('cl100k_base')
-
-    token_count = len(tokenizer.encode(prompt))
+    token_count = len(prompt_tokenizer.encode(prompt))
     for idx, row in relevant_chunks.iterrows():
         chunk_text = row['content']
         source = row.get('source', 'Unknown source')
-        tokens = len(tokenizer.encode(chunk_text))
+        # Chunks record their prompt token count at ingestion time
+        tokens = row.get('prompt_tokens')
+        if tokens is None or pd.isna(tokens):
+            tokens = len(prompt_tokenizer.encode(chunk_text))
         
         if token_count + tokens > max_tokens:
             break
@@ -5,6 +5,7 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+from bars import TRADING_DAYS, annualization_factor
 
 ### VISUALIZATION ###
 # - Performance Dashboard:
@@ -19,10 +20,13 @@ import numpy as np
 #   * Y-axis: Return
 
 class PortfolioVisualizer:
-    def __init__(self, prices_df: pd.DataFrame, returns_df: pd.DataFrame, portfolio_returns: pd.Series):
+    def __init__(self, prices_df: pd.DataFrame, returns_df: pd.DataFrame, portfolio_returns: pd.Series,
+                 frequency: str = '1d', periods_per_year: float = None):
         self.prices_df = prices_df
         self.returns_df = returns_df
         self.portfolio_returns = portfolio_returns
+        self.periods_per_year = periods_per_year or annualization_factor(frequency)
+        self.bars_per_day = max(1, int(round(self.periods_per_year / TRADING_DAYS)))
 
     def create_performance_dashboard(self):
         """Creates main performance dashboard"""
@@ -58,8 +62,8 @@ class PortfolioVisualizer:
             row=2, col=1
         )
 
-        # 4. Rolling Volatility (21 days)
-        rolling_vol = self.portfolio_returns.rolling(21).std() * np.sqrt(252)
+        # 4. Rolling Volatility (21 days, whatever the bar size)
+        rolling_vol = self.portfolio_returns.rolling(21 * self.bars_per_day).std() * np.sqrt(self.periods_per_year)
         fig.add_trace(
             go.Scatter(x=rolling_vol.index, y=rolling_vol,
                       name='21D Rolling Vol'),
@@ -78,8 +82,8 @@ class PortfolioVisualizer:
 
     def create_risk_return_scatter(self):
         """Creates risk-return scatter plot for all assets"""
-        annual_returns = self.returns_df.mean() * 252
-        annual_vol = self.returns_df.std() * np.sqrt(252)
+        annual_returns = self.returns_df.mean() * self.periods_per_year
+        annual_vol = self.returns_df.std() * np.sqrt(self.periods_per_year)
         
         fig = px.scatter(
             x=annual_vol, y=annual_returns,